@@ -1,4 +1,5 @@
 import os
+import sys
 from datetime import timedelta
 from pathlib import Path
 
@@ -46,6 +47,7 @@ INSTALLED_APPS = (
 )
 
 MIDDLEWARE = [
+    "sensor.metrics.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "allauth.account.middleware.AccountMiddleware",
@@ -92,6 +94,19 @@ REDIS_HOST = os.environ.get("REDIS_HOST", "localhost")
 REDIS_PORT = os.environ.get("REDIS_PORT", 6379)
 REDIS_CONNECTION_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}"
 
+TESTING = sys.argv[1:2] == ["test"]
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_CONNECTION_URL,
+    }
+}
+if TESTING:
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -128,6 +143,15 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=7),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=30),
 }
+# Authenticated users are cached in the shared cache, which changes to a
+# user invalidate, and for a few seconds in each process.
+USER_AUTH_CACHE_TIMEOUT = 300
+USER_AUTH_LOCAL_CACHE_TIMEOUT = 5
+USER_AUTH_LOCAL_CACHE_SIZE = 1024
+# Read-only requests trust the token claims without looking the user up.
+USER_AUTH_STATELESS_READS = (
+    os.environ.get("USER_AUTH_STATELESS_READS", "false").lower() == "true"
+)
 
 
 # Logging
@@ -157,16 +181,36 @@ SWAGGER_ENABLED = True
 # Cacheops
 CACHEOPS_REDIS = {"host": REDIS_HOST, "port": REDIS_PORT}
 CACHEOPS_DEFAULTS = {"timeout": 86400}
-CACHEOPS: dict = {"partners.PartnerKey": {}}
+CACHEOPS: dict = {
+    "sensor.sensor": {"ops": "all"},
+    "alert.sensoralert": {"ops": "all", "timeout": 3600},
+    "alert.alertrule": {"ops": "all"},
+}
+# A Redis outage falls back to the database instead of failing requests.
+CACHEOPS_DEGRADE_ON_FAILURE = True
 CACHING_ENABLED = True
+CACHEOPS_ENABLED = CACHING_ENABLED
+if TESTING:
+    CACHEOPS_CLIENT_CLASS = "sensor.testing.CacheopsFakeRedis"
 
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.StatelessReadJWTAuthentication"
+        if USER_AUTH_STATELESS_READS
+        else "user.authentication.CachedJWTAuthentication",
+    ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "sensor.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "sensor.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
     ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
-    "PAGE_SIZE": os.environ.get("PAGE_SIZE", 12),
+    "PAGE_SIZE": int(os.environ.get("PAGE_SIZE", 12)),
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend"
     ]
@@ -187,11 +231,96 @@ SWAGGER_SETTINGS = {
 # Google OAuth2
 API_DOMAIN = 'https://43af-212-42-113-145.ngrok-free.app'
 GOOGLE_API_V1_AUTH_CALLBACK_URL = f"{API_DOMAIN}/api/auth/google/callback/"
-GOOGLE_OAUTH_AUTHORIZE_URL = "https://accounts.google.com/o/oauth2/v2/auth"
+# The endpoints and signing keys of Google come from its discovery
+# document; pointing this at user.testing.FakeOAuthProvider runs the login
+# flow offline.
+GOOGLE_OAUTH_DISCOVERY_URL = os.environ.get(
+    "GOOGLE_OAUTH_DISCOVERY_URL",
+    "https://accounts.google.com/.well-known/openid-configuration",
+)
 GOOGLE_OAUTH_NAME = "google"
 GOOGLE_OAUTH_CLIENT_ID = os.environ.get('GOOGLE_OAUTH_CLIENT_ID')
 GOOGLE_OAUTH_CLIENT_SECRET = os.environ.get('GOOGLE_OAUTH_CLIENT_SECRET')
 
 
-SOCIAL_AUTH_SECRET = 'secret'
-SECRET_TOKEN_KEY = ''
\ No newline at end of file
+SOCIALACCOUNT_ADAPTER = "user.adapters.SocialAccountAdapter"
+OAUTH_HTTP_TIMEOUT = 10
+OAUTH_HTTP_POOL_SIZE = 10
+# Used when a metadata response does not say how long to keep it.
+OAUTH_METADATA_TTL = 3600
+
+SECRET_TOKEN_KEY = ''
+
+# Sensor data ingestion
+SENSOR_DATA_BULK_MAX_ROWS = int(
+    os.environ.get("SENSOR_DATA_BULK_MAX_ROWS", 10000)
+)
+SENSOR_DATA_BULK_BATCH_SIZE = 1000
+SENSOR_DATA_EXPORT_CHUNK_SIZE = 5000
+SENSOR_DATA_SERIES_MAX_POINTS = 500000
+# "direct" inserts readings in the request, "spool" acknowledges them once
+# they are fsynced to the spool and leaves the insert to the flusher.
+SENSOR_DATA_INGEST_MODE = os.environ.get("SENSOR_DATA_INGEST_MODE", "direct")
+SENSOR_DATA_SPOOL_DIR = os.environ.get(
+    "SENSOR_DATA_SPOOL_DIR", BASE_DIR / "spool"
+)
+SENSOR_DATA_SPOOL_FLUSH_BATCH_SIZE = 5000
+SENSOR_DATA_SPOOL_FLUSH_INTERVAL = 1.0
+SENSOR_DATA_ROLLUPS_ENABLED = (
+    os.environ.get("SENSOR_DATA_ROLLUPS_ENABLED", "true").lower() == "true"
+)
+SENSOR_DATA_PARTITION_MONTHS_AHEAD = 3
+SENSOR_DATA_RETENTION_MONTHS = (
+    int(os.environ["SENSOR_DATA_RETENTION_MONTHS"])
+    if os.environ.get("SENSOR_DATA_RETENTION_MONTHS")
+    else None
+)
+SENSOR_DATA_ARCHIVE_DIR = os.environ.get(
+    "SENSOR_DATA_ARCHIVE_DIR", BASE_DIR / "archive"
+)
+SENSOR_DATA_ARCHIVE_AFTER_DAYS = 365
+
+# Sensor device keys
+SENSOR_DEVICE_KEY_SECRET = os.environ.get(
+    "SENSOR_DEVICE_KEY_SECRET", SECRET_KEY
+)
+# Revoked keys stop working in other processes within this delay.
+SENSOR_DEVICE_KEY_REFRESH_SECONDS = None if TESTING else 60
+
+# Sensor alerts
+SENSOR_ALERT_RULES_ENABLED = (
+    os.environ.get("SENSOR_ALERT_RULES_ENABLED", "true").lower() == "true"
+)
+
+# Readings this many standard deviations away from the rolling mean of
+# their sensor raise an alert, once the mean has seen enough readings.
+SENSOR_ANOMALY_DETECTION_ENABLED = (
+    os.environ.get("SENSOR_ANOMALY_DETECTION_ENABLED", "true").lower()
+    == "true"
+)
+SENSOR_ANOMALY_THRESHOLD = 4.0
+SENSOR_ANOMALY_MIN_SAMPLES = 30
+# Weight of a new reading in the rolling statistics, about the inverse of
+# the number of readings they remember.
+SENSOR_ANOMALY_ALPHA = 0.01
+# Keep statistics per hour of the day, for metrics with a daily cycle.
+SENSOR_ANOMALY_SEASONAL = False
+
+# Sensor streams
+SENSOR_STREAM_BROKER = os.environ.get("SENSOR_STREAM_BROKER", "memory")
+SENSOR_STREAM_QUEUE_SIZE = 1000
+SENSOR_STREAM_KEEPALIVE_SECONDS = 15
+
+# Request metrics
+REQUEST_METRICS_ENABLED = (
+    os.environ.get("REQUEST_METRICS_ENABLED", "true").lower() == "true"
+)
+# When set, /metrics requires "Authorization: Bearer <token>"; otherwise
+# it is only served to staff users logged in with a session.
+REQUEST_METRICS_TOKEN = os.environ.get("REQUEST_METRICS_TOKEN")
+# Requests slower than this are logged with their SQL; off when unset.
+REQUEST_SLOW_LOG_MS = (
+    float(os.environ["REQUEST_SLOW_LOG_MS"])
+    if os.environ.get("REQUEST_SLOW_LOG_MS")
+    else None
+)
@@ -0,0 +1,140 @@
+import math
+from collections import defaultdict
+from typing import Iterable
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from sensor.alert.engine import save_alerts
+from sensor.alert.models import SensorAlert, SensorAnomalyState
+from sensor.data.models import SENSOR_DATA_METRICS, SensorData
+
+# The statistics kept per metric and slot.
+COUNT, MEAN, VARIANCE, ANOMALOUS = range(4)
+STATISTICS_DTYPE = np.dtype("<f8")
+HOURS_PER_DAY = 24
+
+
+def get_statistics_shape() -> tuple[int, int, int]:
+    slots = HOURS_PER_DAY if settings.SENSOR_ANOMALY_SEASONAL else 1
+    return len(SENSOR_DATA_METRICS), slots, ANOMALOUS + 1
+
+
+def unpack_statistics(data: bytes) -> list:
+    """
+    Return the statistics as nested lists, which are faster than NumPy to
+    update one reading at a time. Statistics packed for another shape,
+    after ``SENSOR_ANOMALY_SEASONAL`` changed, start over.
+    """
+    shape = get_statistics_shape()
+    statistics = np.frombuffer(data, dtype=STATISTICS_DTYPE)
+    if statistics.size != math.prod(shape):
+        statistics = np.zeros(shape, dtype=STATISTICS_DTYPE)
+    return statistics.reshape(shape).tolist()
+
+
+def pack_statistics(statistics: list) -> bytes:
+    return np.array(statistics, dtype=STATISTICS_DTYPE).tobytes()
+
+
+def update_statistics(
+    statistics: list[float], value: float
+) -> float | None:
+    """
+    Score ``value`` against the mean and variance of ``statistics``, as a
+    number of standard deviations, then fold it in.
+
+    The weight of a new value is ``1 / count`` until it falls below
+    ``SENSOR_ANOMALY_ALPHA``: a Welford running mean and variance over the
+    first readings, then an exponentially weighted one that follows slow
+    drifts.
+    """
+    count, mean, variance, _ = statistics
+    score = None
+    if count >= settings.SENSOR_ANOMALY_MIN_SAMPLES and variance > 0:
+        score = abs(value - mean) / math.sqrt(variance)
+
+    count += 1
+    weight = max(settings.SENSOR_ANOMALY_ALPHA, 1 / count)
+    delta = value - mean
+    statistics[COUNT] = count
+    statistics[MEAN] = mean + weight * delta
+    statistics[VARIANCE] = (1 - weight) * (variance + weight * delta**2)
+    return score
+
+
+def _detect_sensor_anomalies(
+    state: SensorAnomalyState, readings: list[SensorData]
+) -> list[SensorAlert]:
+    statistics = unpack_statistics(bytes(state.statistics))
+    seasonal = settings.SENSOR_ANOMALY_SEASONAL
+    threshold = settings.SENSOR_ANOMALY_THRESHOLD
+    alerts = []
+    for reading in sorted(readings, key=lambda reading: reading.date):
+        slot = reading.date.hour if seasonal else 0
+        for index, metric in enumerate(SENSOR_DATA_METRICS):
+            metric_statistics = statistics[index][slot]
+            mean = metric_statistics[MEAN]
+            value = float(getattr(reading, metric))
+            score = update_statistics(metric_statistics, value)
+            anomalous = score is not None and score >= threshold
+            # A run of anomalous readings raises a single alert.
+            if anomalous and not metric_statistics[ANOMALOUS]:
+                alerts.append(
+                    SensorAlert(
+                        sensor_id=reading.sensor_id,
+                        description=(
+                            f"Anomalous {metric}: {value:.2f} is "
+                            f"{score:.1f} standard deviations from the "
+                            f"mean of {mean:.2f}."
+                        ),
+                        date=reading.date,
+                    )
+                )
+            metric_statistics[ANOMALOUS] = float(anomalous)
+    state.statistics = pack_statistics(statistics)
+    return alerts
+
+
+def detect_anomalies(readings: Iterable[SensorData]) -> list[SensorAlert]:
+    """
+    Update the rolling statistics of the sensors of ``readings`` and
+    alert on the readings scoring ``SENSOR_ANOMALY_THRESHOLD`` standard
+    deviations or more away from the mean of their sensor.
+
+    The states are locked for the rest of the transaction, so concurrent
+    batches of the same sensor are folded in one after the other.
+    """
+    if not settings.SENSOR_ANOMALY_DETECTION_ENABLED:
+        return []
+    # The statistics are saved in the transaction that inserts the
+    # readings, so a batch replayed after a crash was never counted; only
+    # a reading passed twice in one batch is.
+    readings_by_sensor = defaultdict(dict)
+    for reading in readings:
+        readings_by_sensor[reading.sensor_id][reading.id] = reading
+    if not readings_by_sensor:
+        return []
+
+    with transaction.atomic():
+        SensorAnomalyState.objects.bulk_create(
+            (
+                SensorAnomalyState(sensor_id=sensor_id, statistics=b"")
+                for sensor_id in readings_by_sensor
+            ),
+            ignore_conflicts=True,
+        )
+        states = list(
+            SensorAnomalyState.objects.select_for_update()
+            .filter(sensor_id__in=readings_by_sensor)
+            .order_by("sensor_id")
+        )
+        alerts = []
+        for state in states:
+            alerts += _detect_sensor_anomalies(
+                state, list(readings_by_sensor[state.sensor_id].values())
+            )
+        SensorAnomalyState.objects.bulk_update(states, ["statistics"])
+    save_alerts(alerts)
+    return alerts
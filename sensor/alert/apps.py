@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AlertConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "sensor.alert"
+
+    def ready(self):
+        from sensor.alert import receivers  # noqa: F401
@@ -0,0 +1,248 @@
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Iterable
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+
+from sensor.alert.models import (
+    AlertRule,
+    AlertRuleKind,
+    AlertRuleOperator,
+    SensorAlert,
+)
+from sensor.conditional import SENSOR_ALERT_RESOURCE, touch_resources
+from sensor.data.archive import to_microseconds
+from sensor.data.models import SensorData
+from sensor.models import Sensor
+from sensor.pubsub import publish_alerts
+
+COMPARATORS = {
+    AlertRuleOperator.GT: np.greater,
+    AlertRuleOperator.GTE: np.greater_equal,
+    AlertRuleOperator.LT: np.less,
+    AlertRuleOperator.LTE: np.less_equal,
+}
+
+MICROSECONDS_PER_MINUTE = 60_000_000
+
+
+@dataclass
+class RuleState:
+    last_date: int
+    last_value: float
+    breach_start: int | None = None
+    fired: bool = False
+    definition: tuple = ()
+
+
+def get_rule_definition(rule: AlertRule) -> tuple:
+    return (
+        rule.sensor_id,
+        rule.sensor_type,
+        rule.metric,
+        rule.kind,
+        rule.operator,
+        rule.threshold,
+        rule.duration,
+    )
+
+
+class AlertRuleEngine:
+    """
+    Evaluates alert rules against batches of ingested readings.
+
+    Every (rule, sensor) pair keeps its rolling state in memory: the last
+    reading it saw and when the current breach started. Readings older
+    than that state are skipped, and a breach raises a single alert once
+    it has lasted the rule's duration, until the condition clears again.
+
+    The state is kept per process. It records the definition of the rule
+    it was built for, so every worker starts over once a rule is edited,
+    not only the one that saved it.
+    """
+
+    def __init__(self):
+        self._states: dict[tuple[int, int], RuleState] = {}
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._states.clear()
+
+    def forget_rule(self, rule_id: int) -> None:
+        with self._lock:
+            for key in [key for key in self._states if key[0] == rule_id]:
+                del self._states[key]
+
+    def get_rules(
+        self, sensor_ids: Iterable[int]
+    ) -> dict[int, list[AlertRule]]:
+        sensor_types = dict(
+            Sensor.objects.filter(id__in=sensor_ids).values_list("id", "type")
+        )
+        rules = AlertRule.objects.filter(
+            Q(sensor_id__in=sensor_types)
+            | Q(sensor_type__in=set(sensor_types.values())),
+            is_active=True,
+        )
+        rules_by_sensor = defaultdict(list)
+        for rule in rules:
+            if rule.sensor_id is not None:
+                rules_by_sensor[rule.sensor_id].append(rule)
+                continue
+            for sensor_id, sensor_type in sensor_types.items():
+                if sensor_type == rule.sensor_type:
+                    rules_by_sensor[sensor_id].append(rule)
+        return rules_by_sensor
+
+    def evaluate(self, readings: Iterable[SensorData]) -> list[SensorAlert]:
+        readings_by_sensor = defaultdict(list)
+        for reading in readings:
+            readings_by_sensor[reading.sensor_id].append(reading)
+        rules_by_sensor = self.get_rules(readings_by_sensor)
+
+        alerts = []
+        with self._lock:
+            for sensor_id, rules in rules_by_sensor.items():
+                sensor_readings = sorted(
+                    readings_by_sensor[sensor_id],
+                    key=lambda reading: (reading.date, reading.id),
+                )
+                dates = np.array(
+                    [
+                        to_microseconds(reading.date)
+                        for reading in sensor_readings
+                    ],
+                    dtype=np.int64,
+                )
+                for rule in rules:
+                    values = np.array(
+                        [
+                            float(getattr(reading, rule.metric))
+                            for reading in sensor_readings
+                        ]
+                    )
+                    for index, observed in self._evaluate_rule(
+                        rule, sensor_id, dates, values
+                    ):
+                        alerts.append(
+                            SensorAlert(
+                                sensor_id=sensor_id,
+                                rule=rule,
+                                description=self.describe(rule, observed),
+                                date=sensor_readings[index].date,
+                            )
+                        )
+        return alerts
+
+    def _evaluate_rule(
+        self,
+        rule: AlertRule,
+        sensor_id: int,
+        dates: np.ndarray,
+        values: np.ndarray,
+    ) -> list[tuple[int, float]]:
+        definition = get_rule_definition(rule)
+        state = self._states.get((rule.id, sensor_id))
+        if state is not None and state.definition != definition:
+            state = None
+        positions = np.arange(len(dates))
+        if state is not None:
+            positions = positions[dates > state.last_date]
+        if not len(positions):
+            return []
+        dates, values = dates[positions], values[positions]
+
+        if rule.kind == AlertRuleKind.RATE_OF_CHANGE:
+            # The first reading of a sensor only sets the baseline.
+            previous = state or RuleState(dates[0], values[0])
+            previous_dates = np.concatenate(([previous.last_date], dates[:-1]))
+            previous_values = np.concatenate(
+                ([previous.last_value], values[:-1])
+            )
+            minutes = (dates - previous_dates) / MICROSECONDS_PER_MINUTE
+            with np.errstate(divide="ignore", invalid="ignore"):
+                observed = np.where(
+                    minutes > 0, (values - previous_values) / minutes, np.nan
+                )
+        else:
+            observed = values
+        with np.errstate(invalid="ignore"):
+            breached = COMPARATORS[rule.operator](
+                observed, float(rule.threshold)
+            )
+
+        carried = state is not None and state.breach_start is not None
+        starts = breached & ~np.concatenate(([carried], breached[:-1]))
+        run_starts = np.maximum.accumulate(
+            np.where(starts, np.arange(len(dates)), -1)
+        )
+        start_dates = np.where(
+            run_starts >= 0,
+            dates[run_starts.clip(0)],
+            state.breach_start if carried else 0,
+        )
+        # Runs are numbered from 1; run 0 is the breach carried over from
+        # the previous batch.
+        runs = np.cumsum(starts)
+        due = breached & (
+            dates - start_dates >= rule.duration // timedelta(microseconds=1)
+        )
+        if carried and state.fired:
+            due &= runs > 0
+        due_indexes = np.flatnonzero(due)
+        _, first = np.unique(runs[due_indexes], return_index=True)
+        fired_indexes = due_indexes[first]
+
+        if breached[-1]:
+            fired = len(fired_indexes) > 0 and bool(
+                runs[fired_indexes[-1]] == runs[-1]
+            )
+            self._states[rule.id, sensor_id] = RuleState(
+                int(dates[-1]),
+                float(values[-1]),
+                int(start_dates[-1]),
+                fired or (carried and state.fired and runs[-1] == 0),
+                definition,
+            )
+        else:
+            self._states[rule.id, sensor_id] = RuleState(
+                int(dates[-1]), float(values[-1]), definition=definition
+            )
+        return [
+            (int(positions[index]), float(observed[index]))
+            for index in fired_indexes
+        ]
+
+    @staticmethod
+    def describe(rule: AlertRule, observed: float) -> str:
+        condition = (
+            f"{rule.metric} {rule.get_operator_display()} {rule.threshold}"
+        )
+        if rule.kind == AlertRuleKind.RATE_OF_CHANGE:
+            condition += " per minute"
+        if rule.duration:
+            condition += f" for {rule.duration}"
+        return f"{rule.title}: {condition} (observed {observed:.2f})"
+
+
+alert_rule_engine = AlertRuleEngine()
+
+
+def save_alerts(alerts: list[SensorAlert]) -> None:
+    if alerts:
+        SensorAlert.objects.bulk_create(alerts)
+        touch_resources(SENSOR_ALERT_RESOURCE)
+        publish_alerts(alerts)
+
+
+def create_rule_alerts(readings: Iterable[SensorData]) -> list[SensorAlert]:
+    if not settings.SENSOR_ALERT_RULES_ENABLED:
+        return []
+    alerts = alert_rule_engine.evaluate(readings)
+    save_alerts(alerts)
+    return alerts
@@ -0,0 +1,13 @@
+from django_filters import rest_framework as filters
+
+from sensor.alert.models import SensorAlert
+from sensor.data.filters import DATE_RANGE_LOOKUPS
+
+
+class SensorAlertFilterSet(filters.FilterSet):
+    class Meta:
+        model = SensorAlert
+        fields = {
+            "sensor": ["exact", "in"],
+            "date": DATE_RANGE_LOOKUPS,
+        }
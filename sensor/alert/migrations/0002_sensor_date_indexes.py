@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:12
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("alert", "0001_initial"),
+        ("sensor", "0001_initial"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="sensoralert",
+            index=models.Index(
+                fields=["sensor", "-date", "-id"],
+                name="sensoralert_sensor_date_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="sensoralert",
+            index=models.Index(
+                fields=["-date", "-id"], name="sensoralert_date_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,116 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:27
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("alert", "0002_sensor_date_indexes"),
+        ("sensor", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AlertRule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("title", models.CharField(max_length=255)),
+                (
+                    "sensor_type",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("OUTDOOR", "Outdoor"),
+                            ("INDOOR", "Indoor"),
+                            ("ALL_PURPOSE", "All Purpose"),
+                        ],
+                        null=True,
+                    ),
+                ),
+                (
+                    "metric",
+                    models.CharField(
+                        choices=[
+                            ("temperature", "Temperature"),
+                            ("humidity", "Humidity"),
+                            ("wind_speed", "Wind Speed"),
+                        ]
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("VALUE", "Value"),
+                            ("RATE_OF_CHANGE", "Rate of change per minute"),
+                        ],
+                        default="VALUE",
+                    ),
+                ),
+                (
+                    "operator",
+                    models.CharField(
+                        choices=[
+                            ("gt", ">"),
+                            ("gte", ">="),
+                            ("lt", "<"),
+                            ("lte", "<="),
+                        ]
+                    ),
+                ),
+                (
+                    "threshold",
+                    models.DecimalField(decimal_places=2, max_digits=10),
+                ),
+                ("duration", models.DurationField(default=datetime.timedelta)),
+                ("is_active", models.BooleanField(default=True)),
+                (
+                    "sensor",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="sensor.sensor",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="sensoralert",
+            name="rule",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="alert.alertrule",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="alertrule",
+            constraint=models.CheckConstraint(
+                condition=models.Q(
+                    models.Q(
+                        ("sensor__isnull", False),
+                        ("sensor_type__isnull", True),
+                    ),
+                    models.Q(
+                        ("sensor__isnull", True),
+                        ("sensor_type__isnull", False),
+                    ),
+                    _connector="OR",
+                ),
+                name="alertrule_sensor_or_sensor_type",
+            ),
+        ),
+    ]
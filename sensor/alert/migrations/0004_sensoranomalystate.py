@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("alert", "0003_alertrule"),
+        ("sensor", "0002_sensordevicekey"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SensorAnomalyState",
+            fields=[
+                (
+                    "sensor",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to="sensor.sensor",
+                    ),
+                ),
+                ("statistics", models.BinaryField()),
+                ("last_date", models.DateTimeField(null=True)),
+            ],
+        ),
+    ]
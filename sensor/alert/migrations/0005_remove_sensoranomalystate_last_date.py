@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:16
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("alert", "0004_sensoranomalystate"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="sensoranomalystate",
+            name="last_date",
+        ),
+    ]
@@ -1,9 +1,83 @@
+from datetime import timedelta
+
 from django.db import models
 
-from sensor.models import Sensor
+from sensor.models import Sensor, SensorType
+
+
+class AlertMetric(models.TextChoices):
+    TEMPERATURE = "temperature", "Temperature"
+    HUMIDITY = "humidity", "Humidity"
+    WIND_SPEED = "wind_speed", "Wind Speed"
+
+
+class AlertRuleKind(models.TextChoices):
+    VALUE = "VALUE", "Value"
+    RATE_OF_CHANGE = "RATE_OF_CHANGE", "Rate of change per minute"
+
+
+class AlertRuleOperator(models.TextChoices):
+    GT = "gt", ">"
+    GTE = "gte", ">="
+    LT = "lt", "<"
+    LTE = "lte", "<="
+
+
+class AlertRule(models.Model):
+    title = models.CharField(max_length=255)
+    sensor = models.ForeignKey(
+        Sensor, models.CASCADE, null=True, blank=True
+    )
+    sensor_type = models.CharField(
+        choices=SensorType.choices, null=True, blank=True
+    )
+    metric = models.CharField(choices=AlertMetric.choices)
+    kind = models.CharField(
+        choices=AlertRuleKind.choices, default=AlertRuleKind.VALUE
+    )
+    operator = models.CharField(choices=AlertRuleOperator.choices)
+    threshold = models.DecimalField(max_digits=10, decimal_places=2)
+    duration = models.DurationField(default=timedelta)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    models.Q(sensor__isnull=False, sensor_type__isnull=True)
+                    | models.Q(sensor__isnull=True, sensor_type__isnull=False)
+                ),
+                name="alertrule_sensor_or_sensor_type",
+            )
+        ]
 
 
 class SensorAlert(models.Model):
     sensor = models.ForeignKey(Sensor, models.CASCADE)
+    rule = models.ForeignKey(
+        AlertRule, models.SET_NULL, null=True, blank=True
+    )
     description = models.TextField()
     date = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["sensor", "-date", "-id"],
+                name="sensoralert_sensor_date_idx",
+            ),
+            models.Index(fields=["-date", "-id"], name="sensoralert_date_idx"),
+        ]
+
+
+class SensorAnomalyState(models.Model):
+    """
+    Rolling statistics of the readings of a sensor, packed by
+    ``sensor.alert.anomaly`` into a float64 array of (metric, slot,
+    statistic), where slots are hours of the day in seasonal mode.
+    """
+
+    sensor = models.OneToOneField(
+        Sensor, models.CASCADE, primary_key=True, related_name="+"
+    )
+    statistics = models.BinaryField()
@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from sensor.alert.anomaly import detect_anomalies
+from sensor.alert.engine import alert_rule_engine, create_rule_alerts
+from sensor.alert.models import AlertRule
+from sensor.data.signals import sensor_data_ingested
+
+
+@receiver(sensor_data_ingested)
+def evaluate_alert_rules(sender, readings, **kwargs):
+    create_rule_alerts(readings)
+
+
+@receiver(sensor_data_ingested)
+def detect_sensor_anomalies(sender, readings, **kwargs):
+    detect_anomalies(readings)
+
+
+@receiver(post_save, sender=AlertRule)
+@receiver(post_delete, sender=AlertRule)
+def reset_alert_rule_state(sender, instance, **kwargs):
+    alert_rule_engine.forget_rule(instance.id)
@@ -1,15 +1,52 @@
 from rest_framework import serializers
 
-from sensor.alert.models import SensorAlert
+from sensor.alert.models import AlertRule, SensorAlert
+from sensor.metrics import SerializerTimingMixin
 
 
-class SensorAlertSerializer(serializers.ModelSerializer):
+class SensorAlertSerializer(
+    SerializerTimingMixin, serializers.ModelSerializer
+):
     class Meta:
         model = SensorAlert
         fields = [
             "id",
             "sensor",
+            "rule",
             "description",
             "date",
         ]
+        read_only_fields = ["id", "rule"]
+
+
+class AlertRuleSerializer(SerializerTimingMixin, serializers.ModelSerializer):
+    class Meta:
+        model = AlertRule
+        fields = [
+            "id",
+            "title",
+            "sensor",
+            "sensor_type",
+            "metric",
+            "kind",
+            "operator",
+            "threshold",
+            "duration",
+            "is_active",
+        ]
         read_only_fields = ["id"]
+
+    def validate(self, attrs):
+        sensor = attrs.get("sensor", getattr(self.instance, "sensor", None))
+        sensor_type = attrs.get(
+            "sensor_type", getattr(self.instance, "sensor_type", None)
+        )
+        if (sensor is None) == (sensor_type is None):
+            raise serializers.ValidationError(
+                {
+                    "non_field_errors": [
+                        "Set exactly one of sensor or sensor_type."
+                    ]
+                }
+            )
+        return attrs
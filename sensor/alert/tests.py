@@ -1,3 +1,309 @@
-from django.test import TestCase
+from datetime import datetime, timedelta, timezone as dt_timezone
 
-# Create your tests here.
+import numpy as np
+from cacheops import invalidate_all
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from sensor.alert.anomaly import (
+    detect_anomalies,
+    get_statistics_shape,
+    unpack_statistics,
+    update_statistics,
+)
+from sensor.alert.engine import alert_rule_engine
+from sensor.alert.models import (
+    AlertMetric,
+    AlertRule,
+    AlertRuleKind,
+    AlertRuleOperator,
+    SensorAlert,
+    SensorAnomalyState,
+)
+from sensor.data.models import SensorData
+from sensor.data.services import ingest_sensor_data
+from sensor.models import Sensor, SensorStatus, SensorType
+from user.models import User
+
+
+class SensorAlertAPITests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email='test@gmail.com',
+            password='password',
+        )
+        self.sensor = Sensor.objects.create(
+            title='sensor title',
+            type=SensorType.OUTDOOR,
+            status=SensorStatus.ACTIVE,
+            model='sensor model',
+            installation_date=timezone.now()
+        )
+        now = timezone.now()
+        SensorAlert.objects.bulk_create(
+            SensorAlert(
+                sensor=self.sensor,
+                description=f'alert {index}',
+                date=now - timezone.timedelta(minutes=index),
+            )
+            for index in range(3)
+        )
+
+    def test_get_alerts_with_cursor(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/sensors-alerts/?page_size=2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row['description'] for row in response.json()['results']],
+            ['alert 0', 'alert 1'],
+        )
+
+        response = self.client.get(response.json()['next'])
+        self.assertEqual(
+            [row['description'] for row in response.json()['results']],
+            ['alert 2'],
+        )
+        self.assertIsNone(response.json()['next'])
+
+    def test_filter_alerts_by_date_range(self):
+        self.client.force_authenticate(self.user)
+        alert = SensorAlert.objects.get(description='alert 1')
+        response = self.client.get(
+            '/api/sensors-alerts/',
+            {
+                'date__gte': alert.date.isoformat(),
+                'date__lt': (alert.date + timedelta(seconds=1)).isoformat(),
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row['description'] for row in response.json()['results']],
+            ['alert 1'],
+        )
+
+
+class SensorAlertCacheTests(APITransactionTestCase):
+    def setUp(self):
+        invalidate_all()
+        self.user = User.objects.create(
+            email='test@gmail.com',
+            password='password',
+        )
+        self.sensors = [
+            Sensor.objects.create(
+                title=f'sensor {index}',
+                type=SensorType.OUTDOOR,
+                status=SensorStatus.ACTIVE,
+                model='sensor model',
+                installation_date=timezone.now()
+            )
+            for index in range(2)
+        ]
+
+    def create_alert(self, sensor, description):
+        SensorAlert.objects.create(
+            sensor=sensor, description=description, date=timezone.now()
+        )
+
+    def test_sensor_alert_list_is_invalidated_per_sensor(self):
+        self.client.force_authenticate(self.user)
+        self.create_alert(self.sensors[0], 'first')
+        url = f'/api/sensors-alerts/?sensor={self.sensors[0].id}'
+        self.client.get(url)
+
+        # Alerts of another sensor leave the cached list alone.
+        self.create_alert(self.sensors[1], 'other')
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        self.create_alert(self.sensors[0], 'second')
+        response = self.client.get(url)
+        self.assertEqual(
+            [row['description'] for row in response.json()['results']],
+            ['second', 'first'],
+        )
+
+
+class AlertRuleEngineTests(APITestCase):
+    def setUp(self):
+        alert_rule_engine.reset()
+        self.user = User.objects.create(
+            email='test@gmail.com',
+            password='password',
+        )
+        self.sensor = Sensor.objects.create(
+            title='sensor title',
+            type=SensorType.OUTDOOR,
+            status=SensorStatus.ACTIVE,
+            model='sensor model',
+            installation_date=timezone.now()
+        )
+        self.start = datetime(2024, 6, 1, tzinfo=dt_timezone.utc)
+
+    def ingest(self, **values_by_minute):
+        ingest_sensor_data(
+            [
+                SensorData(
+                    sensor=self.sensor,
+                    temperature=values.get('temperature', 20),
+                    humidity=50,
+                    wind_speed=values.get('wind_speed', 1),
+                    date=self.start + timedelta(minutes=int(minute[1:])),
+                )
+                for minute, values in values_by_minute.items()
+            ]
+        )
+
+    def get_alert_minutes(self):
+        return [
+            int((date - self.start).total_seconds() // 60)
+            for date in SensorAlert.objects.order_by('date').values_list(
+                'date', flat=True
+            )
+        ]
+
+    def test_threshold_rule_fires_once_per_sustained_breach(self):
+        rule = AlertRule.objects.create(
+            title='Heat',
+            sensor=self.sensor,
+            metric=AlertMetric.TEMPERATURE,
+            operator=AlertRuleOperator.GT,
+            threshold=40,
+            duration=timedelta(minutes=10),
+        )
+        self.ingest(m0={'temperature': 41}, m5={'temperature': 42})
+        self.assertEqual(self.get_alert_minutes(), [])
+
+        self.ingest(
+            m10={'temperature': 43},
+            m12={'temperature': 44},
+            m13={'temperature': 30},
+            m14={'temperature': 45},
+            m24={'temperature': 45},
+        )
+        self.assertEqual(self.get_alert_minutes(), [10, 24])
+        alert = SensorAlert.objects.order_by('date').first()
+        self.assertEqual(alert.rule, rule)
+        self.assertEqual(
+            alert.description,
+            'Heat: temperature > 40.00 for 0:10:00 (observed 43.00)',
+        )
+
+    def test_edited_rule_starts_over_without_the_save_signal(self):
+        rule = AlertRule.objects.create(
+            title='Heat',
+            sensor=self.sensor,
+            metric=AlertMetric.TEMPERATURE,
+            operator=AlertRuleOperator.GT,
+            threshold=40,
+            duration=timedelta(minutes=10),
+        )
+        self.ingest(m0={'temperature': 41})
+        # As seen by a worker other than the one that saved the rule.
+        AlertRule.objects.filter(id=rule.id).update(threshold=41)
+
+        self.ingest(m10={'temperature': 42})
+        self.assertEqual(self.get_alert_minutes(), [])
+
+    def test_rate_of_change_rule_applies_to_sensor_type(self):
+        AlertRule.objects.create(
+            title='Gust',
+            sensor_type=SensorType.OUTDOOR,
+            metric=AlertMetric.WIND_SPEED,
+            kind=AlertRuleKind.RATE_OF_CHANGE,
+            operator=AlertRuleOperator.GTE,
+            threshold=5,
+        )
+        self.ingest(
+            m0={'wind_speed': 1}, m1={'wind_speed': 2}, m3={'wind_speed': 14}
+        )
+        self.assertEqual(self.get_alert_minutes(), [3])
+
+    def test_rule_needs_sensor_or_sensor_type(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            '/api/alert-rules/',
+            {
+                'title': 'Heat',
+                'metric': 'temperature',
+                'operator': 'gt',
+                'threshold': '40',
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AnomalyStatisticsTests(SimpleTestCase):
+    @override_settings(SENSOR_ANOMALY_ALPHA=0)
+    def test_statistics_match_welford_without_decay(self):
+        values = np.random.default_rng(0).normal(20, 3, 500)
+        statistics = [0.0, 0.0, 0.0, 0.0]
+        for value in values:
+            update_statistics(statistics, float(value))
+        self.assertEqual(statistics[0], 500)
+        self.assertAlmostEqual(statistics[1], values.mean())
+        self.assertAlmostEqual(statistics[2], values.var())
+
+    @override_settings(SENSOR_ANOMALY_SEASONAL=True)
+    def test_statistics_of_another_shape_start_over(self):
+        self.assertEqual(get_statistics_shape(), (3, 24, 4))
+        statistics = unpack_statistics(np.ones(12).tobytes())
+        self.assertEqual(np.array(statistics).shape, (3, 24, 4))
+        self.assertFalse(np.array(statistics).any())
+
+
+class AnomalyDetectionTests(APITestCase):
+    def setUp(self):
+        self.sensor = Sensor.objects.create(
+            title='sensor title',
+            type=SensorType.OUTDOOR,
+            status=SensorStatus.ACTIVE,
+            model='sensor model',
+            installation_date=timezone.now()
+        )
+        self.start = datetime(2024, 6, 1, tzinfo=dt_timezone.utc)
+
+    def ingest(self, temperatures, first_minute=0):
+        ingest_sensor_data(
+            [
+                SensorData(
+                    sensor=self.sensor,
+                    temperature=temperature,
+                    humidity=50,
+                    wind_speed=1,
+                    date=self.start + timedelta(minutes=first_minute + index),
+                )
+                for index, temperature in enumerate(temperatures)
+            ]
+        )
+
+    def test_anomalous_readings_raise_one_alert_per_run(self):
+        self.ingest([19.5, 20.5] * 30)
+        self.assertFalse(SensorAlert.objects.exists())
+
+        self.ingest([30, 31, 20, 30], first_minute=60)
+        alerts = SensorAlert.objects.order_by('date')
+        self.assertEqual(
+            [alert.date.minute for alert in alerts], [0, 3]
+        )
+        self.assertEqual(
+            alerts[0].description,
+            'Anomalous temperature: 30.00 is 20.0 standard deviations '
+            'from the mean of 20.00.',
+        )
+
+    def test_statistics_count_late_readings_once(self):
+        self.ingest([19.5, 20.5] * 5)
+        # Late readings, with the timestamps of those already counted.
+        self.ingest([19.5, 20.5] * 5)
+        readings = list(SensorData.objects.order_by('id')[:2])
+        detect_anomalies(readings + readings)
+
+        state = SensorAnomalyState.objects.get(sensor=self.sensor)
+        self.assertEqual(len(state.statistics), 3 * 4 * 8)
+        statistics = unpack_statistics(bytes(state.statistics))
+        count, mean, variance, _ = statistics[0][0]
+        self.assertEqual((count, mean), (22, 20))
+        self.assertAlmostEqual(variance, 0.25)
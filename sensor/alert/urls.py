@@ -9,5 +9,10 @@ router.register(
     views.SensorAlertViewSet,
     basename="sensor-alerts",
 )
+router.register(
+    r"api/alert-rules",
+    views.AlertRuleViewSet,
+    basename="alert-rules",
+)
 
 urlpatterns = [path("", include(router.urls))]
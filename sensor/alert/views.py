@@ -1,15 +1,43 @@
 from rest_framework import viewsets
 
-from sensor.alert.models import SensorAlert
-from sensor.alert.serializers import SensorAlertSerializer
+from sensor.alert.filters import SensorAlertFilterSet
+from sensor.alert.models import AlertRule, SensorAlert
+from sensor.conditional import (
+    SENSOR_ALERT_RESOURCE,
+    ConditionalGetMixin,
+    touch_resources,
+)
+from sensor.alert.serializers import (
+    AlertRuleSerializer,
+    SensorAlertSerializer,
+)
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from sensor.encoders import ValuesListMixin
+from sensor.pagination import TimeSeriesCursorPagination
 
 
-class SensorAlertViewSet(viewsets.ModelViewSet):
+class SensorAlertViewSet(
+    ConditionalGetMixin, ValuesListMixin, viewsets.ModelViewSet
+):
     serializer_class = SensorAlertSerializer
     model = SensorAlert
-    queryset = SensorAlert.objects.all().order_by("-date")
+    queryset = SensorAlert.objects.all().order_by("-date", "-id")
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = ["sensor"]
-    permission_classes = [IsAuthenticated]
\ No newline at end of file
+    filterset_class = SensorAlertFilterSet
+    pagination_class = TimeSeriesCursorPagination
+    permission_classes = [IsAuthenticated]
+    conditional_resources = (SENSOR_ALERT_RESOURCE,)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        touch_resources(SENSOR_ALERT_RESOURCE)
+
+
+class AlertRuleViewSet(viewsets.ModelViewSet):
+    serializer_class = AlertRuleSerializer
+    model = AlertRule
+    queryset = AlertRule.objects.all().order_by("id")
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ["sensor", "sensor_type", "metric", "is_active"]
+    permission_classes = [IsAuthenticated]
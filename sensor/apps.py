@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SensorConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "sensor"
+
+    def ready(self):
+        from sensor import receivers  # noqa: F401
@@ -0,0 +1,48 @@
+from dataclasses import dataclass
+
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from sensor.devices import device_key_cache, get_signed_key_id
+
+DEVICE_KEY_HEADER_TYPE = "Device"
+
+
+@dataclass(frozen=True)
+class SensorDevice:
+    """The station behind a device key, standing in for ``request.user``."""
+
+    sensor_id: int
+    key_id: str
+
+    is_active = True
+    is_anonymous = False
+    is_authenticated = True
+    is_staff = False
+    is_superuser = False
+
+
+class SensorDeviceKeyAuthentication(BaseAuthentication):
+    """
+    Authenticates ``Authorization: Device <key>`` requests as the sensor
+    the key was issued for, without a user lookup.
+    """
+
+    def authenticate(self, request):
+        header = request.META.get("HTTP_AUTHORIZATION", "").split()
+        if not header or header[0] != DEVICE_KEY_HEADER_TYPE:
+            return None
+        if len(header) != 2:
+            raise AuthenticationFailed(_("Invalid device key header."))
+
+        key_id = get_signed_key_id(header[1])
+        if key_id is None:
+            raise AuthenticationFailed(_("Invalid device key."))
+        sensor_id = device_key_cache.get_sensor_id(key_id)
+        if sensor_id is None:
+            raise AuthenticationFailed(_("Device key is revoked."))
+        return SensorDevice(sensor_id, key_id), key_id
+
+    def authenticate_header(self, request):
+        return DEVICE_KEY_HEADER_TYPE
@@ -0,0 +1,26 @@
+import threading
+from collections import Counter
+
+# Counters are kept per process; every worker reports its own.
+_cache_reads: Counter = Counter()
+_cache_reads_lock = threading.Lock()
+
+
+def record_cache_read(label: str, hit: bool) -> None:
+    with _cache_reads_lock:
+        _cache_reads[label, hit] += 1
+
+
+def get_cache_stats() -> dict[str, dict[str, int]]:
+    with _cache_reads_lock:
+        reads = dict(_cache_reads)
+    stats: dict[str, dict[str, int]] = {}
+    for (label, hit), count in sorted(reads.items()):
+        entry = stats.setdefault(label, {"hits": 0, "misses": 0})
+        entry["hits" if hit else "misses"] += count
+    return stats
+
+
+def reset_cache_stats() -> None:
+    with _cache_reads_lock:
+        _cache_reads.clear()
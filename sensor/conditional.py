@@ -0,0 +1,151 @@
+import hashlib
+import logging
+import math
+import time
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+logger = logging.getLogger(__name__)
+
+SENSOR_RESOURCE = "sensor"
+SENSOR_DATA_RESOURCE = "sensor-data"
+SENSOR_ALERT_RESOURCE = "sensor-alert"
+
+RESOURCE_VERSION_KEY = "resource-version:{}"
+RESOURCE_MODIFIED_KEY = "resource-modified:{}"
+
+
+def _get_version_key(resource: str) -> str:
+    return RESOURCE_VERSION_KEY.format(resource)
+
+
+def _get_modified_key(resource: str) -> str:
+    return RESOURCE_MODIFIED_KEY.format(resource)
+
+
+def _now() -> int:
+    # Rounded up, so a client never holds a Last-Modified earlier than the
+    # change it has seen.
+    return math.ceil(time.time())
+
+
+def get_resource_state(
+    resources: tuple[str, ...],
+) -> tuple[dict[str, int], int] | None:
+    """
+    Return the version counter of each resource and the latest change of
+    any of them in whole seconds, or ``None`` when the cache cannot be
+    reached.
+    """
+    defaults = {}
+    for resource in resources:
+        # An evicted version restarts from a nanosecond timestamp, which
+        # lies far past any value reached by incrementing, and only costs
+        # clients one full response.
+        defaults[_get_version_key(resource)] = time.time_ns
+        defaults[_get_modified_key(resource)] = _now
+    try:
+        state = cache.get_many(defaults.keys())
+        for key, default in defaults.items():
+            if key not in state:
+                cache.add(key, default(), timeout=None)
+                state[key] = cache.get(key)
+    except Exception:
+        logger.warning("Resource versions are unavailable.", exc_info=True)
+        return None
+    versions = {
+        resource: state[_get_version_key(resource)] for resource in resources
+    }
+    last_modified = max(
+        state[_get_modified_key(resource)] for resource in resources
+    )
+    return versions, last_modified
+
+
+def _increment_version(key: str) -> None:
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, time.time_ns(), timeout=None):
+            # Another process restarted the version first; a reader may
+            # already hold it, so it has to move on once more.
+            cache.incr(key)
+
+
+def touch_resources(*resources: str) -> None:
+    """
+    Move the resources to a new version once the current transaction
+    commits, so no reader can cache the old rows under the new version.
+
+    Versions are counters incremented in the cache rather than clock
+    readings, which differ between hosts and can go backwards.
+    """
+
+    def touch():
+        try:
+            for resource in resources:
+                _increment_version(_get_version_key(resource))
+            modified = _now()
+            cache.set_many(
+                {
+                    _get_modified_key(resource): modified
+                    for resource in resources
+                },
+                timeout=None,
+            )
+        except Exception:
+            logger.warning(
+                "Resource versions could not be updated.", exc_info=True
+            )
+
+    transaction.on_commit(touch)
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag and Last-Modified headers to list and detail responses and
+    answers matching conditional requests with 304 Not Modified before
+    the queryset is evaluated.
+    """
+
+    conditional_resources: tuple[str, ...] = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            request, partial(super().list, request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            request, partial(super().retrieve, request, *args, **kwargs)
+        )
+
+    def get_conditional_response(self, request, get_response):
+        state = get_resource_state(self.conditional_resources)
+        if state is None:
+            return get_response()
+        versions, last_modified = state
+
+        etag_source = "|".join(
+            [
+                request.get_full_path(),
+                request.accepted_media_type or "",
+                *(f"{name}={versions[name]}" for name in sorted(versions)),
+            ]
+        )
+        etag = quote_etag(hashlib.md5(etag_source.encode()).hexdigest())
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = get_response()
+            if response.status_code != 200:
+                return response
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        return response
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class DataConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "sensor.data"
+
+    def ready(self):
+        from sensor.data import receivers  # noqa: F401
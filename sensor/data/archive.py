@@ -0,0 +1,537 @@
+import os
+import secrets
+import shutil
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from sensor.conditional import SENSOR_DATA_RESOURCE, touch_resources
+from sensor.data.fields import scale_decimal
+from sensor.data.models import SENSOR_DATA_METRICS, SensorData
+from sensor.data.partitions import add_months, get_month_bounds, get_month_start
+
+ARCHIVE_COLUMNS = ("id", "date") + SENSOR_DATA_METRICS
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+INT32_MAX = np.iinfo(np.int32).max
+MONTH_DIR_FORMAT = "%Y-%m"
+
+
+def to_microseconds(value: datetime) -> int:
+    return (value - EPOCH) // MICROSECOND
+
+
+def from_microseconds(value: int) -> datetime:
+    return EPOCH + timedelta(microseconds=int(value))
+
+
+def to_hundredths(value: Decimal) -> int:
+    # Rounded like ScaledDecimalField, so bounds match on both sides.
+    return scale_decimal(value, 2)
+
+
+def from_hundredths(value: int) -> Decimal:
+    return Decimal(int(value)).scaleb(-2)
+
+
+def get_archive_dir() -> Path:
+    return Path(settings.SENSOR_DATA_ARCHIVE_DIR)
+
+
+def has_archive() -> bool:
+    return get_archive_dir().is_dir()
+
+
+@dataclass(frozen=True)
+class ArchivedMonth:
+    sensor_id: int
+    month: date
+
+    @property
+    def path(self) -> Path:
+        return (
+            get_archive_dir()
+            / str(self.sensor_id)
+            / self.month.strftime(MONTH_DIR_FORMAT)
+        )
+
+    @property
+    def bounds(self) -> list[datetime]:
+        return get_month_bounds(self.month)
+
+    def load(self) -> dict[str, np.ndarray]:
+        # Columns are plain .npy files so they can be memory-mapped and only
+        # the pages a query touches are read from disk.
+        return {
+            column: np.load(self.path / f"{column}.npy", mmap_mode="r")
+            for column in ARCHIVE_COLUMNS
+        }
+
+
+def list_archived_months(
+    sensor_ids: list[int] | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+) -> list[ArchivedMonth]:
+    """
+    Return the archived months overlapping ``[date_from, date_to]``,
+    oldest first.
+    """
+    archive_dir = get_archive_dir()
+    if not archive_dir.is_dir():
+        return []
+
+    if sensor_ids is None:
+        sensor_dirs = [
+            path for path in archive_dir.iterdir() if path.name.isdigit()
+        ]
+    else:
+        sensor_dirs = [archive_dir / str(sensor_id) for sensor_id in sensor_ids]
+
+    months = []
+    for sensor_dir in sensor_dirs:
+        if not sensor_dir.is_dir():
+            continue
+        for month_dir in sensor_dir.iterdir():
+            try:
+                month = datetime.strptime(
+                    month_dir.name, MONTH_DIR_FORMAT
+                ).date()
+            except ValueError:
+                # Leftovers of an interrupted write.
+                continue
+            archived_month = ArchivedMonth(int(sensor_dir.name), month)
+            start, end = archived_month.bounds
+            if date_from and end <= date_from:
+                continue
+            if date_to and start > date_to:
+                continue
+            months.append(archived_month)
+    return sorted(months, key=lambda item: (item.month, item.sensor_id))
+
+
+def _fsync_dir(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_archived_month(
+    archived_month: ArchivedMonth, columns: dict[str, np.ndarray]
+) -> None:
+    """
+    Persist ``columns`` for a sensor month, merged with anything already
+    archived for it, and swap the result in once it is safely on disk.
+    """
+    path = archived_month.path
+    if path.is_dir():
+        existing = archived_month.load()
+        columns = {
+            column: np.concatenate([existing[column], columns[column]])
+            for column in ARCHIVE_COLUMNS
+        }
+        # A month whose database delete was rolled back gets archived again.
+        _, unique_rows = np.unique(columns["id"], return_index=True)
+        columns = {
+            column: np.asarray(values)[unique_rows]
+            for column, values in columns.items()
+        }
+
+    order = np.lexsort((columns["id"], columns["date"]))
+    version_path = path.with_name(f".{path.name}.{secrets.token_hex(8)}")
+    version_path.mkdir(parents=True)
+    for column in ARCHIVE_COLUMNS:
+        values = np.asarray(columns[column])[order]
+        if column in SENSOR_DATA_METRICS and (
+            values.size == 0 or np.abs(values).max() <= INT32_MAX
+        ):
+            values = values.astype(np.int32)
+        else:
+            values = values.astype(np.int64)
+        with open(version_path / f"{column}.npy", "wb") as file:
+            np.save(file, values)
+            file.flush()
+            os.fsync(file.fileno())
+    _fsync_dir(version_path)
+
+    # The month is a symlink to its current version, flipped by a single
+    # rename, so readers always find either the old or the new one.
+    old_version_path = path.resolve() if path.is_symlink() else None
+    if path.is_dir() and old_version_path is None:
+        # Months archived as plain directories go missing only once,
+        # while they move to a version of their own.
+        old_version_path = path.with_name(
+            f".{path.name}.{secrets.token_hex(8)}"
+        )
+        path.rename(old_version_path)
+    link_path = path.with_name(f".{path.name}.link-{os.getpid()}")
+    link_path.unlink(missing_ok=True)
+    link_path.symlink_to(version_path.name)
+    os.replace(link_path, path)
+    _fsync_dir(path.parent)
+    if old_version_path is not None:
+        # Readers that already mapped the old columns keep them open.
+        shutil.rmtree(old_version_path, ignore_errors=True)
+
+
+def archive_sensor_data(before: datetime) -> int:
+    """
+    Move readings of every whole month before ``before`` out of the
+    database into the archive, returning the number of readings moved.
+
+    Rollups are left untouched, so aggregates over archived months keep
+    being served from them.
+    """
+    cutoff = get_month_bounds(get_month_start(before))[0]
+    archived = 0
+    sensor_ids = (
+        SensorData.objects.filter(date__lt=cutoff)
+        .order_by()
+        .values_list("sensor_id", flat=True)
+        .distinct()
+    )
+    for sensor_id in list(sensor_ids):
+        first_date = (
+            SensorData.objects.filter(sensor_id=sensor_id, date__lt=cutoff)
+            .order_by("date")
+            .values_list("date", flat=True)
+            .first()
+        )
+        month = get_month_start(first_date.astimezone(timezone.utc))
+        while get_month_bounds(month)[0] < cutoff:
+            archived += _archive_sensor_month(ArchivedMonth(sensor_id, month))
+            month = add_months(month, 1)
+    if archived:
+        touch_resources(SENSOR_DATA_RESOURCE)
+    return archived
+
+
+def _archive_sensor_month(archived_month: ArchivedMonth) -> int:
+    start, end = archived_month.bounds
+    queryset = SensorData.objects.filter(
+        sensor_id=archived_month.sensor_id, date__gte=start, date__lt=end
+    )
+    with transaction.atomic():
+        rows = list(
+            queryset.select_for_update().values_list(*ARCHIVE_COLUMNS)
+        )
+        if not rows:
+            return 0
+
+        columns = dict(zip(ARCHIVE_COLUMNS, zip(*rows)))
+        write_archived_month(
+            archived_month,
+            {
+                "id": np.array(columns["id"], dtype=np.int64),
+                "date": np.array(
+                    [to_microseconds(value) for value in columns["date"]],
+                    dtype=np.int64,
+                ),
+                **{
+                    metric: np.array(
+                        [to_hundredths(value) for value in columns[metric]],
+                        dtype=np.int64,
+                    )
+                    for metric in SENSOR_DATA_METRICS
+                },
+            },
+        )
+        queryset.delete()
+    return len(rows)
+
+
+def _get_date_mask(
+    dates: np.ndarray, date_filters: dict[str, datetime]
+) -> np.ndarray:
+    mask = np.ones(dates.shape, dtype=bool)
+    for lookup, value in date_filters.items():
+        value = to_microseconds(value)
+        if lookup == "gte":
+            mask &= dates >= value
+        elif lookup == "gt":
+            mask &= dates > value
+        elif lookup == "lte":
+            mask &= dates <= value
+        elif lookup == "lt":
+            mask &= dates < value
+    return mask
+
+
+def _get_metric_mask(
+    columns: dict[str, np.ndarray], metric_filters: dict[str, Decimal] | None
+) -> np.ndarray:
+    mask = np.ones(columns["date"].shape, dtype=bool)
+    for key, value in (metric_filters or {}).items():
+        metric, lookup = key.split("__")
+        # Compared in hundredths, as the metrics are stored.
+        value = to_hundredths(value)
+        if lookup == "gte":
+            mask &= columns[metric] >= value
+        elif lookup == "lte":
+            mask &= columns[metric] <= value
+    return mask
+
+
+def _get_filter_window(
+    date_filters: dict[str, datetime]
+) -> tuple[datetime | None, datetime | None]:
+    lower = [date_filters[key] for key in ("gte", "gt") if key in date_filters]
+    upper = [date_filters[key] for key in ("lte", "lt") if key in date_filters]
+    return (max(lower) if lower else None, min(upper) if upper else None)
+
+
+def read_archived_readings(
+    sensor_ids: list[int] | None,
+    date_filters: dict[str, datetime],
+    limit: int,
+    position: tuple[datetime, int] | None = None,
+    ascending: bool = False,
+    metric_filters: dict[str, Decimal] | None = None,
+) -> list[SensorData]:
+    """
+    Return up to ``limit`` archived readings ordered by ``(date, id)``,
+    newest first unless ``ascending``, starting after ``position``.
+    ``metric_filters`` maps ``<metric>__gte`` and ``<metric>__lte`` to
+    bounds.
+
+    Readings are rebuilt as unsaved ``SensorData`` instances so they can
+    go through the regular serializers.
+    """
+    date_from, date_to = _get_filter_window(date_filters)
+    months = list_archived_months(sensor_ids, date_from, date_to)
+    if not ascending:
+        months.reverse()
+
+    chunks = []
+    collected = 0
+    for index, archived_month in enumerate(months):
+        # All readings of an older month sort after the ones of a newer
+        # month, so once a page is full the remaining months can be skipped.
+        if (
+            collected >= limit
+            and archived_month.month != months[index - 1].month
+        ):
+            break
+
+        columns = archived_month.load()
+        ids, dates = columns["id"], columns["date"]
+        mask = _get_date_mask(dates, date_filters)
+        mask &= _get_metric_mask(columns, metric_filters)
+        if position is not None:
+            position_date, position_id = to_microseconds(position[0]), position[1]
+            if ascending:
+                mask &= (dates > position_date) | (
+                    (dates == position_date) & (ids > position_id)
+                )
+            else:
+                mask &= (dates < position_date) | (
+                    (dates == position_date) & (ids < position_id)
+                )
+
+        selected = np.flatnonzero(mask)
+        selected = selected[:limit] if ascending else selected[-limit:]
+        if selected.size:
+            chunks.append(
+                (
+                    archived_month.sensor_id,
+                    {
+                        column: np.asarray(values[selected])
+                        for column, values in columns.items()
+                    },
+                )
+            )
+            collected += selected.size
+
+    readings = [
+        SensorData(
+            id=int(values["id"][row]),
+            sensor_id=sensor_id,
+            date=from_microseconds(values["date"][row]),
+            **{
+                metric: from_hundredths(values[metric][row])
+                for metric in SENSOR_DATA_METRICS
+            },
+        )
+        for sensor_id, values in chunks
+        for row in range(values["id"].size)
+    ]
+    readings.sort(
+        key=lambda reading: (reading.date, reading.id), reverse=not ascending
+    )
+    return readings[:limit]
+
+
+def iter_archived_rows(
+    sensor_ids: list[int] | None,
+    date_filters: dict[str, datetime],
+    metric_filters: dict[str, Decimal] | None = None,
+) -> Iterator[tuple]:
+    """
+    Yield archived readings as ``(id, sensor_id, *metrics, date)`` tuples
+    in ascending ``(date, id)`` order, one month at a time.
+    """
+    date_from, date_to = _get_filter_window(date_filters)
+    months: dict[date, list[ArchivedMonth]] = {}
+    for archived_month in list_archived_months(sensor_ids, date_from, date_to):
+        months.setdefault(archived_month.month, []).append(archived_month)
+
+    for archived_months in months.values():
+        chunks = []
+        for archived_month in archived_months:
+            columns = archived_month.load()
+            mask = _get_date_mask(columns["date"], date_filters)
+            mask &= _get_metric_mask(columns, metric_filters)
+            chunks.append(
+                {
+                    "sensor_id": np.full(
+                        int(mask.sum()), archived_month.sensor_id
+                    ),
+                    **{
+                        column: np.asarray(values[mask])
+                        for column, values in columns.items()
+                    },
+                }
+            )
+        merged = {
+            column: np.concatenate([chunk[column] for chunk in chunks])
+            for column in chunks[0]
+        }
+        order = np.lexsort((merged["id"], merged["date"]))
+        for row in order:
+            yield (
+                int(merged["id"][row]),
+                int(merged["sensor_id"][row]),
+                *(
+                    from_hundredths(merged[metric][row])
+                    for metric in SENSOR_DATA_METRICS
+                ),
+                from_microseconds(merged["date"][row]),
+            )
+
+
+def read_archived_columns(
+    sensor_ids: list[int], date_filters: dict[str, datetime]
+) -> dict[int, dict[str, np.ndarray]]:
+    """
+    Return the archived columns of each sensor, in ``(date, id)`` order.
+    Months are stored sorted and listed oldest first, so concatenating
+    them keeps the order.
+    """
+    date_from, date_to = _get_filter_window(date_filters)
+    chunks: dict[int, list[dict[str, np.ndarray]]] = {}
+    for archived_month in list_archived_months(sensor_ids, date_from, date_to):
+        columns = archived_month.load()
+        mask = _get_date_mask(columns["date"], date_filters)
+        chunks.setdefault(archived_month.sensor_id, []).append(
+            {column: values[mask] for column, values in columns.items()}
+        )
+    return {
+        sensor_id: {
+            column: np.concatenate([chunk[column] for chunk in sensor_chunks])
+            for column in ARCHIVE_COLUMNS
+        }
+        for sensor_id, sensor_chunks in chunks.items()
+    }
+
+
+def _truncate_microseconds(dates: np.ndarray, kind: str) -> np.ndarray:
+    dates = dates.astype("datetime64[us]")
+    if kind == "minute":
+        return dates.astype("datetime64[m]")
+    if kind == "hour":
+        return dates.astype("datetime64[h]")
+    if kind == "month":
+        return dates.astype("datetime64[M]")
+    days = dates.astype("datetime64[D]")
+    if kind == "week":
+        # 1970-01-01 was a Thursday; weeks start on Monday like Trunc.
+        day_numbers = days.astype(np.int64)
+        days = (day_numbers - (day_numbers + 3) % 7).astype("datetime64[D]")
+    return days
+
+
+def aggregate_archived_readings(
+    sensor_ids: list[int],
+    trunc_kind: str,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Group archived readings into ``trunc_kind`` buckets, returning rows
+    with the count and the sum, min and max of every metric.
+    """
+    date_filters = {}
+    if date_from:
+        date_filters["gte"] = date_from
+    if date_to:
+        date_filters["lt"] = date_to
+
+    rows = []
+    for archived_month in list_archived_months(sensor_ids, date_from, date_to):
+        columns = archived_month.load()
+        mask = _get_date_mask(columns["date"], date_filters)
+        if not mask.any():
+            continue
+
+        buckets = _truncate_microseconds(columns["date"][mask], trunc_kind)
+        bucket_values, starts, counts = np.unique(
+            buckets, return_index=True, return_counts=True
+        )
+        metric_stats = {}
+        for metric in SENSOR_DATA_METRICS:
+            values = np.asarray(columns[metric][mask], dtype=np.int64)
+            metric_stats[metric] = (
+                np.add.reduceat(values, starts),
+                np.minimum.reduceat(values, starts),
+                np.maximum.reduceat(values, starts),
+            )
+
+        for index, bucket in enumerate(bucket_values):
+            row = {
+                "sensor_id": archived_month.sensor_id,
+                "bucket": from_microseconds(
+                    bucket.astype("datetime64[us]").astype(np.int64)
+                ),
+                "count": int(counts[index]),
+            }
+            for metric, (sums, mins, maxes) in metric_stats.items():
+                row[f"{metric}_sum"] = from_hundredths(sums[index])
+                row[f"{metric}_min"] = from_hundredths(mins[index])
+                row[f"{metric}_max"] = from_hundredths(maxes[index])
+            rows.append(row)
+    return rows
+
+
+def merge_aggregate_rows(
+    *row_lists: list[dict[str, Any]]
+) -> list[dict[str, Any]]:
+    """
+    Combine ``sensor_id``/``bucket`` rows holding count, sum, min and max
+    per metric, as produced by the database and the archive.
+    """
+    merged: dict[tuple[int, datetime], dict[str, Any]] = {}
+    for rows in row_lists:
+        for row in rows:
+            key = (row["sensor_id"], row["bucket"])
+            if key not in merged:
+                merged[key] = dict(row)
+                continue
+            target = merged[key]
+            target["count"] += row["count"]
+            for metric in SENSOR_DATA_METRICS:
+                target[f"{metric}_sum"] += row[f"{metric}_sum"]
+                target[f"{metric}_min"] = min(
+                    target[f"{metric}_min"], row[f"{metric}_min"]
+                )
+                target[f"{metric}_max"] = max(
+                    target[f"{metric}_max"], row[f"{metric}_max"]
+                )
+    return [merged[key] for key in sorted(merged)]
@@ -0,0 +1,298 @@
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable
+
+import numpy as np
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from sensor.data.models import SENSOR_DATA_METRICS, SensorData
+from sensor.data.services import ingest_sensor_data
+from sensor.models import Sensor, SensorStatus, SensorType
+from user.models import User
+
+PERCENTILES = (50, 90, 99)
+
+
+@dataclass
+class Scenario:
+    name: str
+    # Sends the request of the given iteration.
+    request: Callable[[int], HttpResponse]
+    # Readings written or read per request, for the rows/s figure.
+    rows: int = 1
+
+
+def create_fleet(
+    sensor_count: int, readings_per_sensor: int, seed: int = 0
+) -> tuple[list[Sensor], datetime, datetime]:
+    """
+    Create ``sensor_count`` sensors with ``readings_per_sensor`` readings
+    each, one a minute up to now, returning the sensors and the time
+    range covered.
+
+    Readings go through ``ingest_sensor_data``, so rollups and latest
+    readings are maintained as they would be in production.
+    """
+    rng = np.random.default_rng(seed)
+    sensor_types = list(SensorType)
+    sensors = Sensor.objects.bulk_create(
+        Sensor(
+            title=f"bench sensor {index}",
+            type=sensor_types[index % len(sensor_types)],
+            status=SensorStatus.ACTIVE,
+            model="bench",
+            installation_date=timezone.now(),
+        )
+        for index in range(sensor_count)
+    )
+
+    end = timezone.now().replace(second=0, microsecond=0)
+    start = end - timedelta(minutes=readings_per_sensor - 1)
+    dates = [
+        start + timedelta(minutes=minute)
+        for minute in range(readings_per_sensor)
+    ]
+    for sensor in sensors:
+        hundredths = {
+            "temperature": rng.normal(1500, 800, readings_per_sensor),
+            "humidity": rng.uniform(2000, 9000, readings_per_sensor),
+            "wind_speed": rng.gamma(2, 200, readings_per_sensor),
+        }
+        values = {
+            metric: [
+                Decimal(value).scaleb(-2)
+                for value in hundredths[metric].astype(int).tolist()
+            ]
+            for metric in SENSOR_DATA_METRICS
+        }
+        ingest_sensor_data(
+            [
+                SensorData(
+                    sensor=sensor,
+                    date=date,
+                    **{
+                        metric: values[metric][index]
+                        for metric in SENSOR_DATA_METRICS
+                    },
+                )
+                for index, date in enumerate(dates)
+            ]
+        )
+    return sensors, start, end
+
+
+def get_authenticated_client() -> APIClient:
+    # A real bearer token, so authentication is part of what is measured.
+    user, _ = User.objects.get_or_create(email="benchmark@example.com")
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+    )
+    return client
+
+
+def build_scenarios(
+    client: APIClient,
+    sensors: list[Sensor],
+    start: datetime,
+    end: datetime,
+    bulk_size: int,
+    page_size: int,
+    page_depth: int,
+) -> list[Scenario]:
+    """
+    Return the scenarios to measure, in the order they must run. The
+    sensor scenarios act on the sensors ``sensor_create`` makes, and the
+    readings are read before any are written, so the writes do not change
+    the data the reads measure.
+    """
+    sensor_ids = [sensor.id for sensor in sensors]
+    middle = start + (end - start) / 2
+    created_sensor_ids = []
+
+    def pick_sensor(iteration):
+        return sensor_ids[iteration % len(sensor_ids)]
+
+    def create_sensor(iteration):
+        response = client.post(
+            "/api/sensors/",
+            {
+                "title": f"bench crud sensor {iteration}",
+                "type": SensorType.INDOOR,
+                "model": "bench",
+                "installation_date": start.isoformat(),
+            },
+            format="json",
+        )
+        created_sensor_ids.append(response.json()["id"])
+        return response
+
+    def reading(iteration):
+        return {
+            "sensor": pick_sensor(iteration),
+            "temperature": "21.50",
+            "humidity": "40.00",
+            "wind_speed": "3.20",
+        }
+
+    deep_page_url = f"/api/sensors-data/?page_size={page_size}"
+    for _ in range(page_depth):
+        next_url = client.get(deep_page_url).json()["next"]
+        if next_url is None:
+            break
+        deep_page_url = next_url
+
+    return [
+        Scenario("sensor_create", create_sensor),
+        Scenario(
+            "sensor_retrieve",
+            lambda iteration: client.get(
+                "/api/sensors/"
+                f"{created_sensor_ids[iteration % len(created_sensor_ids)]}/"
+            ),
+        ),
+        Scenario(
+            "sensor_update",
+            lambda iteration: client.patch(
+                "/api/sensors/"
+                f"{created_sensor_ids[iteration % len(created_sensor_ids)]}/",
+                {"status": SensorStatus.IN_REPAIR},
+                format="json",
+            ),
+        ),
+        Scenario(
+            "sensor_list",
+            lambda iteration: client.get("/api/sensors/"),
+        ),
+        Scenario(
+            "sensor_delete",
+            lambda iteration: client.delete(
+                f"/api/sensors/{created_sensor_ids[iteration]}/"
+            ),
+        ),
+        Scenario(
+            "reading_list_filtered",
+            lambda iteration: client.get(
+                "/api/sensors-data/",
+                {
+                    "sensor": pick_sensor(iteration),
+                    "date__gte": middle.isoformat(),
+                    "page_size": page_size,
+                },
+            ),
+            rows=page_size,
+        ),
+        Scenario(
+            "reading_list_deep_page",
+            lambda iteration: client.get(deep_page_url),
+            rows=page_size,
+        ),
+        Scenario(
+            "reading_aggregate",
+            lambda iteration: client.get(
+                "/api/sensors/aggregate/",
+                {
+                    "sensor": [
+                        pick_sensor(iteration + offset) for offset in range(5)
+                    ],
+                    "bucket": "1h",
+                    "from": start.isoformat(),
+                    "to": end.isoformat(),
+                },
+            ),
+        ),
+        Scenario(
+            "reading_create",
+            lambda iteration: client.post(
+                "/api/sensors-data/", reading(iteration), format="json"
+            ),
+        ),
+        Scenario(
+            "reading_bulk_create",
+            lambda iteration: client.post(
+                "/api/sensors-data/bulk/",
+                [reading(iteration + row) for row in range(bulk_size)],
+                format="json",
+            ),
+            rows=bulk_size,
+        ),
+    ]
+
+
+def run_scenario(
+    scenario: Scenario, requests: int, warmup: int
+) -> dict[str, Any]:
+    for iteration in range(warmup):
+        scenario.request(iteration)
+
+    latencies = np.empty(requests)
+    errors = 0
+    started = time.perf_counter()
+    for iteration in range(requests):
+        request_started = time.perf_counter()
+        response = scenario.request(warmup + iteration)
+        latencies[iteration] = time.perf_counter() - request_started
+        if response.status_code >= 400:
+            errors += 1
+    elapsed = time.perf_counter() - started
+    return summarize_latencies(latencies, elapsed, errors, scenario.rows)
+
+
+def summarize_latencies(
+    latencies: np.ndarray, elapsed: float, errors: int, rows: int = 1
+) -> dict[str, Any]:
+    milliseconds = latencies * 1000
+    return {
+        "requests": int(latencies.size),
+        "errors": errors,
+        "requests_per_second": round(latencies.size / elapsed, 2),
+        "rows_per_second": round(latencies.size * rows / elapsed, 2),
+        "latency_ms": {
+            "mean": round(float(milliseconds.mean()), 3),
+            "min": round(float(milliseconds.min()), 3),
+            "max": round(float(milliseconds.max()), 3),
+            **{
+                f"p{percentile}": round(float(value), 3)
+                for percentile, value in zip(
+                    PERCENTILES, np.percentile(milliseconds, PERCENTILES)
+                )
+            },
+        },
+    }
+
+
+def compare_reports(
+    previous: dict[str, Any], current: dict[str, Any]
+) -> dict[str, dict[str, float]]:
+    """
+    Return the relative change, in percent, of the throughput and the
+    p50/p99 latencies of every scenario found in both reports.
+    """
+
+    def change(before: float, after: float) -> float:
+        return round((after - before) / before * 100, 1) if before else 0.0
+
+    comparison = {}
+    for name, result in current["scenarios"].items():
+        baseline = previous["scenarios"].get(name)
+        if baseline is None:
+            continue
+        comparison[name] = {
+            "requests_per_second": change(
+                baseline["requests_per_second"],
+                result["requests_per_second"],
+            ),
+            **{
+                f"p{percentile}": change(
+                    baseline["latency_ms"][f"p{percentile}"],
+                    result["latency_ms"][f"p{percentile}"],
+                )
+                for percentile in (50, 99)
+            },
+        }
+    return comparison
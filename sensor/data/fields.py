@@ -0,0 +1,40 @@
+from decimal import Decimal
+
+from django.db import models
+
+
+def scale_decimal(value: Decimal, decimal_places: int) -> int:
+    """Return ``value`` as an integer count of ``10 ** -decimal_places``."""
+    return int(value.scaleb(decimal_places).to_integral_value())
+
+
+class ScaledDecimalField(models.DecimalField):
+    """
+    ``DecimalField`` stored as a fixed-width integer count of
+    ``10 ** -decimal_places`` units, e.g. hundredths.
+
+    Values keep round-tripping as ``Decimal`` with ``decimal_places``
+    digits, while the column is a plain ``integer`` (or ``bigint`` past
+    9 digits) instead of a variable-length ``numeric``. ``Sum``, ``Min``
+    and ``Max`` over the column come back scaled as well; ``Avg`` does not
+    and must not be used on it.
+    """
+
+    def get_internal_type(self):
+        return "IntegerField" if self.max_digits <= 9 else "BigIntegerField"
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if value is None:
+            return None
+        return scale_decimal(value, self.decimal_places)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        return value
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return Decimal(value).scaleb(-self.decimal_places)
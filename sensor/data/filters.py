@@ -0,0 +1,30 @@
+from django_filters import rest_framework as filters
+
+from sensor.data.fields import ScaledDecimalField
+from sensor.data.models import SENSOR_DATA_METRICS, SensorData
+
+DATE_RANGE_LOOKUPS = ["gte", "gt", "lte", "lt"]
+METRIC_RANGE_LOOKUPS = ["gte", "lte"]
+
+
+class SensorDataFilterSet(filters.FilterSet):
+    # Date windows are served by the BRIN index on date, or by the
+    # (sensor, date) index when sensors are given.
+    class Meta:
+        model = SensorData
+        fields = {
+            "sensor": ["exact", "in"],
+            "date": DATE_RANGE_LOOKUPS,
+            **{metric: METRIC_RANGE_LOOKUPS for metric in SENSOR_DATA_METRICS},
+        }
+        # Bounds finer than the stored hundredths are rejected rather than
+        # rounded one way in the database and another in the archive.
+        filter_overrides = {
+            ScaledDecimalField: {
+                "filter_class": filters.NumberFilter,
+                "extra": lambda field: {
+                    "max_digits": field.max_digits,
+                    "decimal_places": field.decimal_places,
+                },
+            },
+        }
@@ -0,0 +1,95 @@
+from typing import Iterable
+
+from django.db import transaction
+
+from sensor.data.archive import has_archive, read_archived_readings
+from sensor.data.models import (
+    SENSOR_DATA_METRICS,
+    SensorData,
+    SensorLatestReading,
+)
+
+LATEST_READING_FIELDS = ["reading_id", *SENSOR_DATA_METRICS, "date"]
+
+
+def _to_latest_reading(reading: SensorData) -> SensorLatestReading:
+    return SensorLatestReading(
+        sensor_id=reading.sensor_id,
+        reading_id=reading.id,
+        date=reading.date,
+        **{metric: getattr(reading, metric) for metric in SENSOR_DATA_METRICS},
+    )
+
+
+@transaction.atomic
+def update_latest_readings(readings: Iterable[SensorData]) -> None:
+    """
+    Move each sensor's latest reading forward to the newest of
+    ``readings`` by ``(date, id)``, leaving newer stored readings alone.
+    """
+    newest: dict[int, SensorData] = {}
+    for reading in readings:
+        current = newest.get(reading.sensor_id)
+        if current is None or (reading.date, reading.id) > (
+            current.date,
+            current.id,
+        ):
+            newest[reading.sensor_id] = reading
+    if not newest:
+        return
+
+    # Locking in sensor order keeps concurrent batches from deadlocking.
+    stored = {
+        latest.sensor_id: (latest.date, latest.reading_id)
+        for latest in SensorLatestReading.objects.select_for_update()
+        .filter(sensor_id__in=newest)
+        .order_by("sensor_id")
+        .only("sensor_id", "date", "reading_id")
+    }
+    SensorLatestReading.objects.bulk_create(
+        [
+            _to_latest_reading(reading)
+            for sensor_id, reading in sorted(newest.items())
+            if sensor_id not in stored
+            or (reading.date, reading.id) > stored[sensor_id]
+        ],
+        update_conflicts=True,
+        unique_fields=["sensor"],
+        update_fields=LATEST_READING_FIELDS,
+    )
+
+
+@transaction.atomic
+def refresh_latest_readings(sensor_ids: Iterable[int]) -> None:
+    """
+    Rebuild the latest reading of ``sensor_ids`` from the stored readings,
+    for when a reading was edited or deleted.
+    """
+    sensor_ids = sorted(set(sensor_ids))
+    list(
+        SensorLatestReading.objects.select_for_update()
+        .filter(sensor_id__in=sensor_ids)
+        .order_by("sensor_id")
+    )
+    latest_readings = []
+    for sensor_id in sensor_ids:
+        reading = (
+            SensorData.objects.filter(sensor_id=sensor_id)
+            .order_by("-date", "-id")
+            .first()
+        )
+        if reading is None and has_archive():
+            archived = read_archived_readings([sensor_id], {}, limit=1)
+            reading = archived[0] if archived else None
+        if reading is not None:
+            latest_readings.append(_to_latest_reading(reading))
+
+    SensorLatestReading.objects.filter(sensor_id__in=sensor_ids).exclude(
+        sensor_id__in=[latest.sensor_id for latest in latest_readings]
+    ).delete()
+    SensorLatestReading.objects.bulk_create(
+        latest_readings,
+        update_conflicts=True,
+        unique_fields=["sensor"],
+        update_fields=LATEST_READING_FIELDS,
+    )
@@ -0,0 +1,48 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from sensor.data.archive import archive_sensor_data
+
+
+def parse_cutoff(value):
+    cutoff = parse_datetime(value)
+    if cutoff is None:
+        cutoff_date = parse_date(value)
+        if cutoff_date is None:
+            raise ValueError(value)
+        cutoff = datetime.combine(cutoff_date, time.min)
+    return cutoff
+
+
+class Command(BaseCommand):
+    help = (
+        "Move readings of whole months before the cutoff out of the "
+        "database into the columnar archive."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--before",
+            type=parse_cutoff,
+            help="Cutoff, rounded down to the start of its month.",
+        )
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=settings.SENSOR_DATA_ARCHIVE_AFTER_DAYS,
+        )
+
+    def handle(self, *args, **options):
+        before = options["before"] or timezone.now() - timedelta(
+            days=options["older_than_days"]
+        )
+        if timezone.is_naive(before):
+            before = timezone.make_aware(before)
+        archived = archive_sensor_data(before)
+        self.stdout.write(
+            self.style.SUCCESS(f"Archived {archived} readings.")
+        )
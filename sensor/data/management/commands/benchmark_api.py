@@ -0,0 +1,197 @@
+import json
+import platform
+import subprocess
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    teardown_databases,
+)
+from django.utils import timezone
+
+from sensor.data.benchmark import (
+    build_scenarios,
+    compare_reports,
+    create_fleet,
+    get_authenticated_client,
+    run_scenario,
+)
+
+
+def get_git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            cwd=settings.BASE_DIR,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure throughput and latency of the API against a synthetic "
+        "fleet of sensors, in a throwaway database, and write a JSON report "
+        "that can be compared with a previous run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sensors", type=int, default=20)
+        parser.add_argument(
+            "--readings",
+            type=int,
+            default=1000,
+            help="Readings per sensor, one a minute.",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Measured requests per scenario.",
+        )
+        parser.add_argument("--warmup", type=int, default=10)
+        parser.add_argument("--bulk-size", type=int, default=500)
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument(
+            "--page-depth",
+            type=int,
+            default=50,
+            help="Pages followed to reach the deep page.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            dest="scenarios",
+            help="Only run this scenario, may be repeated.",
+        )
+        parser.add_argument(
+            "--output", default="benchmark-report.json", help="Report path."
+        )
+        parser.add_argument(
+            "--compare", help="Previous report to compare the results with."
+        )
+
+    def handle(self, *args, **options):
+        previous = None
+        if options["compare"]:
+            try:
+                with open(options["compare"]) as file:
+                    previous = json.load(file)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read {options['compare']}: {exc}")
+
+        # Kept apart from the test database, so a benchmark never drops
+        # the one of a test run.
+        test_settings = connection.settings_dict["TEST"]
+        test_settings["NAME"] = (
+            f"benchmark_{connection.settings_dict['NAME']}"
+        )
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            with override_settings(DEBUG=False):
+                report = self.run_benchmark(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+        if previous is not None:
+            report["comparison"] = compare_reports(previous, report)
+        with open(options["output"], "w") as file:
+            json.dump(report, file, indent=2)
+        self.write_summary(report)
+        self.stdout.write(
+            self.style.SUCCESS(f"Report written to {options['output']}.")
+        )
+
+    def run_benchmark(self, options):
+        self.stdout.write(
+            f"Creating {options['sensors']} sensors with "
+            f"{options['readings']} readings each..."
+        )
+        sensors, start, end = create_fleet(
+            options["sensors"], options["readings"], options["seed"]
+        )
+        scenarios = build_scenarios(
+            get_authenticated_client(),
+            sensors,
+            start,
+            end,
+            bulk_size=options["bulk_size"],
+            page_size=options["page_size"],
+            page_depth=options["page_depth"],
+        )
+        selected = {scenario.name for scenario in scenarios}
+        if options["scenarios"]:
+            unknown = set(options["scenarios"]) - selected
+            if unknown:
+                raise CommandError(
+                    f"Unknown scenarios: {', '.join(sorted(unknown))}."
+                )
+            selected = set(options["scenarios"])
+            # The other sensor scenarios act on the sensors it creates.
+            if selected & {
+                "sensor_retrieve",
+                "sensor_update",
+                "sensor_delete",
+            }:
+                selected.add("sensor_create")
+
+        results = {
+            scenario.name: run_scenario(
+                scenario, options["requests"], options["warmup"]
+            )
+            for scenario in scenarios
+            if scenario.name in selected
+        }
+
+        return {
+            "created_at": timezone.now().isoformat(),
+            "environment": {
+                "git_commit": get_git_commit(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+            },
+            "parameters": {
+                key: options[key]
+                for key in (
+                    "sensors",
+                    "readings",
+                    "requests",
+                    "warmup",
+                    "bulk_size",
+                    "page_size",
+                    "page_depth",
+                    "seed",
+                )
+            },
+            "scenarios": results,
+        }
+
+    def write_summary(self, report):
+        comparison = report.get("comparison", {})
+        self.stdout.write(
+            f"{'scenario':<24}{'req/s':>10}{'p50 ms':>10}"
+            f"{'p99 ms':>10}{'errors':>8}"
+        )
+        for name, result in report["scenarios"].items():
+            line = (
+                f"{name:<24}{result['requests_per_second']:>10.1f}"
+                f"{result['latency_ms']['p50']:>10.2f}"
+                f"{result['latency_ms']['p99']:>10.2f}"
+                f"{result['errors']:>8}"
+            )
+            if name in comparison:
+                change = comparison[name]
+                line += (
+                    f"  req/s {change['requests_per_second']:+.1f}%"
+                    f" p50 {change['p50']:+.1f}% p99 {change['p99']:+.1f}%"
+                )
+            self.stdout.write(line)
@@ -0,0 +1,75 @@
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from sensor.data.models import SensorData
+from sensor.data.serializers import SensorDataSerializer
+from sensor.encoders import get_row_encoder
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rendering a page of readings through SensorDataSerializer "
+        "with the values() row encoder used by the list endpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        encoder = get_row_encoder(SensorDataSerializer)
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        rows = [
+            {
+                "id": index,
+                "sensor": index % 100 + 1,
+                "temperature": Decimal(index % 4000 - 2000).scaleb(-2),
+                "humidity": Decimal(index % 10000).scaleb(-2),
+                "wind_speed": Decimal(index % 3000).scaleb(-2),
+                "date": start + timedelta(seconds=index, microseconds=index),
+            }
+            for index in range(1, options["rows"] + 1)
+        ]
+        readings = [
+            SensorData(
+                sensor_id=row["sensor"],
+                **{
+                    key: value for key, value in row.items() if key != "sensor"
+                },
+            )
+            for row in rows
+        ]
+        renderer = JSONRenderer()
+
+        def serialize():
+            return renderer.render(
+                SensorDataSerializer(readings, many=True).data
+            )
+
+        def encode():
+            return renderer.render(encoder.encode(rows))
+
+        if serialize() != encode():
+            raise CommandError(
+                "The encoder output differs from the serializer."
+            )
+
+        timings = {}
+        for name, render in (("serializer", serialize), ("encoder", encode)):
+            best = float("inf")
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                render()
+                best = min(best, time.perf_counter() - started)
+            timings[name] = best
+            self.stdout.write(f"{name:>10}: {best * 1000:8.1f} ms")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Encoder is {timings['serializer'] / timings['encoder']:.1f}x "
+                f"faster for {len(rows)} rows."
+            )
+        )
@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from sensor.data.spool import flush_spool
+
+
+class Command(BaseCommand):
+    help = (
+        "Insert the readings acknowledged into the ingestion spool, "
+        "replaying whatever a previous flusher left unflushed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.SENSOR_DATA_SPOOL_FLUSH_BATCH_SIZE,
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.SENSOR_DATA_SPOOL_FLUSH_INTERVAL,
+            help="Seconds between flushes.",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Flush once and exit."
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            flushed = flush_spool(options["batch_size"])
+            if options["once"]:
+                self.stdout.write(
+                    self.style.SUCCESS(f"Flushed {flushed} readings.")
+                )
+                return
+            if not flushed:
+                time.sleep(options["interval"])
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from sensor.data.partitions import (
+    PartitioningError,
+    convert_to_partitioned_table,
+    create_partitions,
+    drop_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create upcoming monthly partitions of the readings table and drop "
+        "the ones past the retention period."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help=(
+                "Rebuild the existing readings table as a partitioned table "
+                "first. Locks the table while rows are copied."
+            ),
+        )
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=settings.SENSOR_DATA_PARTITION_MONTHS_AHEAD,
+        )
+        parser.add_argument(
+            "--retention-months",
+            type=int,
+            default=settings.SENSOR_DATA_RETENTION_MONTHS,
+            help="Drop partitions that ended more than this many months ago.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if options["convert"]:
+                convert_to_partitioned_table(options["months_ahead"])
+                self.stdout.write("Converted readings to a partitioned table.")
+
+            for month in create_partitions(options["months_ahead"]):
+                self.stdout.write(f"Created partition for {month:%Y-%m}.")
+
+            if options["retention_months"] is not None:
+                for month in drop_partitions(options["retention_months"]):
+                    self.stdout.write(f"Dropped partition for {month:%Y-%m}.")
+        except PartitioningError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS("Partitions are up to date."))
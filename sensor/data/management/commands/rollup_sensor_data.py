@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from sensor.data.rollups import (
+    catch_up_sensor_data_rollups,
+    reset_sensor_data_rollups,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold readings past the rollup high-water mark into the minute, "
+        "hour and day rollups."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50000)
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Drop all rollups and rebuild them from the first reading.",
+        )
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            reset_sensor_data_rollups()
+        processed = catch_up_sensor_data_rollups(options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Rolled up {processed} readings.")
+        )
@@ -0,0 +1,102 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from sensor.conditional import (
+    SENSOR_ALERT_RESOURCE,
+    SENSOR_DATA_RESOURCE,
+    SENSOR_RESOURCE,
+    touch_resources,
+)
+from sensor.data.archive import to_microseconds
+from sensor.data.latest import refresh_latest_readings
+from sensor.data.rollups import catch_up_sensor_data_rollups
+from sensor.data.seed import can_copy_readings, seed_sensor_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed sensors, readings with daily and seasonal weather patterns, "
+        "and alerts. Readings are generated with NumPy and loaded with a "
+        "binary COPY on PostgreSQL, or bulk_create elsewhere."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sensors", type=int, default=100)
+        parser.add_argument(
+            "--readings",
+            type=int,
+            default=10000,
+            help="Readings per sensor.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=60,
+            help="Seconds between the readings of a sensor.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500000,
+            help="Readings loaded per COPY statement.",
+        )
+        parser.add_argument(
+            "--alert-rate",
+            type=float,
+            default=0.001,
+            help="Share of readings, the hottest ones, that raise an alert.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--skip-rollups",
+            action="store_true",
+            help="Leave the readings for a later rollup_sensor_data run.",
+        )
+
+    def handle(self, *args, **options):
+        if options["sensors"] < 1 or options["readings"] < 1:
+            raise CommandError("--sensors and --readings must be positive.")
+        if not 0 <= options["alert_rate"] < 1:
+            raise CommandError("--alert-rate must be in [0, 1).")
+
+        self.stdout.write(
+            f"Loading readings with "
+            f"{'COPY' if can_copy_readings() else 'bulk_create'}."
+        )
+        started = time.perf_counter()
+        progress = seed_sensor_data(
+            options["sensors"],
+            options["readings"],
+            options["interval"],
+            to_microseconds(timezone.now().replace(microsecond=0)),
+            options["chunk_size"],
+            options["alert_rate"],
+            options["seed"],
+        )
+        sensor_ids = []
+        for count, (sensor, readings, alerts) in enumerate(progress, 1):
+            sensor_ids.append(sensor.id)
+            if count % 10 == 0 or count == options["sensors"]:
+                self.stdout.write(
+                    f"{count} sensors, {readings} readings, {alerts} alerts "
+                    f"({readings / (time.perf_counter() - started):,.0f} "
+                    f"readings/s)"
+                )
+
+        refresh_latest_readings(sensor_ids)
+        rollups_enabled = settings.SENSOR_DATA_ROLLUPS_ENABLED
+        if rollups_enabled and not options["skip_rollups"]:
+            self.stdout.write("Rolling up the readings...")
+            catch_up_sensor_data_rollups()
+        touch_resources(
+            SENSOR_RESOURCE, SENSOR_DATA_RESOURCE, SENSOR_ALERT_RESOURCE
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {readings} readings in "
+                f"{time.perf_counter() - started:.1f}s."
+            )
+        )
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:12
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("data", "0002_rename_co_2_level_sensordata_humidity_and_more"),
+        ("sensor", "0001_initial"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="sensordata",
+            index=models.Index(
+                fields=["sensor", "-date", "-id"],
+                name="sensordata_sensor_date_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="sensordata",
+            index=models.Index(
+                fields=["-date", "-id"], name="sensordata_date_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,109 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data", "0003_sensor_date_indexes"),
+        ("sensor", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SensorDataRollupCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("last_reading_id", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="SensorDataRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "resolution",
+                    models.CharField(
+                        choices=[
+                            ("1m", "Minute"),
+                            ("1h", "Hour"),
+                            ("1d", "Day"),
+                        ],
+                        max_length=3,
+                    ),
+                ),
+                ("bucket", models.DateTimeField()),
+                ("count", models.PositiveIntegerField()),
+                (
+                    "temperature_sum",
+                    models.DecimalField(decimal_places=2, max_digits=20),
+                ),
+                (
+                    "temperature_min",
+                    models.DecimalField(decimal_places=2, max_digits=10),
+                ),
+                (
+                    "temperature_max",
+                    models.DecimalField(decimal_places=2, max_digits=10),
+                ),
+                (
+                    "humidity_sum",
+                    models.DecimalField(decimal_places=2, max_digits=20),
+                ),
+                (
+                    "humidity_min",
+                    models.DecimalField(decimal_places=2, max_digits=10),
+                ),
+                (
+                    "humidity_max",
+                    models.DecimalField(decimal_places=2, max_digits=10),
+                ),
+                (
+                    "wind_speed_sum",
+                    models.DecimalField(decimal_places=2, max_digits=20),
+                ),
+                (
+                    "wind_speed_min",
+                    models.DecimalField(decimal_places=2, max_digits=10),
+                ),
+                (
+                    "wind_speed_max",
+                    models.DecimalField(decimal_places=2, max_digits=10),
+                ),
+                (
+                    "sensor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="sensor.sensor",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("sensor", "resolution", "bucket"),
+                        name="sensordatarollup_unique_bucket",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_latest_readings(apps, schema_editor):
+    SensorData = apps.get_model("data", "SensorData")
+    SensorLatestReading = apps.get_model("data", "SensorLatestReading")
+    readings = (
+        SensorData.objects.order_by("sensor_id", "-date", "-id")
+        .distinct("sensor_id")
+        .values(
+            "sensor_id", "id", "temperature", "humidity", "wind_speed", "date"
+        )
+    )
+    SensorLatestReading.objects.bulk_create(
+        (
+            SensorLatestReading(reading_id=reading.pop("id"), **reading)
+            for reading in readings.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data", "0004_sensordatarollup"),
+        ("sensor", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SensorLatestReading",
+            fields=[
+                (
+                    "sensor",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="latest_reading",
+                        serialize=False,
+                        to="sensor.sensor",
+                    ),
+                ),
+                ("reading_id", models.BigIntegerField()),
+                (
+                    "temperature",
+                    models.DecimalField(decimal_places=2, max_digits=10),
+                ),
+                (
+                    "humidity",
+                    models.DecimalField(decimal_places=2, max_digits=10),
+                ),
+                (
+                    "wind_speed",
+                    models.DecimalField(decimal_places=2, max_digits=10),
+                ),
+                ("date", models.DateTimeField()),
+            ],
+        ),
+        migrations.RunPython(
+            backfill_latest_readings, migrations.RunPython.noop
+        ),
+    ]
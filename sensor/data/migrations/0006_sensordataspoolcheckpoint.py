@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data", "0005_sensorlatestreading"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SensorDataSpoolCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("segment", models.BigIntegerField(default=0)),
+                ("offset", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,156 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:40
+
+from django.db import migrations, transaction
+
+import sensor.data.fields
+
+METRICS = ("temperature", "humidity", "wind_speed")
+BACKFILL_BATCH_SIZE = 50000
+# max_digits drops from 10 to 9: values must stay below 10,000,000.
+MAX_ABS_VALUE = 10**7
+
+
+def convert_metrics_to_integers(apps, schema_editor):
+    """
+    Convert the metric columns to integer hundredths while readings keep
+    being ingested: integer columns are added and kept in sync by a
+    trigger, backfilled in short batches and only swapped in at the end,
+    under a lock that does not need to scan the table.
+
+    Dropped columns only stop taking space once a row is rewritten, so
+    old partitions keep their width until they are dropped or repacked.
+
+    Values of 10,000,000 or more, which ``numeric(10, 2)`` allowed, no
+    longer fit; the migration refuses to start while any are stored.
+    """
+    connection = schema_editor.connection
+    quote_name = connection.ops.quote_name
+    table_name = apps.get_model("data", "SensorData")._meta.db_table
+    table = quote_name(table_name)
+    function = quote_name(f"{table_name}_scale_metrics")
+
+    # Checked up front, as a failed backfill would leave the trigger and
+    # the new columns behind.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT count(*) FROM {table} WHERE "
+            + " OR ".join(f"abs({metric}) >= %s" for metric in METRICS),
+            [MAX_ABS_VALUE] * len(METRICS),
+        )
+        (out_of_range,) = cursor.fetchone()
+    if out_of_range:
+        raise ValueError(
+            f"{out_of_range} readings have a metric of {MAX_ABS_VALUE:,} or "
+            f"more, which integer hundredths with max_digits=9 cannot hold. "
+            f"Fix or delete them before migrating."
+        )
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        for metric in METRICS:
+            cursor.execute(
+                f"ALTER TABLE {table} ADD COLUMN {metric}_scaled integer"
+            )
+        assignments = "".join(
+            f"NEW.{metric}_scaled := round(NEW.{metric} * 100); "
+            for metric in METRICS
+        )
+        cursor.execute(
+            f"CREATE FUNCTION {function}() RETURNS trigger AS $$ "
+            f"BEGIN {assignments}RETURN NEW; END $$ LANGUAGE plpgsql"
+        )
+        # Waits for in-flight inserts, so every row the trigger misses is
+        # visible to the backfill below.
+        cursor.execute(
+            f"CREATE TRIGGER {function} BEFORE INSERT OR UPDATE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION {function}()"
+        )
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT coalesce(min(id), 0), coalesce(max(id), 0) FROM {table}"
+        )
+        first_id, last_id = cursor.fetchone()
+    assignments = ", ".join(
+        f"{metric}_scaled = round({metric} * 100)" for metric in METRICS
+    )
+    for start in range(first_id, last_id + 1, BACKFILL_BATCH_SIZE):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET {assignments} "
+                f"WHERE id >= %s AND id < %s",
+                [start, start + BACKFILL_BATCH_SIZE],
+            )
+
+    # A validated CHECK lets SET NOT NULL skip its own full scan, which
+    # would hold the exclusive lock.
+    constraints = {
+        metric: quote_name(f"{table_name}_{metric}_scaled_not_null")
+        for metric in METRICS
+    }
+    with transaction.atomic(), connection.cursor() as cursor:
+        for metric, constraint in constraints.items():
+            cursor.execute(
+                f"ALTER TABLE {table} ADD CONSTRAINT {constraint} "
+                f"CHECK ({metric}_scaled IS NOT NULL) NOT VALID"
+            )
+    for constraint in constraints.values():
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"ALTER TABLE {table} VALIDATE CONSTRAINT {constraint}"
+            )
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(f"DROP TRIGGER {function} ON {table}")
+        cursor.execute(f"DROP FUNCTION {function}()")
+        for metric, constraint in constraints.items():
+            cursor.execute(
+                f"ALTER TABLE {table} ALTER COLUMN {metric}_scaled "
+                f"SET NOT NULL"
+            )
+            cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {constraint}")
+            cursor.execute(f"ALTER TABLE {table} DROP COLUMN {metric}")
+            cursor.execute(
+                f"ALTER TABLE {table} RENAME COLUMN {metric}_scaled "
+                f"TO {metric}"
+            )
+
+
+def convert_metrics_to_numeric(apps, schema_editor):
+    table = schema_editor.quote_name(
+        apps.get_model("data", "SensorData")._meta.db_table
+    )
+    with transaction.atomic(), schema_editor.connection.cursor() as cursor:
+        for metric in METRICS:
+            cursor.execute(
+                f"ALTER TABLE {table} ALTER COLUMN {metric} "
+                f"TYPE numeric(10, 2) USING {metric} / 100.0"
+            )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("data", "0006_sensordataspoolcheckpoint"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(
+                    convert_metrics_to_integers, convert_metrics_to_numeric
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="sensordata",
+                    name=metric,
+                    field=sensor.data.fields.ScaledDecimalField(
+                        decimal_places=2, max_digits=9
+                    ),
+                )
+                for metric in METRICS
+            ],
+        ),
+    ]
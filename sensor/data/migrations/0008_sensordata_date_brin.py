@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:00
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+from sensor.data.partitions import add_index_concurrently
+
+DATE_BRIN_INDEX = django.contrib.postgres.indexes.BrinIndex(
+    autosummarize=True,
+    fields=["date"],
+    name="sensordata_date_brin",
+    pages_per_range=32,
+)
+
+
+def add_date_brin_index(apps, schema_editor):
+    add_index_concurrently(
+        schema_editor, apps.get_model("data", "SensorData"), DATE_BRIN_INDEX
+    )
+
+
+def remove_date_brin_index(apps, schema_editor):
+    schema_editor.remove_index(
+        apps.get_model("data", "SensorData"),
+        DATE_BRIN_INDEX,
+        concurrently=False,
+    )
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("data", "0007_scaled_integer_metrics"),
+        ("sensor", "0002_sensordevicekey"),
+    ]
+
+    operations = [
+        # The readings table may be partitioned, which AddIndexConcurrently
+        # does not handle.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name="sensordata",
+                    index=DATE_BRIN_INDEX,
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(
+                    add_date_brin_index, remove_date_brin_index
+                ),
+            ],
+        ),
+    ]
@@ -1,12 +1,103 @@
+from django.contrib.postgres.indexes import BrinIndex
 from django.utils import timezone
 from django.db import models
 
+from sensor.data.fields import ScaledDecimalField
 from sensor.models import Sensor
 
+SENSOR_DATA_METRICS = ("temperature", "humidity", "wind_speed")
+
+
+class AggregationBucket(models.TextChoices):
+    MINUTE = "1m", "Minute"
+    HOUR = "1h", "Hour"
+    DAY = "1d", "Day"
+    WEEK = "1w", "Week"
+    MONTH = "1mo", "Month"
+
 
 class SensorData(models.Model):
     sensor = models.ForeignKey(Sensor, models.CASCADE)
+    # Stored as integer hundredths, see ScaledDecimalField.
+    temperature = ScaledDecimalField(max_digits=9, decimal_places=2)
+    humidity = ScaledDecimalField(max_digits=9, decimal_places=2)
+    wind_speed = ScaledDecimalField(max_digits=9, decimal_places=2)
+    date = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["sensor", "-date", "-id"],
+                name="sensordata_sensor_date_idx",
+            ),
+            models.Index(fields=["-date", "-id"], name="sensordata_date_idx"),
+            # Readings arrive in date order, so a BRIN index serves wide
+            # date ranges from a few pages instead of a large B-tree scan.
+            BrinIndex(
+                fields=["date"],
+                name="sensordata_date_brin",
+                pages_per_range=32,
+                autosummarize=True,
+            ),
+        ]
+
+
+class RollupResolution(models.TextChoices):
+    MINUTE = AggregationBucket.MINUTE.value, "Minute"
+    HOUR = AggregationBucket.HOUR.value, "Hour"
+    DAY = AggregationBucket.DAY.value, "Day"
+
+
+class SensorDataRollup(models.Model):
+    sensor = models.ForeignKey(Sensor, models.CASCADE)
+    resolution = models.CharField(
+        max_length=3, choices=RollupResolution.choices
+    )
+    bucket = models.DateTimeField()
+    count = models.PositiveIntegerField()
+    temperature_sum = models.DecimalField(max_digits=20, decimal_places=2)
+    temperature_min = models.DecimalField(max_digits=10, decimal_places=2)
+    temperature_max = models.DecimalField(max_digits=10, decimal_places=2)
+    humidity_sum = models.DecimalField(max_digits=20, decimal_places=2)
+    humidity_min = models.DecimalField(max_digits=10, decimal_places=2)
+    humidity_max = models.DecimalField(max_digits=10, decimal_places=2)
+    wind_speed_sum = models.DecimalField(max_digits=20, decimal_places=2)
+    wind_speed_min = models.DecimalField(max_digits=10, decimal_places=2)
+    wind_speed_max = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["sensor", "resolution", "bucket"],
+                name="sensordatarollup_unique_bucket",
+            )
+        ]
+
+
+class SensorDataRollupCheckpoint(models.Model):
+    last_reading_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class SensorLatestReading(models.Model):
+    sensor = models.OneToOneField(
+        Sensor,
+        models.CASCADE,
+        primary_key=True,
+        related_name="latest_reading",
+    )
+    # Not a foreign key: the partitioned readings table is keyed on
+    # (id, date), so a plain reference to its id cannot be enforced.
+    reading_id = models.BigIntegerField()
     temperature = models.DecimalField(max_digits=10, decimal_places=2)
     humidity = models.DecimalField(max_digits=10, decimal_places=2)
     wind_speed = models.DecimalField(max_digits=10, decimal_places=2)
-    date = models.DateTimeField(default=timezone.now)
+    date = models.DateTimeField()
+
+
+class SensorDataSpoolCheckpoint(models.Model):
+    # Position of the spool flusher, committed together with the readings
+    # it inserted so a replay after a crash never inserts them twice.
+    segment = models.BigIntegerField(default=0)
+    offset = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
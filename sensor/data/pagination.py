@@ -0,0 +1,61 @@
+from operator import attrgetter, itemgetter
+
+from sensor.data.archive import has_archive, read_archived_readings
+from sensor.pagination import TimeSeriesCursorPagination
+
+
+class SensorDataCursorPagination(TimeSeriesCursorPagination):
+    """
+    Pages through hot readings and carries on into the archive, so
+    archived history stays reachable from the regular list endpoint.
+    """
+
+    def get_results(self, queryset, position, reverse, limit, view=None):
+        results = super().get_results(queryset, position, reverse, limit, view)
+        if view is None or not has_archive():
+            return results
+
+        # values() rows are dicts, so archived readings are turned into the
+        # same kind of row before merging.
+        values_fields = queryset.query.values_select
+        get_position = (
+            itemgetter("date", "id")
+            if values_fields
+            else attrgetter("date", "id")
+        )
+        sensor_ids, date_filters, metric_filters = view.get_archive_filters()
+        if len(results) == limit:
+            # Archived readings only make the page if they sort before the
+            # last database reading.
+            bound_lookup, pick = ("lte", min) if reverse else ("gte", max)
+            bound = get_position(results[-1])[0]
+            if bound_lookup in date_filters:
+                bound = pick(bound, date_filters[bound_lookup])
+            date_filters = {**date_filters, bound_lookup: bound}
+
+        archived = read_archived_readings(
+            sensor_ids,
+            date_filters,
+            limit,
+            position=(
+                tuple(self.parse_position(queryset.model, position))
+                if position is not None
+                else None
+            ),
+            ascending=reverse,
+            metric_filters=metric_filters,
+        )
+        if not archived:
+            return results
+        if values_fields:
+            archived = [
+                {
+                    name: reading.serializable_value(name)
+                    for name in values_fields
+                }
+                for reading in archived
+            ]
+
+        return sorted(
+            results + archived, key=get_position, reverse=not reverse
+        )[:limit]
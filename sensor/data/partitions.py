@@ -0,0 +1,297 @@
+import re
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from sensor.conditional import SENSOR_DATA_RESOURCE, touch_resources
+from sensor.data.models import SensorData
+
+PARTITION_SUFFIX_RE = re.compile(r"_p(?P<year>\d{4})_(?P<month>\d{2})$")
+
+
+class PartitioningError(Exception):
+    pass
+
+
+def get_month_start(value: date | datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    month_index = month.year * 12 + month.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def get_month_bounds(month: date) -> list[datetime]:
+    return [
+        datetime(bound.year, bound.month, 1, tzinfo=dt_timezone.utc)
+        for bound in (month, add_months(month, 1))
+    ]
+
+
+def get_partition_name(month: date) -> str:
+    return f"{SensorData._meta.db_table}_p{month:%Y_%m}"
+
+
+def get_default_partition_name() -> str:
+    return f"{SensorData._meta.db_table}_default"
+
+
+def _check_postgresql() -> None:
+    if connection.vendor != "postgresql":
+        raise PartitioningError(
+            "Partitioning requires PostgreSQL declarative partitioning."
+        )
+
+
+def is_partitioned() -> bool:
+    _check_postgresql()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table "
+            "WHERE partrelid = to_regclass(%s)",
+            [SensorData._meta.db_table],
+        )
+        return cursor.fetchone() is not None
+
+
+def get_partition_names() -> list[str]:
+    _check_postgresql()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(%s)",
+            [SensorData._meta.db_table],
+        )
+        return [name for name, in cursor.fetchall()]
+
+
+def get_partition_months() -> list[date]:
+    months = []
+    for name in get_partition_names():
+        match = PARTITION_SUFFIX_RE.search(name)
+        if match:
+            months.append(date(int(match["year"]), int(match["month"]), 1))
+    return sorted(months)
+
+
+def _create_partition(cursor, month: date) -> None:
+    quote_name = connection.ops.quote_name
+    table = quote_name(SensorData._meta.db_table)
+    partition = quote_name(get_partition_name(month))
+    default_partition = quote_name(get_default_partition_name())
+    bounds = get_month_bounds(month)
+
+    # Readings that fell into the default partition before this month had
+    # a partition of its own are moved over, otherwise attaching fails.
+    cursor.execute(
+        f"CREATE TABLE {partition} "
+        f"(LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    )
+    cursor.execute(
+        f"WITH moved AS (DELETE FROM {default_partition} "
+        f"WHERE date >= %s AND date < %s RETURNING *) "
+        f"INSERT INTO {partition} SELECT * FROM moved",
+        bounds,
+    )
+    cursor.execute(
+        f"ALTER TABLE {table} ATTACH PARTITION {partition} "
+        f"FOR VALUES FROM (%s) TO (%s)",
+        bounds,
+    )
+
+
+@transaction.atomic
+def create_partitions(months_ahead: int) -> list[date]:
+    """
+    Create the monthly partitions from the current month up to
+    ``months_ahead`` months into the future, returning the new ones.
+    """
+    if not is_partitioned():
+        raise PartitioningError(
+            f"{SensorData._meta.db_table} is not partitioned yet."
+        )
+
+    existing = set(get_partition_months())
+    current = get_month_start(timezone.now())
+    created = []
+    with connection.cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if month not in existing:
+                _create_partition(cursor, month)
+                created.append(month)
+    return created
+
+
+@transaction.atomic
+def drop_partitions(retention_months: int) -> list[date]:
+    """
+    Drop whole partitions older than ``retention_months`` months instead
+    of deleting their readings row by row, returning the dropped ones.
+    """
+    cutoff = add_months(get_month_start(timezone.now()), -retention_months)
+    dropped = []
+    with connection.cursor() as cursor:
+        for month in get_partition_months():
+            if add_months(month, 1) > cutoff:
+                continue
+            partition = connection.ops.quote_name(get_partition_name(month))
+            cursor.execute(
+                f"ALTER TABLE "
+                f"{connection.ops.quote_name(SensorData._meta.db_table)} "
+                f"DETACH PARTITION {partition}"
+            )
+            cursor.execute(f"DROP TABLE {partition}")
+            dropped.append(month)
+    if dropped:
+        touch_resources(SENSOR_DATA_RESOURCE)
+    return dropped
+
+
+@transaction.atomic
+def convert_to_partitioned_table(months_ahead: int) -> None:
+    """
+    Rebuild the readings table as a table partitioned by month on
+    ``date``, keeping its indexes, foreign key and id sequence.
+
+    The table is locked while the rows are copied, so run this in a
+    maintenance window.
+    """
+    if is_partitioned():
+        raise PartitioningError(
+            f"{SensorData._meta.db_table} is already partitioned."
+        )
+
+    quote_name = connection.ops.quote_name
+    table_name = SensorData._meta.db_table
+    legacy_name = f"{table_name}_legacy"
+    table = quote_name(table_name)
+    legacy = quote_name(legacy_name)
+    sequence = quote_name(f"{table_name}_id_seq")
+
+    with connection.cursor() as cursor:
+        # Deferred foreign key checks would otherwise block the ALTERs.
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE tablename = %s AND indexname NOT IN ("
+            "  SELECT conname FROM pg_constraint "
+            "  WHERE conrelid = to_regclass(%s) AND contype = 'p'"
+            ")",
+            [table_name, table_name],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+            [table_name],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'p'",
+            [table_name],
+        )
+        primary_keys = cursor.fetchall()
+        cursor.execute(
+            f"SELECT min(date), max(date), coalesce(max(id), 0) FROM {table}"
+        )
+        first_date, last_date, last_id = cursor.fetchone()
+
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+        # Frees the identity sequence name for the new table.
+        cursor.execute(f"ALTER TABLE {legacy} ALTER COLUMN id DROP IDENTITY")
+        for index_name, _ in indexes:
+            cursor.execute(
+                f"ALTER INDEX {quote_name(index_name)} "
+                f"RENAME TO {quote_name(f'{index_name}_legacy')}"
+            )
+        for constraint_name, *_ in primary_keys + foreign_keys:
+            cursor.execute(
+                f"ALTER TABLE {legacy} RENAME CONSTRAINT "
+                f"{quote_name(constraint_name)} "
+                f"TO {quote_name(f'{constraint_name}_legacy')}"
+            )
+
+        cursor.execute(
+            f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS) "
+            f"PARTITION BY RANGE (date)"
+        )
+        # Identity columns cannot be declared on partitioned tables, so the
+        # ids come from a plain sequence owned by the new table instead.
+        cursor.execute(f"CREATE SEQUENCE {sequence} START WITH {last_id + 1}")
+        cursor.execute(
+            f"ALTER TABLE {table} ALTER COLUMN id "
+            f"SET DEFAULT nextval('{sequence}'::regclass)"
+        )
+        cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id")
+        cursor.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT "
+            f"{quote_name(f'{table_name}_pkey')} PRIMARY KEY (id, date)"
+        )
+        for constraint_name, definition in foreign_keys:
+            cursor.execute(
+                f"ALTER TABLE {table} ADD CONSTRAINT "
+                f"{quote_name(constraint_name)} {definition}"
+            )
+        for _, definition in indexes:
+            cursor.execute(definition)
+
+        cursor.execute(
+            f"CREATE TABLE {quote_name(get_default_partition_name())} "
+            f"PARTITION OF {table} DEFAULT"
+        )
+        current = get_month_start(timezone.now())
+        month = get_month_start(first_date) if first_date else current
+        last_month = max(
+            add_months(current, months_ahead),
+            get_month_start(last_date) if last_date else current,
+        )
+        while month <= last_month:
+            cursor.execute(
+                f"CREATE TABLE {quote_name(get_partition_name(month))} "
+                f"PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)",
+                get_month_bounds(month),
+            )
+            month = add_months(month, 1)
+
+        cursor.execute(f"INSERT INTO {table} SELECT * FROM {legacy}")
+        cursor.execute(f"DROP TABLE {legacy}")
+
+
+def add_index_concurrently(schema_editor, model, index) -> None:
+    """
+    Create ``index`` on the readings table without blocking writes.
+
+    Partitioned tables cannot be indexed concurrently, so the index is
+    created on the parent table only, then concurrently on every
+    partition and attached to it. Partitions created afterwards get it
+    when they are attached.
+    """
+    if not is_partitioned():
+        schema_editor.add_index(model, index, concurrently=True)
+        return
+
+    quote_name = schema_editor.quote_name
+    table_name = model._meta.db_table
+    statement = index.create_sql(model, schema_editor)
+    statement.template = statement.template.replace(
+        "ON %(table)s", "ON ONLY %(table)s"
+    )
+    schema_editor.execute(statement)
+    for partition_name in get_partition_names():
+        partition_index_name = (
+            f"{index.name}_{partition_name.removeprefix(f'{table_name}_')}"
+        )
+        statement = index.create_sql(model, schema_editor, concurrently=True)
+        statement.rename_table_references(table_name, partition_name)
+        statement.parts["name"] = quote_name(partition_index_name)
+        schema_editor.execute(statement)
+        schema_editor.execute(
+            f"ALTER INDEX {quote_name(index.name)} "
+            f"ATTACH PARTITION {quote_name(partition_index_name)}"
+        )
@@ -0,0 +1,17 @@
+from django.dispatch import receiver
+
+from sensor.data.latest import update_latest_readings
+from sensor.data.rollups import refresh_rollups_for_readings
+from sensor.data.signals import sensor_data_ingested
+
+
+@receiver(sensor_data_ingested)
+def update_sensor_data_rollups(sender, readings, **kwargs):
+    refresh_rollups_for_readings(
+        (reading.sensor_id, reading.date) for reading in readings
+    )
+
+
+@receiver(sensor_data_ingested)
+def update_sensor_latest_readings(sender, readings, **kwargs):
+    update_latest_readings(readings)
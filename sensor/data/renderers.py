@@ -0,0 +1,40 @@
+import json
+
+import msgpack
+from rest_framework.renderers import BaseRenderer
+
+
+class StreamingExportRenderer(BaseRenderer):
+    """
+    Negotiates an export format. Export rows are streamed straight from the
+    view, so ``render`` only has to handle error payloads.
+    """
+
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return json.dumps(data).encode(self.charset)
+
+
+class CSVRenderer(StreamingExportRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+class NDJSONRenderer(StreamingExportRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+
+class MessagePackExportRenderer(StreamingExportRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data)
@@ -0,0 +1,291 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import Trunc
+
+from sensor.data.archive import (
+    aggregate_archived_readings,
+    merge_aggregate_rows,
+)
+from sensor.data.models import (
+    SENSOR_DATA_METRICS,
+    AggregationBucket,
+    RollupResolution,
+    SensorData,
+    SensorDataRollup,
+    SensorDataRollupCheckpoint,
+)
+from sensor.models import Sensor
+
+ROLLUP_STEPS = {
+    RollupResolution.MINUTE: timedelta(minutes=1),
+    RollupResolution.HOUR: timedelta(hours=1),
+    RollupResolution.DAY: timedelta(days=1),
+}
+
+ROLLUP_TRUNC_KINDS = {
+    RollupResolution.MINUTE: "minute",
+    RollupResolution.HOUR: "hour",
+    RollupResolution.DAY: "day",
+}
+
+# Each rollup is rebuilt from the next finer one, minutes from raw readings.
+ROLLUP_SOURCES = {
+    RollupResolution.MINUTE: None,
+    RollupResolution.HOUR: RollupResolution.MINUTE,
+    RollupResolution.DAY: RollupResolution.HOUR,
+}
+
+# Rollups that can answer a bucket, coarsest first.
+BUCKET_ROLLUP_CANDIDATES = {
+    AggregationBucket.MINUTE: [RollupResolution.MINUTE],
+    AggregationBucket.HOUR: [RollupResolution.HOUR, RollupResolution.MINUTE],
+    AggregationBucket.DAY: [
+        RollupResolution.DAY,
+        RollupResolution.HOUR,
+        RollupResolution.MINUTE,
+    ],
+    AggregationBucket.WEEK: [
+        RollupResolution.DAY,
+        RollupResolution.HOUR,
+        RollupResolution.MINUTE,
+    ],
+    AggregationBucket.MONTH: [
+        RollupResolution.DAY,
+        RollupResolution.HOUR,
+        RollupResolution.MINUTE,
+    ],
+}
+
+ROLLUP_VALUE_FIELDS = ["count"] + [
+    f"{metric}_{stat}"
+    for metric in SENSOR_DATA_METRICS
+    for stat in ("sum", "min", "max")
+]
+
+SensorDates = dict[int, set[datetime]]
+BucketRanges = dict[int, list[tuple[datetime, datetime]]]
+
+
+def truncate_to_resolution(value: datetime, resolution: str) -> datetime:
+    value = value.astimezone(timezone.utc).replace(second=0, microsecond=0)
+    if resolution in (RollupResolution.HOUR, RollupResolution.DAY):
+        value = value.replace(minute=0)
+    if resolution == RollupResolution.DAY:
+        value = value.replace(hour=0)
+    return value
+
+
+def is_aligned_to_resolution(value: datetime | None, resolution: str) -> bool:
+    return value is None or truncate_to_resolution(value, resolution) == value
+
+
+def get_reading_dates(readings: Iterable[tuple[int, datetime]]) -> SensorDates:
+    dates: SensorDates = {}
+    for sensor_id, date in readings:
+        dates.setdefault(sensor_id, set()).add(date)
+    return dates
+
+
+def get_bucket_ranges(dates: SensorDates, resolution: str) -> BucketRanges:
+    """
+    Return the buckets ``dates`` fall in, with runs of adjacent buckets
+    merged, so a late reading does not drag in every bucket up to now.
+    """
+    step = ROLLUP_STEPS[resolution]
+    bucket_ranges: BucketRanges = {}
+    for sensor_id, sensor_dates in dates.items():
+        ranges = bucket_ranges[sensor_id] = []
+        buckets = {
+            truncate_to_resolution(date, resolution) for date in sensor_dates
+        }
+        for bucket in sorted(buckets):
+            if ranges and ranges[-1][1] == bucket:
+                ranges[-1] = (ranges[-1][0], bucket + step)
+            else:
+                ranges.append((bucket, bucket + step))
+    return bucket_ranges
+
+
+def _get_range_filter(bucket_ranges: BucketRanges, field_name: str) -> Q:
+    range_filter = Q()
+    for sensor_id, ranges in bucket_ranges.items():
+        for start, end in ranges:
+            range_filter |= Q(
+                sensor_id=sensor_id,
+                **{f"{field_name}__gte": start, f"{field_name}__lt": end},
+            )
+    return range_filter
+
+
+def _compute_rollup_rows(
+    resolution: str, bucket_ranges: BucketRanges
+) -> list[dict[str, Any]]:
+    source = ROLLUP_SOURCES[resolution]
+    truncate = Trunc(
+        "date" if source is None else "bucket",
+        ROLLUP_TRUNC_KINDS[resolution],
+        tzinfo=timezone.utc,
+    )
+    if source is None:
+        queryset = SensorData.objects.filter(
+            _get_range_filter(bucket_ranges, "date")
+        )
+        aggregates = {"count": Count("id")}
+        for metric in SENSOR_DATA_METRICS:
+            aggregates[f"{metric}_sum"] = Sum(metric)
+            aggregates[f"{metric}_min"] = Min(metric)
+            aggregates[f"{metric}_max"] = Max(metric)
+    else:
+        queryset = SensorDataRollup.objects.filter(
+            _get_range_filter(bucket_ranges, "bucket"), resolution=source
+        )
+        aggregates = {"count": Sum("count")}
+        for metric in SENSOR_DATA_METRICS:
+            aggregates[f"{metric}_sum"] = Sum(f"{metric}_sum")
+            aggregates[f"{metric}_min"] = Min(f"{metric}_min")
+            aggregates[f"{metric}_max"] = Max(f"{metric}_max")
+
+    rows = list(
+        queryset.annotate(rollup_bucket=truncate)
+        .values("sensor_id", "rollup_bucket")
+        .annotate(**aggregates)
+    )
+    for row in rows:
+        row["bucket"] = row.pop("rollup_bucket")
+    if source is None:
+        # Late readings may land in a minute that was already archived.
+        archived_rows = [
+            row
+            for sensor_id, ranges in bucket_ranges.items()
+            for start, end in ranges
+            for row in aggregate_archived_readings(
+                [sensor_id], ROLLUP_TRUNC_KINDS[resolution], start, end
+            )
+        ]
+        if archived_rows:
+            rows = merge_aggregate_rows(rows, archived_rows)
+    return rows
+
+
+@transaction.atomic
+def refresh_sensor_data_rollups(dates: SensorDates) -> None:
+    """
+    Recompute every rollup bucket holding one of ``dates``.
+
+    ``dates`` maps a sensor id to the dates of its readings that changed.
+    Buckets are rebuilt from their source rather than patched, so
+    refreshing is idempotent and also covers updated and deleted readings.
+    """
+    if not dates:
+        return
+
+    # Concurrent ingests of a sensor rebuild its buckets one after the
+    # other, each seeing the readings of those committed before it;
+    # otherwise the last upsert would drop the readings of the others.
+    # NO KEY UPDATE leaves inserts referencing the sensor unblocked.
+    list(
+        Sensor.objects.select_for_update(no_key=True)
+        .filter(id__in=dates)
+        .order_by("id")
+        .values_list("id")
+    )
+
+    for resolution in ROLLUP_SOURCES:
+        bucket_ranges = get_bucket_ranges(dates, resolution)
+        rollups = [
+            SensorDataRollup(
+                sensor_id=row.pop("sensor_id"),
+                resolution=resolution,
+                bucket=row.pop("bucket"),
+                **row,
+            )
+            for row in _compute_rollup_rows(resolution, bucket_ranges)
+        ]
+        SensorDataRollup.objects.bulk_create(
+            rollups,
+            batch_size=settings.SENSOR_DATA_BULK_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["sensor", "resolution", "bucket"],
+            update_fields=ROLLUP_VALUE_FIELDS,
+        )
+
+        # Buckets whose readings have all been deleted are left behind by
+        # the upsert, so clear them explicitly.
+        refreshed_buckets: dict[int, list[datetime]] = {}
+        for rollup in rollups:
+            refreshed_buckets.setdefault(rollup.sensor_id, []).append(
+                rollup.bucket
+            )
+        stale_filter = Q()
+        for sensor_id, ranges in bucket_ranges.items():
+            for start, end in ranges:
+                stale_filter |= Q(
+                    sensor_id=sensor_id, bucket__gte=start, bucket__lt=end
+                ) & ~Q(bucket__in=refreshed_buckets.get(sensor_id, []))
+        SensorDataRollup.objects.filter(
+            stale_filter, resolution=resolution
+        ).delete()
+
+
+def refresh_rollups_for_readings(
+    readings: Iterable[tuple[int, datetime]]
+) -> None:
+    if settings.SENSOR_DATA_ROLLUPS_ENABLED:
+        refresh_sensor_data_rollups(get_reading_dates(readings))
+
+
+def catch_up_sensor_data_rollups(batch_size: int = 50000) -> int:
+    """
+    Fold readings written outside the ingestion path into the rollups.
+
+    Works forward from the checkpoint's high-water mark in id order and
+    returns the number of readings processed.
+    """
+    processed = 0
+    while True:
+        with transaction.atomic():
+            checkpoint, _ = (
+                SensorDataRollupCheckpoint.objects.select_for_update()
+                .get_or_create(pk=1)
+            )
+            readings = list(
+                SensorData.objects.filter(id__gt=checkpoint.last_reading_id)
+                .order_by("id")
+                .values_list("id", "sensor_id", "date")[:batch_size]
+            )
+            if not readings:
+                return processed
+
+            refresh_sensor_data_rollups(
+                get_reading_dates(
+                    (sensor_id, date) for _, sensor_id, date in readings
+                )
+            )
+            checkpoint.last_reading_id = readings[-1][0]
+            checkpoint.save(update_fields=["last_reading_id", "updated_at"])
+            processed += len(readings)
+
+
+def reset_sensor_data_rollups() -> None:
+    with transaction.atomic():
+        SensorDataRollup.objects.all().delete()
+        SensorDataRollupCheckpoint.objects.update_or_create(
+            pk=1, defaults={"last_reading_id": 0}
+        )
+
+
+def get_rollup_resolution(
+    bucket: str, date_from: datetime | None, date_to: datetime | None
+) -> str | None:
+    if not settings.SENSOR_DATA_ROLLUPS_ENABLED:
+        return None
+    for resolution in BUCKET_ROLLUP_CANDIDATES[bucket]:
+        if is_aligned_to_resolution(
+            date_from, resolution
+        ) and is_aligned_to_resolution(date_to, resolution):
+            return resolution
+    return None
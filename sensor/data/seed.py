@@ -0,0 +1,248 @@
+import struct
+from io import BytesIO
+from typing import Iterator
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+
+from sensor.alert.models import SensorAlert
+from sensor.data.archive import from_hundredths, from_microseconds
+from sensor.data.fields import ScaledDecimalField
+from sensor.data.models import SENSOR_DATA_METRICS, SensorData
+from sensor.models import Sensor, SensorStatus, SensorType
+
+MICROSECONDS_PER_HOUR = 3_600_000_000
+MICROSECONDS_PER_DAY = 24 * MICROSECONDS_PER_HOUR
+# Slow weather changes are interpolated between random knots this far apart.
+WEATHER_KNOT_MICROSECONDS = 6 * MICROSECONDS_PER_HOUR
+# Postgres binary timestamps count from 2000-01-01 instead of 1970-01-01.
+POSTGRES_EPOCH_MICROSECONDS = 946_684_800_000_000
+
+COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+COPY_TRAILER = struct.pack(">h", -1)
+COPY_DTYPES = {"bigint": ">i8", "integer": ">i4"}
+READING_COLUMNS = ("sensor_id", *SENSOR_DATA_METRICS, "date")
+
+# Mean temperature range and how strongly the weather reaches the sensor.
+SENSOR_CLIMATES = {
+    SensorType.OUTDOOR: ((5, 20), 1.0),
+    SensorType.ALL_PURPOSE: ((10, 22), 0.5),
+    SensorType.INDOOR: ((19, 23), 0.1),
+}
+
+
+def create_sensors(
+    count: int, rng: np.random.Generator, installation_date: int
+) -> list[Sensor]:
+    sensor_types = list(SENSOR_CLIMATES)
+    return Sensor.objects.bulk_create(
+        (
+            Sensor(
+                title=f"seeded sensor {index}",
+                type=sensor_types[index % len(sensor_types)],
+                status=str(
+                    rng.choice(list(SensorStatus), p=[0.9, 0.06, 0.04])
+                ),
+                model=f"model {index % 7}",
+                installation_date=from_microseconds(installation_date),
+            )
+            for index in range(count)
+        ),
+        batch_size=settings.SENSOR_DATA_BULK_BATCH_SIZE,
+    )
+
+
+def generate_readings(
+    rng: np.random.Generator,
+    sensor_type: str,
+    dates: np.ndarray,
+) -> dict[str, np.ndarray]:
+    """
+    Return the metrics of a sensor at ``dates`` (epoch microseconds) in
+    hundredths: a seasonal and a daily cycle, slow weather swings and
+    noise, with humidity falling as the temperature rises and wind picking
+    up in the afternoon.
+    """
+    (low, high), exposure = SENSOR_CLIMATES[sensor_type]
+    size = dates.size
+    hours = (dates % MICROSECONDS_PER_DAY) / MICROSECONDS_PER_HOUR
+    days = dates / MICROSECONDS_PER_DAY
+    daily = np.sin(2 * np.pi * (hours - 9) / 24)
+    seasonal = -np.cos(2 * np.pi * (days - 15) / 365.25)
+
+    knots = np.arange(
+        dates[0] - dates[0] % WEATHER_KNOT_MICROSECONDS,
+        dates[-1] + WEATHER_KNOT_MICROSECONDS + 1,
+        WEATHER_KNOT_MICROSECONDS,
+    )
+    weather = np.interp(dates, knots, rng.normal(0, 3, knots.size))
+
+    mean = rng.uniform(low, high)
+    swing = exposure * (10 * seasonal + rng.uniform(4, 8) * daily + weather)
+    temperature = mean + swing + rng.normal(0, 0.3, size)
+    humidity = np.clip(
+        60 - 1.5 * swing + rng.normal(0, 3, size) * exposure, 5, 100
+    )
+    wind_speed = exposure * rng.gamma(2, 1.5, size) * (
+        1 + 0.5 * np.sin(2 * np.pi * (hours - 9) / 24)
+    )
+    return {
+        metric: np.rint(values * 100).astype(np.int64)
+        for metric, values in (
+            ("temperature", temperature),
+            ("humidity", humidity),
+            ("wind_speed", wind_speed),
+        )
+    }
+
+
+def can_copy_readings() -> bool:
+    # Binary COPY writes the hundredths as they are stored, so it needs
+    # to know the exact column types.
+    if connection.vendor != "postgresql":
+        return False
+    for metric in SENSOR_DATA_METRICS:
+        field = SensorData._meta.get_field(metric)
+        if not (
+            isinstance(field, ScaledDecimalField)
+            and field.decimal_places == 2
+            and field.db_type(connection) in COPY_DTYPES
+        ):
+            return False
+    return True
+
+
+def _copy_readings(columns: dict[str, np.ndarray]) -> None:
+    """
+    Load the readings with a binary ``COPY``, packed by NumPy: every row
+    is a field count followed by a length and a big-endian value per
+    column.
+    """
+    column_dtypes = {
+        "sensor_id": ">i8",
+        **{
+            metric: COPY_DTYPES[
+                SensorData._meta.get_field(metric).db_type(connection)
+            ]
+            for metric in SENSOR_DATA_METRICS
+        },
+        "date": ">i8",
+    }
+    rows = np.empty(
+        columns["date"].size,
+        dtype=[("count", ">i2")]
+        + [
+            field
+            for column, dtype in column_dtypes.items()
+            for field in ((f"{column}_length", ">i4"), (column, dtype))
+        ],
+    )
+    rows["count"] = len(column_dtypes)
+    for column, dtype in column_dtypes.items():
+        rows[f"{column}_length"] = np.dtype(dtype).itemsize
+        rows[column] = columns[column]
+    rows["date"] -= POSTGRES_EPOCH_MICROSECONDS
+
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {quote_name(SensorData._meta.db_table)} "
+            f"({', '.join(map(quote_name, READING_COLUMNS))}) "
+            f"FROM STDIN WITH (FORMAT binary)",
+            BytesIO(COPY_HEADER + rows.tobytes() + COPY_TRAILER),
+        )
+
+
+def _bulk_create_readings(columns: dict[str, np.ndarray]) -> None:
+    values = {column: columns[column].tolist() for column in READING_COLUMNS}
+    SensorData.objects.bulk_create(
+        (
+            SensorData(
+                sensor_id=values["sensor_id"][row],
+                date=from_microseconds(values["date"][row]),
+                **{
+                    metric: from_hundredths(values[metric][row])
+                    for metric in SENSOR_DATA_METRICS
+                },
+            )
+            for row in range(columns["date"].size)
+        ),
+        batch_size=settings.SENSOR_DATA_BULK_BATCH_SIZE,
+    )
+
+
+def _create_alerts(
+    sensor: Sensor, dates: np.ndarray, temperatures: np.ndarray, rate: float
+) -> int:
+    # The hottest readings of each sensor raise an alert.
+    threshold = np.quantile(temperatures, 1 - rate)
+    hot = np.flatnonzero(temperatures > threshold)
+    SensorAlert.objects.bulk_create(
+        (
+            SensorAlert(
+                sensor=sensor,
+                description=(
+                    f"Temperature of {from_hundredths(temperatures[row])} "
+                    f"is above {from_hundredths(int(threshold))}."
+                ),
+                date=from_microseconds(dates[row]),
+            )
+            for row in hot.tolist()
+        ),
+        batch_size=settings.SENSOR_DATA_BULK_BATCH_SIZE,
+    )
+    return hot.size
+
+
+def seed_sensor_data(
+    sensor_count: int,
+    readings_per_sensor: int,
+    interval: int,
+    end: int,
+    chunk_size: int,
+    alert_rate: float,
+    seed: int = 0,
+) -> Iterator[tuple[Sensor, int, int]]:
+    """
+    Create ``sensor_count`` sensors with a reading every ``interval``
+    seconds up to ``end`` (epoch microseconds), one transaction per
+    sensor, yielding each sensor with the number of readings and alerts
+    created so far.
+
+    Readings are written straight to the table, bypassing the ingestion
+    signal, so rollups and latest readings have to be refreshed after.
+    """
+    rng = np.random.default_rng(seed)
+    dates = end - interval * 1_000_000 * np.arange(
+        readings_per_sensor - 1, -1, -1, dtype=np.int64
+    )
+    sensors = create_sensors(sensor_count, rng, int(dates[0]))
+    load_readings = (
+        _copy_readings if can_copy_readings() else _bulk_create_readings
+    )
+
+    readings = alerts = 0
+    for sensor in sensors:
+        metrics = generate_readings(rng, sensor.type, dates)
+        with transaction.atomic():
+            for start in range(0, dates.size, chunk_size):
+                chunk = slice(start, start + chunk_size)
+                load_readings(
+                    {
+                        "sensor_id": np.full(
+                            dates[chunk].size, sensor.id, dtype=np.int64
+                        ),
+                        **{
+                            metric: values[chunk]
+                            for metric, values in metrics.items()
+                        },
+                        "date": dates[chunk],
+                    }
+                )
+            if alert_rate:
+                alerts += _create_alerts(
+                    sensor, dates, metrics["temperature"], alert_rate
+                )
+        readings += dates.size
+        yield sensor, readings, alerts
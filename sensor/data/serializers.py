@@ -1,9 +1,14 @@
 from rest_framework import serializers
 
-from sensor.data.models import SensorData
+from sensor.data.models import (
+    AggregationBucket,
+    SensorData,
+    SensorLatestReading,
+)
+from sensor.metrics import SerializerTimingMixin
 
 
-class SensorDataSerializer(serializers.ModelSerializer):
+class SensorDataSerializer(SerializerTimingMixin, serializers.ModelSerializer):
     class Meta:
         model = SensorData
         fields = [
@@ -15,3 +20,110 @@ class SensorDataSerializer(serializers.ModelSerializer):
             "date",
         ]
         read_only_fields = ["id", "date"]
+
+
+class SensorLatestReadingSerializer(
+    SerializerTimingMixin, serializers.ModelSerializer
+):
+    id = serializers.IntegerField(source="reading_id")
+    sensor = serializers.IntegerField(source="sensor_id")
+
+    class Meta:
+        model = SensorLatestReading
+        fields = [
+            "id",
+            "sensor",
+            "temperature",
+            "humidity",
+            "wind_speed",
+            "date",
+        ]
+        read_only_fields = fields
+
+
+class SensorDataBulkItemSerializer(serializers.Serializer):
+    sensor = serializers.IntegerField(min_value=1)
+    temperature = serializers.DecimalField(max_digits=9, decimal_places=2)
+    humidity = serializers.DecimalField(max_digits=9, decimal_places=2)
+    wind_speed = serializers.DecimalField(max_digits=9, decimal_places=2)
+    date = serializers.DateTimeField(required=False)
+
+
+class SensorDataBulkErrorSerializer(serializers.Serializer):
+    index = serializers.IntegerField()
+    errors = serializers.DictField()
+
+
+class SensorDataBulkResultSerializer(serializers.Serializer):
+    created = serializers.IntegerField()
+    ids = serializers.ListField(child=serializers.IntegerField())
+    errors = SensorDataBulkErrorSerializer(many=True)
+
+
+class SensorDataSpoolResultSerializer(serializers.Serializer):
+    accepted = serializers.IntegerField()
+    errors = SensorDataBulkErrorSerializer(many=True)
+
+
+class SensorDataRangeQuerySerializer(serializers.Serializer):
+    def get_fields(self):
+        fields = super().get_fields()
+        # "from" is a keyword, so the range bounds cannot be declared as
+        # class attributes.
+        fields["from"] = serializers.DateTimeField(required=False)
+        fields["to"] = serializers.DateTimeField(required=False)
+        return fields
+
+    def validate(self, attrs):
+        date_from, date_to = attrs.get("from"), attrs.get("to")
+        if date_from and date_to and date_from >= date_to:
+            raise serializers.ValidationError(
+                {"to": ["Must be later than from."]}
+            )
+        return attrs
+
+
+class SensorDataAggregateQuerySerializer(SensorDataRangeQuerySerializer):
+    bucket = serializers.ChoiceField(
+        choices=AggregationBucket.choices, default=AggregationBucket.HOUR
+    )
+
+
+class SensorDataAggregateManyQuerySerializer(
+    SensorDataAggregateQuerySerializer
+):
+    sensor = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), min_length=1
+    )
+
+
+class SensorDataSeriesQuerySerializer(SensorDataRangeQuerySerializer):
+    sensor = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), min_length=1
+    )
+
+
+class SensorDataSeriesSerializer(serializers.Serializer):
+    sensor = serializers.IntegerField()
+    timestamp = serializers.ListField(
+        child=serializers.IntegerField(),
+        help_text="Milliseconds since the epoch.",
+    )
+    temperature = serializers.ListField(child=serializers.FloatField())
+    humidity = serializers.ListField(child=serializers.FloatField())
+    wind_speed = serializers.ListField(child=serializers.FloatField())
+
+
+class MetricAggregateSerializer(serializers.Serializer):
+    min = serializers.DecimalField(max_digits=10, decimal_places=2)
+    max = serializers.DecimalField(max_digits=10, decimal_places=2)
+    avg = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+
+class SensorDataAggregateSerializer(serializers.Serializer):
+    sensor = serializers.IntegerField()
+    bucket = serializers.DateTimeField()
+    count = serializers.IntegerField()
+    temperature = MetricAggregateSerializer()
+    humidity = MetricAggregateSerializer()
+    wind_speed = MetricAggregateSerializer()
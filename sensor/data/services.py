@@ -0,0 +1,226 @@
+from datetime import datetime, timezone
+from typing import Any
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min, QuerySet, Sum
+from django.db.models.functions import Trunc
+from rest_framework.exceptions import ValidationError
+
+from sensor.data.models import (
+    SENSOR_DATA_METRICS,
+    AggregationBucket,
+    SensorData,
+    SensorDataRollup,
+)
+from sensor.data.archive import (
+    aggregate_archived_readings,
+    merge_aggregate_rows,
+)
+from sensor.data.rollups import get_rollup_resolution
+from sensor.data.serializers import SensorDataBulkItemSerializer
+from sensor.data.signals import sensor_data_ingested
+from sensor.models import Sensor
+
+
+def ingest_sensor_data(readings: list[SensorData]) -> list[SensorData]:
+    with transaction.atomic():
+        readings = SensorData.objects.bulk_create(
+            readings, batch_size=settings.SENSOR_DATA_BULK_BATCH_SIZE
+        )
+        sensor_data_ingested.send(sender=SensorData, readings=readings)
+    return readings
+
+
+def validate_sensor_data_rows(
+    rows: list[Any],
+) -> tuple[list[SensorData], list[dict[str, Any]]]:
+    item_serializer = SensorDataBulkItemSerializer()
+    validated_rows = []
+    errors = []
+    for index, row in enumerate(rows):
+        try:
+            validated_rows.append(
+                (index, item_serializer.run_validation(row))
+            )
+        except ValidationError as exc:
+            errors.append({"index": index, "errors": exc.detail})
+
+    sensor_ids = {row["sensor"] for _, row in validated_rows}
+    existing_sensor_ids = set(
+        Sensor.objects.filter(id__in=sensor_ids).values_list("id", flat=True)
+    )
+
+    readings = []
+    for index, row in validated_rows:
+        sensor_id = row.pop("sensor")
+        if sensor_id not in existing_sensor_ids:
+            errors.append(
+                {
+                    "index": index,
+                    "errors": {
+                        "sensor": [
+                            f'Invalid pk "{sensor_id}" - object does not exist.'
+                        ]
+                    },
+                }
+            )
+            continue
+        readings.append(SensorData(sensor_id=sensor_id, **row))
+
+    errors.sort(key=lambda error: error["index"])
+    return readings, errors
+
+
+def check_bulk_rows(rows: Any) -> None:
+    if not isinstance(rows, list) or not rows:
+        raise ValidationError(
+            {"non_field_errors": ["Expected a non-empty list of readings."]}
+        )
+
+    max_rows = settings.SENSOR_DATA_BULK_MAX_ROWS
+    if len(rows) > max_rows:
+        raise ValidationError(
+            {
+                "non_field_errors": [
+                    f"Ensure this batch has no more than {max_rows} readings."
+                ]
+            }
+        )
+
+
+def bulk_ingest_sensor_data(rows: list[Any]) -> dict[str, Any]:
+    check_bulk_rows(rows)
+    readings, errors = validate_sensor_data_rows(rows)
+    if readings:
+        readings = ingest_sensor_data(readings)
+
+    return {
+        "created": len(readings),
+        "ids": [reading.id for reading in readings],
+        "errors": errors,
+    }
+
+
+AGGREGATION_TRUNC_KINDS = {
+    AggregationBucket.MINUTE: "minute",
+    AggregationBucket.HOUR: "hour",
+    AggregationBucket.DAY: "day",
+    AggregationBucket.WEEK: "week",
+    AggregationBucket.MONTH: "month",
+}
+
+
+def _get_aggregate_queryset(
+    queryset: QuerySet,
+    date_field: str,
+    sensor_ids: list[int],
+    date_from: datetime | None,
+    date_to: datetime | None,
+) -> QuerySet:
+    queryset = queryset.filter(sensor_id__in=sensor_ids)
+    if date_from:
+        queryset = queryset.filter(**{f"{date_field}__gte": date_from})
+    if date_to:
+        queryset = queryset.filter(**{f"{date_field}__lt": date_to})
+    return queryset
+
+
+def _aggregate_readings(
+    sensor_ids: list[int],
+    bucket: str,
+    date_from: datetime | None,
+    date_to: datetime | None,
+) -> list[dict[str, Any]]:
+    aggregates = {"count": Count("id")}
+    for metric in SENSOR_DATA_METRICS:
+        aggregates[f"{metric}_min"] = Min(metric)
+        aggregates[f"{metric}_max"] = Max(metric)
+        aggregates[f"{metric}_sum"] = Sum(metric)
+
+    rows = list(
+        _get_aggregate_queryset(
+            SensorData.objects, "date", sensor_ids, date_from, date_to
+        )
+        .annotate(
+            bucket=Trunc(
+                "date", AGGREGATION_TRUNC_KINDS[bucket], tzinfo=timezone.utc
+            )
+        )
+        .values("sensor_id", "bucket")
+        .annotate(**aggregates)
+        .order_by("sensor_id", "bucket")
+    )
+    archived_rows = aggregate_archived_readings(
+        sensor_ids, AGGREGATION_TRUNC_KINDS[bucket], date_from, date_to
+    )
+    if archived_rows:
+        rows = merge_aggregate_rows(rows, archived_rows)
+    return rows
+
+
+def _aggregate_rollups(
+    resolution: str,
+    sensor_ids: list[int],
+    bucket: str,
+    date_from: datetime | None,
+    date_to: datetime | None,
+) -> list[dict[str, Any]]:
+    aggregates = {"count": Sum("count")}
+    for metric in SENSOR_DATA_METRICS:
+        aggregates[f"{metric}_min"] = Min(f"{metric}_min")
+        aggregates[f"{metric}_max"] = Max(f"{metric}_max")
+        aggregates[f"{metric}_sum"] = Sum(f"{metric}_sum")
+
+    rows = list(
+        _get_aggregate_queryset(
+            SensorDataRollup.objects.filter(resolution=resolution),
+            "bucket",
+            sensor_ids,
+            date_from,
+            date_to,
+        )
+        .annotate(
+            aggregate_bucket=Trunc(
+                "bucket", AGGREGATION_TRUNC_KINDS[bucket], tzinfo=timezone.utc
+            )
+        )
+        .values("sensor_id", "aggregate_bucket")
+        .annotate(**aggregates)
+        .order_by("sensor_id", "aggregate_bucket")
+    )
+    for row in rows:
+        row["bucket"] = row.pop("aggregate_bucket")
+    return rows
+
+
+def aggregate_sensor_data(
+    sensor_ids: list[int],
+    bucket: str,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+) -> list[dict[str, Any]]:
+    resolution = get_rollup_resolution(bucket, date_from, date_to)
+    if resolution is None:
+        rows = _aggregate_readings(sensor_ids, bucket, date_from, date_to)
+    else:
+        rows = _aggregate_rollups(
+            resolution, sensor_ids, bucket, date_from, date_to
+        )
+
+    return [
+        {
+            "sensor": row["sensor_id"],
+            "bucket": row["bucket"],
+            "count": row["count"],
+            **{
+                metric: {
+                    "min": row[f"{metric}_min"],
+                    "max": row[f"{metric}_max"],
+                    "avg": row[f"{metric}_sum"] / row["count"],
+                }
+                for metric in SENSOR_DATA_METRICS
+            },
+        }
+        for row in rows
+    ]
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent with ``readings``: the list of ``SensorData`` rows that were just
+# written, whether they came in one at a time or through bulk ingestion.
+sensor_data_ingested = Signal()
@@ -0,0 +1,254 @@
+import fcntl
+import json
+import logging
+import os
+from contextlib import contextmanager
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Iterator
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from sensor.data.models import (
+    SENSOR_DATA_METRICS,
+    SensorData,
+    SensorDataSpoolCheckpoint,
+)
+from sensor.data.services import (
+    check_bulk_rows,
+    ingest_sensor_data,
+    validate_sensor_data_rows,
+)
+from sensor.models import Sensor
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = ".ndjson"
+FLUSH_LOCK_NAME = ".flush.lock"
+
+
+def get_spool_dir() -> Path:
+    return Path(settings.SENSOR_DATA_SPOOL_DIR)
+
+
+def get_segment_path(segment: int) -> Path:
+    return get_spool_dir() / f"{segment:020d}{SEGMENT_SUFFIX}"
+
+
+def list_segments() -> list[int]:
+    spool_dir = get_spool_dir()
+    if not spool_dir.exists():
+        return []
+    return sorted(
+        int(path.stem) for path in spool_dir.glob(f"*{SEGMENT_SUFFIX}")
+    )
+
+
+def _create_segment(segment: int) -> None:
+    try:
+        fd = os.open(
+            get_segment_path(segment), os.O_CREAT | os.O_EXCL | os.O_WRONLY
+        )
+    except FileExistsError:
+        return
+    os.close(fd)
+    _fsync_dir()
+
+
+def _fsync_dir() -> None:
+    fd = os.open(get_spool_dir(), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def _locked(path: Path, flags: int, lock: int) -> Iterator[int]:
+    fd = os.open(path, flags)
+    try:
+        fcntl.flock(fd, lock)
+        yield fd
+    finally:
+        os.close(fd)
+
+
+def encode_reading(reading: SensorData) -> bytes:
+    record = {
+        "sensor": reading.sensor_id,
+        **{
+            metric: str(getattr(reading, metric))
+            for metric in SENSOR_DATA_METRICS
+        },
+        "date": reading.date.isoformat(),
+    }
+    return json.dumps(record, separators=(",", ":")).encode() + b"\n"
+
+
+def decode_reading(line: bytes) -> SensorData:
+    record = json.loads(line)
+    return SensorData(
+        sensor_id=record["sensor"],
+        date=parse_datetime(record["date"]),
+        **{metric: Decimal(record[metric]) for metric in SENSOR_DATA_METRICS},
+    )
+
+
+def append_to_spool(readings: list[SensorData]) -> None:
+    """
+    Durably append validated readings to the active spool segment.
+
+    Returns once the records are fsynced, so they survive a crash and are
+    inserted by the next flush.
+    """
+    if not readings:
+        return
+    data = b"".join(encode_reading(reading) for reading in readings)
+    get_spool_dir().mkdir(parents=True, exist_ok=True)
+
+    while True:
+        segments = list_segments()
+        if not segments:
+            _create_segment(0)
+            continue
+        segment = segments[-1]
+        try:
+            with _locked(
+                get_segment_path(segment),
+                os.O_RDWR | os.O_APPEND,
+                fcntl.LOCK_EX,
+            ) as fd:
+                # The flusher seals a segment by creating the next one and
+                # then waiting for this lock, so a sealed segment is never
+                # written.
+                if get_segment_path(segment + 1).exists():
+                    continue
+                size = os.fstat(fd).st_size
+                if size and os.pread(fd, 1, size - 1) != b"\n":
+                    # A crashed append left a torn record; ending its line
+                    # keeps it from swallowing the first of these records.
+                    data = b"\n" + data
+                os.write(fd, data)
+                os.fsync(fd)
+                return
+        except FileNotFoundError:
+            # A flush removed the segment after it was listed.
+            continue
+
+
+def bulk_spool_sensor_data(rows: list[Any]) -> dict[str, Any]:
+    check_bulk_rows(rows)
+    readings, errors = validate_sensor_data_rows(rows)
+    append_to_spool(readings)
+    return {"accepted": len(readings), "errors": errors}
+
+
+def _read_records(segment: int, offset: int) -> Iterator[tuple[int, bytes]]:
+    """
+    Yield each complete record of a sealed segment from ``offset`` with
+    the offset just past it.
+    """
+    with open(get_segment_path(segment), "rb") as spool_file:
+        spool_file.seek(offset)
+        for line in spool_file:
+            if not line.endswith(b"\n"):
+                # Only an append that crashed before it was acknowledged
+                # leaves a torn record behind.
+                logger.warning(
+                    "Skipping a torn record at the end of segment %s.",
+                    segment,
+                )
+                return
+            offset += len(line)
+            yield offset, line
+
+
+def _insert_batch(
+    batch: list[SensorData], checkpoint: SensorDataSpoolCheckpoint
+) -> None:
+    sensor_ids = {reading.sensor_id for reading in batch}
+    existing_sensor_ids = set(
+        Sensor.objects.filter(id__in=sensor_ids).values_list("id", flat=True)
+    )
+    readings = [
+        reading
+        for reading in batch
+        if reading.sensor_id in existing_sensor_ids
+    ]
+    if len(readings) < len(batch):
+        logger.warning(
+            "Dropping %s spooled readings of deleted sensors.",
+            len(batch) - len(readings),
+        )
+    with transaction.atomic():
+        if readings:
+            ingest_sensor_data(readings)
+        checkpoint.save(update_fields=["segment", "offset", "updated_at"])
+
+
+@contextmanager
+def _try_flush_lock() -> Iterator[bool]:
+    fd = os.open(get_spool_dir() / FLUSH_LOCK_NAME, os.O_CREAT | os.O_RDWR)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+        else:
+            yield True
+    finally:
+        os.close(fd)
+
+
+def flush_spool(batch_size: int) -> int:
+    """
+    Seal the active segment and insert every sealed segment past the
+    checkpoint in batches of ``batch_size``, returning the number of
+    readings inserted. Returns 0 straight away while another flush runs.
+    """
+    get_spool_dir().mkdir(parents=True, exist_ok=True)
+    with _try_flush_lock() as locked:
+        if not locked:
+            return 0
+
+        segments = list_segments()
+        if segments and get_segment_path(segments[-1]).stat().st_size:
+            _create_segment(segments[-1] + 1)
+            segments.append(segments[-1] + 1)
+
+        checkpoint, _ = SensorDataSpoolCheckpoint.objects.get_or_create(pk=1)
+        flushed = 0
+        for segment in segments[:-1]:
+            path = get_segment_path(segment)
+            if segment >= checkpoint.segment:
+                # Waits for appends that locked the segment before it was
+                # sealed.
+                with _locked(path, os.O_RDONLY, fcntl.LOCK_EX):
+                    pass
+                offset = (
+                    checkpoint.offset if segment == checkpoint.segment else 0
+                )
+                batch = []
+                for offset, line in _read_records(segment, offset):
+                    try:
+                        batch.append(decode_reading(line))
+                    except (ValueError, KeyError):
+                        # A record torn by a crashed append, on its own
+                        # line once another append followed.
+                        logger.warning(
+                            "Skipping a corrupt record in segment %s.",
+                            segment,
+                        )
+                        continue
+                    if len(batch) >= batch_size:
+                        checkpoint.segment, checkpoint.offset = segment, offset
+                        _insert_batch(batch, checkpoint)
+                        flushed += len(batch)
+                        batch = []
+                checkpoint.segment, checkpoint.offset = segment + 1, 0
+                _insert_batch(batch, checkpoint)
+                flushed += len(batch)
+            path.unlink()
+        return flushed
@@ -1,3 +1,926 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import msgpack
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from sensor.data.archive import list_archived_months, write_archived_month
+from sensor.data.benchmark import (
+    build_scenarios,
+    create_fleet,
+    get_authenticated_client,
+    run_scenario,
+)
+from sensor.data.models import (
+    SENSOR_DATA_METRICS,
+    RollupResolution,
+    SensorData,
+    SensorDataRollup,
+    SensorDataRollupCheckpoint,
+)
+from sensor.data.partitions import (
+    add_months,
+    get_month_bounds,
+    get_month_start,
+    get_partition_months,
+    is_partitioned,
+)
+from sensor.data.rollups import get_bucket_ranges, get_reading_dates
+from sensor.data.seed import seed_sensor_data
+from sensor.data.serializers import SensorDataSerializer
+from sensor.data.spool import flush_spool, get_segment_path, list_segments
+from sensor.data.services import ingest_sensor_data
+from sensor.alert.models import SensorAlert
+from sensor.models import Sensor, SensorStatus, SensorType
+from user.models import User
+
+
+class SensorDataBulkAPITests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email='test@gmail.com',
+            password='password',
+        )
+        self.sensor = Sensor.objects.create(
+            title='sensor title',
+            type=SensorType.OUTDOOR,
+            status=SensorStatus.ACTIVE,
+            model='sensor model',
+            installation_date=timezone.now()
+        )
+
+    def reading(self, **kwargs):
+        data = {
+            "sensor": self.sensor.id,
+            "temperature": "21.50",
+            "humidity": "40.00",
+            "wind_speed": "3.20",
+        }
+        data.update(kwargs)
+        return data
+
+    def test_bulk_create_json(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            '/api/sensors-data/bulk/',
+            data=[self.reading(), self.reading(temperature="22.00")],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['created'], 2)
+        self.assertEqual(response.json()['errors'], [])
+        self.assertEqual(SensorData.objects.count(), 2)
+
+    def test_bulk_create_ndjson(self):
+        self.client.force_authenticate(self.user)
+        body = "\n".join(
+            json.dumps(row) for row in [self.reading(), self.reading()]
+        )
+        response = self.client.post(
+            '/api/sensors-data/bulk/',
+            data=body,
+            content_type="application/x-ndjson",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['created'], 2)
+
+    def test_bulk_create_msgpack(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            '/api/sensors-data/bulk/',
+            data=msgpack.packb([self.reading(), self.reading()]),
+            content_type="application/msgpack",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['created'], 2)
+
+    def test_create_and_list_msgpack(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            '/api/sensors-data/',
+            data=msgpack.packb(self.reading()),
+            content_type="application/msgpack",
+            HTTP_ACCEPT="application/msgpack",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        reading = msgpack.unpackb(response.content)
+        self.assertEqual(reading['temperature'], '21.50')
+
+        response = self.client.get(
+            '/api/sensors-data/', HTTP_ACCEPT='application/msgpack'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(msgpack.unpackb(response.content)['results'], [reading])
+
+    def test_metrics_are_stored_as_hundredths(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            '/api/sensors-data/',
+            data=self.reading(temperature="-0.05", wind_speed="1234567.89"),
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['temperature'], '-0.05')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT temperature, humidity, wind_speed '
+                'FROM data_sensordata WHERE id = %s',
+                [response.json()['id']],
+            )
+            self.assertEqual(cursor.fetchone(), (-5, 4000, 123456789))
+
+        response = self.client.get(f"/api/sensors-data/{response.json()['id']}/")
+        self.assertEqual(response.json()['humidity'], '40.00')
+        self.assertEqual(response.json()['wind_speed'], '1234567.89')
+        self.assertEqual(
+            SensorData.objects.filter(temperature__lt=0).count(), 1
+        )
+
+    def test_bulk_create_reports_row_errors(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            '/api/sensors-data/bulk/',
+            data=[
+                self.reading(),
+                self.reading(temperature="hot"),
+                self.reading(sensor=self.sensor.id + 1000),
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['created'], 1)
+        self.assertEqual(
+            [error['index'] for error in response.json()['errors']], [1, 2]
+        )
+        self.assertEqual(SensorData.objects.count(), 1)
+
+    def test_bulk_create_rejects_all_invalid(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            '/api/sensors-data/bulk/',
+            data=[self.reading(humidity=None)],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(SensorData.objects.count(), 0)
+
+
+class SensorDataPaginationAPITests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email='test@gmail.com',
+            password='password',
+        )
+        self.sensor = Sensor.objects.create(
+            title='sensor title',
+            type=SensorType.OUTDOOR,
+            status=SensorStatus.ACTIVE,
+            model='sensor model',
+            installation_date=timezone.now()
+        )
+        now = timezone.now()
+        SensorData.objects.bulk_create(
+            SensorData(
+                sensor=self.sensor,
+                temperature=index,
+                humidity=50,
+                wind_speed=1,
+                # Pairs of readings share a timestamp to exercise the id
+                # tie-breaker.
+                date=now - timezone.timedelta(minutes=index // 2),
+            )
+            for index in range(30)
+        )
+
+    def test_cursor_pages_cover_every_reading_once(self):
+        self.client.force_authenticate(self.user)
+        seen_ids = []
+        url = f'/api/sensors-data/?sensor={self.sensor.id}&page_size=7'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen_ids.extend(row['id'] for row in response.json()['results'])
+            url = response.json()['next']
+
+        expected_ids = list(
+            SensorData.objects.order_by('-date', '-id').values_list(
+                'id', flat=True
+            )
+        )
+        self.assertEqual(seen_ids, expected_ids)
+
+    def test_previous_link_returns_to_prior_page(self):
+        self.client.force_authenticate(self.user)
+        first = self.client.get('/api/sensors-data/?page_size=5').json()
+        second = self.client.get(first['next']).json()
+        previous = self.client.get(second['previous']).json()
+        self.assertIsNone(first['previous'])
+        self.assertEqual(previous['results'], first['results'])
+
+    def test_next_page_starts_an_index_scan_at_the_cursor(self):
+        self.client.force_authenticate(self.user)
+        first = self.client.get(
+            f'/api/sensors-data/?sensor={self.sensor.id}&page_size=7'
+        ).json()
+        position = first['results'][-1]
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(first['next'])
+        [sql] = [
+            query['sql']
+            for query in queries.captured_queries
+            if 'LIMIT' in query['sql'] and 'data_sensordata' in query['sql']
+        ]
+        self.assertIn('"data_sensordata"."date" <= ', sql)
+
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = (
+                SensorData.objects.filter(
+                    sensor=self.sensor,
+                    date__lte=position['date'],
+                )
+                .filter(
+                    Q(date__lt=position['date'])
+                    | Q(date=position['date'], id__lt=position['id'])
+                )
+                .order_by('-date', '-id')[:8]
+                .explain()
+            )
+        self.assertRegex(plan, r'Index Cond: .*date <= ')
+
+    def test_invalid_cursor(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/sensors-data/?cursor=bogus')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_metric_range_filter(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(
+            '/api/sensors-data/',
+            {'temperature__gte': '10', 'temperature__lte': '12.5'},
+        )
+        self.assertEqual(
+            [row['temperature'] for row in response.json()['results']],
+            ['11.00', '10.00', '12.00'],
+        )
+
+    def test_metric_range_filter_rejects_extra_precision(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(
+            '/api/sensors-data/', {'temperature__gte': '10.005'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SensorDataRollupTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email='test@gmail.com',
+            password='password',
+        )
+        self.sensor = Sensor.objects.create(
+            title='sensor title',
+            type=SensorType.OUTDOOR,
+            status=SensorStatus.ACTIVE,
+            model='sensor model',
+            installation_date=timezone.now()
+        )
+        self.start = datetime(2024, 6, 1, 23, 30, tzinfo=dt_timezone.utc)
+
+    def readings(self, count):
+        return [
+            SensorData(
+                sensor=self.sensor,
+                temperature=index,
+                humidity=50,
+                wind_speed=1,
+                date=self.start + timedelta(minutes=index * 15),
+            )
+            for index in range(count)
+        ]
+
+    def rollup(self, resolution, bucket):
+        return SensorDataRollup.objects.get(
+            sensor=self.sensor, resolution=resolution, bucket=bucket
+        )
+
+    def test_ingest_updates_every_resolution(self):
+        ingest_sensor_data(self.readings(4))
+
+        self.assertEqual(
+            SensorDataRollup.objects.filter(
+                resolution=RollupResolution.MINUTE
+            ).count(),
+            4,
+        )
+        hour = self.rollup(
+            RollupResolution.HOUR, datetime(2024, 6, 2, tzinfo=dt_timezone.utc)
+        )
+        self.assertEqual(hour.count, 2)
+        self.assertEqual(hour.temperature_sum, Decimal('5.00'))
+        self.assertEqual(hour.temperature_max, Decimal('3.00'))
+        day = self.rollup(
+            RollupResolution.DAY, datetime(2024, 6, 1, tzinfo=dt_timezone.utc)
+        )
+        self.assertEqual(day.count, 2)
+
+    def test_delete_refreshes_rollups(self):
+        self.client.force_authenticate(self.user)
+        reading = ingest_sensor_data(self.readings(1))[0]
+
+        response = self.client.delete(f'/api/sensors-data/{reading.id}/')
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(SensorDataRollup.objects.exists())
+
+    def test_catch_up_from_high_water_mark(self):
+        SensorData.objects.bulk_create(self.readings(3))
+
+        call_command('rollup_sensor_data', stdout=StringIO())
+        SensorData.objects.bulk_create(self.readings(1))
+        call_command('rollup_sensor_data', stdout=StringIO())
+
+        day = self.rollup(
+            RollupResolution.DAY, datetime(2024, 6, 1, tzinfo=dt_timezone.utc)
+        )
+        self.assertEqual(day.count, 3)
+        self.assertEqual(
+            SensorDataRollupCheckpoint.objects.get().last_reading_id,
+            SensorData.objects.order_by('id').last().id,
+        )
+
+    def test_late_reading_refreshes_only_its_own_buckets(self):
+        late, current = self.start, self.start + timedelta(days=30)
+        bucket_ranges = get_bucket_ranges(
+            get_reading_dates(
+                [
+                    (self.sensor.id, late),
+                    (self.sensor.id, current),
+                    (self.sensor.id, current + timedelta(minutes=1)),
+                ]
+            ),
+            RollupResolution.MINUTE,
+        )
+
+        self.assertEqual(
+            bucket_ranges,
+            {
+                self.sensor.id: [
+                    (late, late + timedelta(minutes=1)),
+                    (current, current + timedelta(minutes=2)),
+                ]
+            },
+        )
+
+
+class SensorDataRollupConcurrencyTests(APITransactionTestCase):
+    def setUp(self):
+        self.sensor = Sensor.objects.create(
+            title='sensor title',
+            type=SensorType.OUTDOOR,
+            status=SensorStatus.ACTIVE,
+            model='sensor model',
+            installation_date=timezone.now()
+        )
+        self.date = datetime(2024, 6, 1, 12, 0, tzinfo=dt_timezone.utc)
+
+    def reading(self, temperature):
+        return SensorData(
+            sensor=self.sensor,
+            temperature=temperature,
+            humidity=50,
+            wind_speed=1,
+            date=self.date + timedelta(seconds=temperature),
+        )
+
+    def ingest_in_thread(self):
+        try:
+            ingest_sensor_data([self.reading(2)])
+        finally:
+            connection.close()
+
+    def test_concurrent_ingests_of_a_sensor_keep_every_reading(self):
+        with transaction.atomic():
+            ingest_sensor_data([self.reading(1)])
+            thread = threading.Thread(target=self.ingest_in_thread)
+            thread.start()
+            # The second ingest waits for this one to commit.
+            thread.join(0.5)
+            self.assertTrue(thread.is_alive())
+        thread.join()
+
+        minute = SensorDataRollup.objects.get(
+            resolution=RollupResolution.MINUTE
+        )
+        self.assertEqual(minute.count, 2)
+        self.assertEqual(minute.temperature_sum, Decimal('3.00'))
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL')
+class SensorDataPartitionTests(APITestCase):
+    def setUp(self):
+        self.sensor = Sensor.objects.create(
+            title='sensor title',
+            type=SensorType.OUTDOOR,
+            status=SensorStatus.ACTIVE,
+            model='sensor model',
+            installation_date=timezone.now()
+        )
+        self.current_month = get_month_start(timezone.now())
+        self.readings = SensorData.objects.bulk_create(
+            SensorData(
+                sensor=self.sensor,
+                temperature=months_ago,
+                humidity=50,
+                wind_speed=1,
+                date=get_month_bounds(
+                    add_months(self.current_month, -months_ago)
+                )[0] + timedelta(days=1),
+            )
+            for months_ago in (0, 6)
+        )
+
+    def test_convert_keeps_readings_and_ids(self):
+        call_command(
+            'partition_sensor_data', '--convert', '--months-ahead=2',
+            stdout=StringIO(),
+        )
+
+        self.assertTrue(is_partitioned())
+        self.assertEqual(SensorData.objects.count(), 2)
+        self.assertIn(add_months(self.current_month, 2), get_partition_months())
+        reading = SensorData.objects.create(
+            sensor=self.sensor, temperature=1, humidity=1, wind_speed=1
+        )
+        self.assertGreater(
+            reading.id, max(reading.id for reading in self.readings)
+        )
+
+    def test_retention_drops_old_partitions(self):
+        call_command(
+            'partition_sensor_data', '--convert', '--retention-months=3',
+            stdout=StringIO(),
+        )
+
+        self.assertEqual(
+            list(SensorData.objects.values_list('temperature', flat=True)),
+            [Decimal('0.00')],
+        )
+        self.assertNotIn(
+            add_months(self.current_month, -6), get_partition_months()
+        )
+
+    def test_create_requires_partitioned_table(self):
+        with self.assertRaises(CommandError):
+            call_command('partition_sensor_data', stdout=StringIO())
+
+
+class SensorDataArchiveTests(APITestCase):
+    def setUp(self):
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir)
+        settings_override = override_settings(
+            SENSOR_DATA_ARCHIVE_DIR=self.archive_dir
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create(
+            email='test@gmail.com',
+            password='password',
+        )
+        self.sensor = Sensor.objects.create(
+            title='sensor title',
+            type=SensorType.OUTDOOR,
+            status=SensorStatus.ACTIVE,
+            model='sensor model',
+            installation_date=timezone.now()
+        )
+        start = datetime(2024, 5, 31, 22, 0, tzinfo=dt_timezone.utc)
+        ingest_sensor_data(
+            [
+                SensorData(
+                    sensor=self.sensor,
+                    temperature=Decimal(index) / 4,
+                    humidity=50,
+                    wind_speed=1,
+                    date=start + timedelta(minutes=30 * index),
+                )
+                for index in range(8)
+            ]
+        )
+        self.expected_ids = list(
+            SensorData.objects.order_by('-date', '-id').values_list(
+                'id', flat=True
+            )
+        )
+
+        call_command(
+            'archive_sensor_data', '--before=2024-06-15', stdout=StringIO()
+        )
+
+    def test_archive_moves_whole_months_out_of_database(self):
+        self.assertEqual(SensorData.objects.count(), 4)
+        self.assertFalse(
+            SensorData.objects.filter(date__lt=datetime(
+                2024, 6, 1, tzinfo=dt_timezone.utc
+            )).exists()
+        )
+
+    def test_rewriting_a_month_flips_it_to_a_new_version(self):
+        [archived_month] = list_archived_months([self.sensor.id])
+        first_version = archived_month.path.resolve()
+        self.assertTrue(archived_month.path.is_symlink())
+
+        write_archived_month(
+            archived_month,
+            {
+                column: values[:1]
+                for column, values in archived_month.load().items()
+            },
+        )
+
+        self.assertTrue(archived_month.path.is_symlink())
+        self.assertNotEqual(archived_month.path.resolve(), first_version)
+        self.assertFalse(first_version.exists())
+        self.assertEqual(
+            list(archived_month.load()['id']), self.expected_ids[:-5:-1]
+        )
+        self.assertEqual(
+            len(list(archived_month.path.parent.iterdir())), 2
+        )
+
+    def test_list_pages_into_archive(self):
+        self.client.force_authenticate(self.user)
+        seen = []
+        url = f'/api/sensors-data/?sensor={self.sensor.id}&page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(response.json()['results'])
+            url = response.json()['next']
+
+        self.assertEqual([row['id'] for row in seen], self.expected_ids)
+        self.assertEqual(seen[-1]['temperature'], '0.00')
+        self.assertEqual(seen[-2]['temperature'], '0.25')
+
+    def test_list_date_filter_reads_only_archive(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(
+            '/api/sensors-data/',
+            {'date__lt': '2024-05-31T23:00:00Z'},
+        )
+        self.assertEqual(
+            [row['id'] for row in response.json()['results']],
+            self.expected_ids[-2:],
+        )
+
+    def test_list_metric_filter_reads_database_and_archive(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(
+            '/api/sensors-data/', {'temperature__lte': '0.25'}
+        )
+        self.assertEqual(
+            [row['id'] for row in response.json()['results']],
+            self.expected_ids[-2:],
+        )
+        response = self.client.get(
+            '/api/sensors-data/', {'temperature__gte': '1.5'}
+        )
+        self.assertEqual(
+            [row['id'] for row in response.json()['results']],
+            self.expected_ids[:2],
+        )
+
+    def test_aggregate_from_raw_readings_includes_archive(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(
+            f'/api/sensors/{self.sensor.id}/aggregate/',
+            {'bucket': '1d', 'from': '2024-05-31T21:59:59Z'},
+        )
+        self.assertEqual(
+            [row['count'] for row in response.json()], [4, 4]
+        )
+        self.assertEqual(
+            response.json()[0]['temperature'],
+            {'min': '0.00', 'max': '0.75', 'avg': '0.38'},
+        )
+
+    def test_series_includes_archive(self):
+        other_sensor = Sensor.objects.create(
+            title='other sensor',
+            type=SensorType.INDOOR,
+            status=SensorStatus.ACTIVE,
+            model='sensor model',
+            installation_date=timezone.now()
+        )
+        self.client.force_authenticate(self.user)
+        response = self.client.get(
+            '/api/sensors-data/series/',
+            {
+                'sensor': [self.sensor.id, other_sensor.id],
+                'from': '2024-05-31T22:30:00Z',
+                'to': '2024-06-01T01:30:00Z',
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first, second = response.json()
+        self.assertEqual(first['sensor'], self.sensor.id)
+        start = int(
+            datetime(2024, 5, 31, 22, 30, tzinfo=dt_timezone.utc).timestamp()
+        )
+        self.assertEqual(
+            first['timestamp'],
+            [(start + 1800 * index) * 1000 for index in range(6)],
+        )
+        self.assertEqual(first['temperature'], [0.25, 0.5, 0.75, 1.0, 1.25, 1.5])
+        self.assertEqual(first['humidity'], [50.0] * 6)
+        self.assertEqual(
+            second,
+            {
+                'sensor': other_sensor.id,
+                'timestamp': [],
+                'temperature': [],
+                'humidity': [],
+                'wind_speed': [],
+            },
+        )
+
+    @override_settings(SENSOR_DATA_SERIES_MAX_POINTS=5)
+    def test_series_rejects_too_many_points(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(
+            '/api/sensors-data/series/', {'sensor': self.sensor.id}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SensorDataExportAPITests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email='test@gmail.com',
+            password='password',
+        )
+        self.sensors = [
+            Sensor.objects.create(
+                title=f'sensor {index}',
+                type=SensorType.OUTDOOR,
+                status=SensorStatus.ACTIVE,
+                model='sensor model',
+                installation_date=timezone.now()
+            )
+            for index in range(3)
+        ]
+        start = datetime(2024, 6, 1, tzinfo=dt_timezone.utc)
+        SensorData.objects.bulk_create(
+            SensorData(
+                sensor=sensor,
+                temperature='20.50',
+                humidity=50,
+                wind_speed=1,
+                date=start + timedelta(minutes=minute),
+            )
+            for sensor in self.sensors
+            for minute in range(3)
+        )
+
+    def export(self, export_format, **params):
+        self.client.force_authenticate(self.user)
+        params['format'] = export_format
+        params['sensor__in'] = ','.join(
+            str(sensor.id) for sensor in self.sensors[:2]
+        )
+        response = self.client.get('/api/sensors-data/export/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content)
+        return content if export_format == 'msgpack' else content.decode()
+
+    def test_export_csv(self):
+        lines = self.export('csv', date__gte='2024-06-01T00:01:00Z')
+        lines = lines.splitlines()
+        self.assertEqual(
+            lines[0], 'id,sensor,temperature,humidity,wind_speed,date'
+        )
+        self.assertEqual(len(lines), 5)
+        self.assertTrue(lines[1].endswith(',20.50,50.00,1.00,2024-06-01T00:01:00Z'))
+
+    def test_export_ndjson_matches_api_representation(self):
+        rows = [json.loads(line) for line in self.export('ndjson').splitlines()]
+        self.assertEqual(len(rows), 6)
+        reading = SensorData.objects.get(id=rows[0]['id'])
+        self.assertEqual(rows[0], SensorDataSerializer(reading).data)
+
+    def test_export_msgpack_matches_ndjson(self):
+        with override_settings(SENSOR_DATA_EXPORT_CHUNK_SIZE=4):
+            rows = list(msgpack.Unpacker(BytesIO(self.export('msgpack'))))
+        ndjson = [json.loads(line) for line in self.export('ndjson').splitlines()]
+        self.assertEqual(rows, ndjson)
+
+
+class SensorDataSpoolTests(APITestCase):
+    def setUp(self):
+        self.spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool_dir)
+        settings_override = override_settings(
+            SENSOR_DATA_INGEST_MODE='spool',
+            SENSOR_DATA_SPOOL_DIR=self.spool_dir,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create(
+            email='test@gmail.com',
+            password='password',
+        )
+        self.sensor = Sensor.objects.create(
+            title='sensor title',
+            type=SensorType.OUTDOOR,
+            status=SensorStatus.ACTIVE,
+            model='sensor model',
+            installation_date=timezone.now()
+        )
+
+    def spool(self, count):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            '/api/sensors-data/bulk/',
+            [
+                {
+                    'sensor': self.sensor.id,
+                    'temperature': index,
+                    'humidity': 50,
+                    'wind_speed': 1,
+                }
+                for index in range(count)
+            ],
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.json()['accepted'], count)
+
+    def test_create_is_acknowledged_before_the_flush(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            '/api/sensors-data/',
+            {
+                'sensor': self.sensor.id,
+                'temperature': '21.50',
+                'humidity': 50,
+                'wind_speed': 1,
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertIsNone(response.json()['id'])
+        self.assertFalse(SensorData.objects.exists())
+
+        self.assertEqual(flush_spool(batch_size=100), 1)
+        reading = SensorData.objects.get()
+        self.assertEqual(reading.temperature, Decimal('21.50'))
+        self.assertEqual(reading.date, parse_datetime(response.json()['date']))
+        self.assertEqual(self.sensor.latest_reading.reading_id, reading.id)
+        self.assertEqual(len(list_segments()), 1)
+
+    def test_flush_resumes_after_a_crash_without_duplicates(self):
+        self.spool(5)
+        # A record torn by a crash mid-append was never acknowledged.
+        with open(get_segment_path(list_segments()[-1]), 'ab') as segment:
+            segment.write(b'{"sensor":')
+
+        calls = []
+
+        def crash_on_second_batch(readings):
+            calls.append(len(readings))
+            if len(calls) == 2:
+                raise RuntimeError('crash')
+            return ingest_sensor_data(readings)
+
+        with mock.patch(
+            'sensor.data.spool.ingest_sensor_data', crash_on_second_batch
+        ):
+            with self.assertRaises(RuntimeError):
+                flush_spool(batch_size=2)
+        self.assertEqual(SensorData.objects.count(), 2)
+
+        self.assertEqual(flush_spool(batch_size=2), 3)
+        self.assertEqual(
+            sorted(
+                SensorData.objects.values_list('temperature', flat=True)
+            ),
+            [Decimal(index) for index in range(5)],
+        )
+
+    def test_append_retries_when_a_flush_removes_the_listed_segment(self):
+        self.spool(2)
+        [flushed] = list_segments()
+        real_list_segments = list_segments
+
+        def flush_after_listing():
+            segments = real_list_segments()
+            if flushed in segments:
+                # A concurrent flush seals and removes the listed segment
+                # before the append opens it.
+                flush_spool(batch_size=100)
+            return segments
+
+        with mock.patch(
+            'sensor.data.spool.list_segments', flush_after_listing
+        ):
+            self.spool(3)
+        self.assertEqual(list_segments(), [flushed + 1])
+        self.assertEqual(flush_spool(batch_size=100), 3)
+        self.assertEqual(SensorData.objects.count(), 5)
+
+    def test_append_after_a_torn_record_is_kept(self):
+        self.spool(2)
+        with open(get_segment_path(list_segments()[-1]), 'ab') as segment:
+            segment.write(b'{"sensor":')
+        self.spool(1)
+
+        self.assertEqual(flush_spool(batch_size=100), 3)
+        self.assertEqual(
+            sorted(
+                SensorData.objects.values_list('temperature', flat=True)
+            ),
+            [Decimal(0), Decimal(0), Decimal(1)],
+        )
+
+
+class SensorDataBenchmarkTests(APITestCase):
+    def test_every_scenario_succeeds(self):
+        sensors, start, end = create_fleet(2, 30)
+        self.assertEqual(SensorData.objects.count(), 60)
+        scenarios = build_scenarios(
+            get_authenticated_client(),
+            sensors,
+            start,
+            end,
+            bulk_size=5,
+            page_size=10,
+            page_depth=2,
+        )
+        for scenario in scenarios:
+            result = run_scenario(scenario, requests=3, warmup=1)
+            self.assertEqual(result['errors'], 0, scenario.name)
+            self.assertEqual(result['requests'], 3)
+
+
+class SensorDataSeedTests(APITestCase):
+    def seed(self):
+        end = int(datetime(2024, 6, 1, tzinfo=dt_timezone.utc).timestamp())
+        list(seed_sensor_data(3, 200, 60, end * 10**6, 150, 0.01, seed=1))
+        return list(
+            SensorData.objects.order_by('sensor_id', 'date').values_list(
+                *SENSOR_DATA_METRICS, 'date'
+            )
+        )
+
+    def test_copy_and_bulk_create_load_the_same_readings(self):
+        copied = self.seed()
+        self.assertEqual(len(copied), 600)
+        self.assertEqual(
+            copied[-1][-1], datetime(2024, 6, 1, tzinfo=dt_timezone.utc)
+        )
+        self.assertEqual(SensorAlert.objects.count(), 6)
+
+        SensorData.objects.all().delete()
+        with mock.patch(
+            'sensor.data.seed.can_copy_readings', return_value=False
+        ):
+            self.assertEqual(self.seed(), copied)
+
+    def test_command_refreshes_latest_readings_and_rollups(self):
+        call_command(
+            'seed_sensor_data', '--sensors=2', '--readings=120',
+            stdout=StringIO(),
+        )
+        self.assertEqual(SensorData.objects.count(), 240)
+        for sensor in Sensor.objects.all():
+            self.assertEqual(
+                sensor.latest_reading.reading_id,
+                SensorData.objects.filter(sensor=sensor).latest('date').id,
+            )
+        self.assertEqual(
+            sum(
+                SensorDataRollup.objects.filter(
+                    resolution=RollupResolution.DAY
+                ).values_list('count', flat=True)
+            ),
+            240,
+        )
@@ -1,14 +1,250 @@
-from rest_framework import viewsets
+from functools import partial
 
-from sensor.data.models import SensorData
-from sensor.data.serializers import SensorDataSerializer
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from sensor.authentication import SensorDevice, SensorDeviceKeyAuthentication
+from sensor.conditional import (
+    SENSOR_DATA_RESOURCE,
+    SENSOR_RESOURCE,
+    ConditionalGetMixin,
+    touch_resources,
+)
+from sensor.encoders import ValuesListMixin
+from sensor.parsers import MessagePackParser, ORJSONParser
+from sensor.permissions import IsUserOrIngestingDevice
+from sensor.renderers import MessagePackRenderer
+from sensor.data.archive import has_archive, iter_archived_rows
+from sensor.data.export import stream_sensor_data_export
+from sensor.data.filters import METRIC_RANGE_LOOKUPS, SensorDataFilterSet
+from sensor.data.latest import refresh_latest_readings
+from sensor.data.models import SENSOR_DATA_METRICS, SensorData
+from sensor.data.pagination import SensorDataCursorPagination
+from sensor.data.parsers import NDJSONParser
+from sensor.data.renderers import (
+    CSVRenderer,
+    MessagePackExportRenderer,
+    NDJSONRenderer,
+)
+from sensor.data.serializers import (
+    SensorDataBulkItemSerializer,
+    SensorDataBulkResultSerializer,
+    SensorDataSeriesQuerySerializer,
+    SensorDataSeriesSerializer,
+    SensorDataSerializer,
+    SensorDataSpoolResultSerializer,
+)
+from sensor.data.rollups import refresh_rollups_for_readings
+from sensor.data.series import get_sensor_data_series
+from sensor.data.services import bulk_ingest_sensor_data
+from sensor.data.signals import sensor_data_ingested
+from sensor.data.spool import append_to_spool, bulk_spool_sensor_data
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.permissions import IsAuthenticated
 
-class SensorDataViewSet(viewsets.ModelViewSet):
+class SensorDataViewSet(
+    ConditionalGetMixin, ValuesListMixin, viewsets.ModelViewSet
+):
     serializer_class = SensorDataSerializer
     model = SensorData
-    queryset = SensorData.objects.all().order_by("-date")
+    queryset = SensorData.objects.all().order_by("-date", "-id")
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = ["sensor"]
-    permission_classes = [IsAuthenticated]
+    filterset_class = SensorDataFilterSet
+    pagination_class = SensorDataCursorPagination
+    conditional_resources = (SENSOR_DATA_RESOURCE,)
+    # Stations post with a device key bound to their sensor.
+    authentication_classes = [
+        *api_settings.DEFAULT_AUTHENTICATION_CLASSES,
+        SensorDeviceKeyAuthentication,
+    ]
+    permission_classes = [IsAuthenticated, IsUserOrIngestingDevice]
+    renderer_classes = [
+        *api_settings.DEFAULT_RENDERER_CLASSES,
+        MessagePackRenderer,
+    ]
+    parser_classes = [*api_settings.DEFAULT_PARSER_CLASSES, MessagePackParser]
+
+    def get_archive_filters(self):
+        filterset = DjangoFilterBackend().get_filterset(
+            self.request, self.get_queryset(), self
+        )
+        filterset.is_valid()
+        cleaned_data = filterset.form.cleaned_data
+        sensors = cleaned_data.get("sensor__in") or []
+        if cleaned_data.get("sensor"):
+            sensors.append(cleaned_data["sensor"])
+        date_filters = {
+            lookup: cleaned_data[f"date__{lookup}"]
+            for lookup in ("gte", "gt", "lte", "lt")
+            if cleaned_data.get(f"date__{lookup}")
+        }
+        metric_filters = {
+            f"{metric}__{lookup}": cleaned_data[f"{metric}__{lookup}"]
+            for metric in SENSOR_DATA_METRICS
+            for lookup in METRIC_RANGE_LOOKUPS
+            if cleaned_data.get(f"{metric}__{lookup}") is not None
+        }
+        sensor_ids = [sensor.id for sensor in sensors] or None
+        return sensor_ids, date_filters, metric_filters
+
+    def bind_to_device(self, data):
+        """
+        Set the sensor of the rows posted with a device key to the sensor
+        of the key, refusing rows for any other sensor.
+        """
+        device = self.request.user
+        if not isinstance(device, SensorDevice):
+            return data
+        if isinstance(data, list):
+            return [self.bind_to_device(row) for row in data]
+        if not isinstance(data, dict):
+            return data
+        if hasattr(data, "dict"):
+            data = data.dict()
+        sensor = data.get("sensor")
+        if sensor is not None and str(sensor) != str(device.sensor_id):
+            raise PermissionDenied(
+                "Device keys can only post readings of their own sensor."
+            )
+        return {**data, "sensor": device.sensor_id}
+
+    def get_serializer(self, *args, **kwargs):
+        if "data" in kwargs:
+            kwargs["data"] = self.bind_to_device(kwargs["data"])
+        return super().get_serializer(*args, **kwargs)
+
+    def create(self, request, *args, **kwargs):
+        if settings.SENSOR_DATA_INGEST_MODE != "spool":
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        reading = SensorData(**serializer.validated_data)
+        append_to_spool([reading])
+        return Response(
+            self.get_serializer(reading).data, status=status.HTTP_202_ACCEPTED
+        )
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            reading = serializer.save()
+            sensor_data_ingested.send(sender=SensorData, readings=[reading])
+
+    def perform_update(self, serializer):
+        previous = (serializer.instance.sensor_id, serializer.instance.date)
+        with transaction.atomic():
+            reading = serializer.save()
+            refresh_rollups_for_readings(
+                [previous, (reading.sensor_id, reading.date)]
+            )
+            refresh_latest_readings([previous[0], reading.sensor_id])
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            refresh_rollups_for_readings([(instance.sensor_id, instance.date)])
+            refresh_latest_readings([instance.sensor_id])
+            touch_resources(SENSOR_DATA_RESOURCE, SENSOR_RESOURCE)
+
+    @swagger_auto_schema(
+        request_body=SensorDataBulkItemSerializer(many=True),
+        responses={
+            status.HTTP_201_CREATED: SensorDataBulkResultSerializer,
+            status.HTTP_202_ACCEPTED: SensorDataSpoolResultSerializer,
+            status.HTTP_400_BAD_REQUEST: SensorDataBulkResultSerializer,
+        },
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        parser_classes=[ORJSONParser, NDJSONParser, MessagePackParser],
+    )
+    def bulk(self, request):
+        if settings.SENSOR_DATA_INGEST_MODE == "spool":
+            result = bulk_spool_sensor_data(self.bind_to_device(request.data))
+            return Response(
+                SensorDataSpoolResultSerializer(result).data,
+                status=(
+                    status.HTTP_202_ACCEPTED
+                    if result["accepted"]
+                    else status.HTTP_400_BAD_REQUEST
+                ),
+            )
+
+        result = bulk_ingest_sensor_data(self.bind_to_device(request.data))
+        response_status = (
+            status.HTTP_201_CREATED
+            if result["created"]
+            else status.HTTP_400_BAD_REQUEST
+        )
+        return Response(
+            SensorDataBulkResultSerializer(result).data,
+            status=response_status,
+        )
+
+    @swagger_auto_schema(
+        query_serializer=SensorDataSeriesQuerySerializer,
+        responses={200: SensorDataSeriesSerializer(many=True)},
+    )
+    @action(
+        detail=False,
+        methods=["get"],
+        filter_backends=[],
+        pagination_class=None,
+    )
+    def series(self, request):
+        query_serializer = SensorDataSeriesQuerySerializer(
+            data=request.query_params
+        )
+        query_serializer.is_valid(raise_exception=True)
+        return self.get_conditional_response(
+            request,
+            partial(self._series_response, query_serializer.validated_data),
+        )
+
+    def _series_response(self, query):
+        return Response(
+            get_sensor_data_series(
+                query["sensor"], query.get("from"), query.get("to")
+            )
+        )
+
+    @action(
+        detail=False,
+        methods=["get"],
+        renderer_classes=[
+            CSVRenderer,
+            NDJSONRenderer,
+            MessagePackExportRenderer,
+        ],
+    )
+    def export(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        archived_rows = ()
+        if has_archive():
+            archived_rows = iter_archived_rows(*self.get_archive_filters())
+
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            stream_sensor_data_export(
+                queryset,
+                renderer.format,
+                settings.SENSOR_DATA_EXPORT_CHUNK_SIZE,
+                archived_rows,
+            ),
+            content_type=(
+                f"{renderer.media_type}; charset={renderer.charset}"
+                if renderer.charset
+                else renderer.media_type
+            ),
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="sensor-data.{renderer.format}"'
+        )
+        return response
@@ -0,0 +1,157 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from django.utils.crypto import (
+    constant_time_compare,
+    get_random_string,
+    salted_hmac,
+)
+
+from sensor.models import Sensor, SensorDeviceKey
+
+logger = logging.getLogger(__name__)
+
+DEVICE_KEY_SALT = "sensor.devices.device-key"
+DEVICE_KEY_ID_LENGTH = 16
+
+
+def sign_key_id(key_id: str) -> str:
+    return salted_hmac(
+        DEVICE_KEY_SALT,
+        key_id,
+        secret=settings.SENSOR_DEVICE_KEY_SECRET,
+        algorithm="sha256",
+    ).hexdigest()
+
+
+def create_device_key(sensor: Sensor) -> tuple[SensorDeviceKey, str]:
+    """
+    Create a device key for ``sensor`` and return it with the raw key,
+    which is not stored and cannot be shown again.
+    """
+    key_id = get_random_string(DEVICE_KEY_ID_LENGTH)
+    device_key = SensorDeviceKey.objects.create(sensor=sensor, key_id=key_id)
+    return device_key, f"{key_id}.{sign_key_id(key_id)}"
+
+
+def revoke_device_key(device_key: SensorDeviceKey) -> None:
+    device_key.revoked_at = timezone.now()
+    device_key.save(update_fields=["revoked_at"])
+
+
+def get_signed_key_id(raw_key: str) -> str | None:
+    """
+    Return the key id of ``raw_key`` if its signature is valid, without
+    touching the database.
+    """
+    key_id, _, signature = raw_key.partition(".")
+    if len(key_id) != DEVICE_KEY_ID_LENGTH or not constant_time_compare(
+        signature, sign_key_id(key_id)
+    ):
+        return None
+    return key_id
+
+
+class DeviceKeyCache:
+    """
+    Maps the key ids of this process to their sensor, or to ``None`` for
+    revoked and unknown keys. A background thread reloads every key each
+    ``SENSOR_DEVICE_KEY_REFRESH_SECONDS``, so revocations made by other
+    processes apply within that delay; keys missing from the map are
+    looked up once.
+    """
+
+    def __init__(self):
+        self._sensor_ids: dict[str, int | None] = {}
+        # Keys set while a refresh reads its snapshot, which may predate them.
+        self._set_during_refresh: dict[str, int | None] | None = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refresher: threading.Thread | None = None
+
+    def get_sensor_id(self, key_id: str) -> int | None:
+        self._start_refresher()
+        try:
+            return self._sensor_ids[key_id]
+        except KeyError:
+            pass
+        sensor_id = (
+            SensorDeviceKey.objects.filter(
+                key_id=key_id, revoked_at__isnull=True
+            )
+            .values_list("sensor_id", flat=True)
+            .first()
+        )
+        self.set(key_id, sensor_id)
+        return sensor_id
+
+    def set(self, key_id: str, sensor_id: int | None) -> None:
+        with self._lock:
+            self._sensor_ids[key_id] = sensor_id
+            if self._set_during_refresh is not None:
+                self._set_during_refresh[key_id] = sensor_id
+
+    def refresh(self) -> None:
+        with self._refresh_lock:
+            with self._lock:
+                self._set_during_refresh = {}
+            sensor_ids = None
+            try:
+                sensor_ids = {
+                    key_id: None if revoked_at else sensor_id
+                    for key_id, sensor_id, revoked_at in (
+                        SensorDeviceKey.objects.values_list(
+                            "key_id", "sensor_id", "revoked_at"
+                        ).iterator()
+                    )
+                }
+            finally:
+                with self._lock:
+                    if sensor_ids is not None:
+                        # A revocation committed after the snapshot was
+                        # read must not be undone by it.
+                        self._sensor_ids = (
+                            sensor_ids | self._set_during_refresh
+                        )
+                    self._set_during_refresh = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sensor_ids = {}
+
+    def _start_refresher(self) -> None:
+        # Started on first use rather than at import, so forked workers
+        # each get their own thread.
+        if self._refresher is not None:
+            return
+        interval = settings.SENSOR_DEVICE_KEY_REFRESH_SECONDS
+        if not interval:
+            return
+        with self._lock:
+            if self._refresher is None:
+                self._refresher = threading.Thread(
+                    target=self._refresh_forever,
+                    args=(interval,),
+                    name="device-key-refresh",
+                    daemon=True,
+                )
+                self._refresher.start()
+
+    def _refresh_forever(self, interval: float) -> None:
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                logger.warning(
+                    "Device keys could not be refreshed.", exc_info=True
+                )
+            finally:
+                close_old_connections()
+            time.sleep(interval)
+
+
+device_key_cache = DeviceKeyCache()
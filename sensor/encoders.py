@@ -0,0 +1,153 @@
+from decimal import Decimal
+from functools import cache
+from typing import Any, Iterable
+
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import ISO_8601, api_settings
+
+from sensor.metrics import time_serializer
+
+# Fields whose representation of a database value is the value itself.
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+def _is_identity(field: serializers.Field) -> bool:
+    if isinstance(field, serializers.ChoiceField):
+        return all(isinstance(choice, str) for choice in field.choices)
+    return isinstance(field, IDENTITY_FIELDS)
+
+
+def _compile_decimal(field: serializers.DecimalField):
+    coerce_to_string = getattr(
+        field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING
+    )
+    if (
+        not coerce_to_string
+        or field.localize
+        or field.normalize_output
+        or field.decimal_places is None
+    ):
+        return None
+    exponent = Decimal(1).scaleb(-field.decimal_places)
+
+    def encode(value):
+        return f"{value.quantize(exponent, rounding=field.rounding):f}"
+
+    return encode
+
+
+def _compile_datetime(field: serializers.DateTimeField):
+    if getattr(field, "format", api_settings.DATETIME_FORMAT) != ISO_8601:
+        return None
+    field_timezone = getattr(field, "timezone", None)
+
+    def encode(value):
+        value = timezone.localtime(
+            value, field_timezone or timezone.get_current_timezone()
+        ).isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+
+    return encode
+
+
+class RowEncoder:
+    """
+    Turns ``values()`` rows into the same primitives ``serializer_class``
+    produces for model instances, through one function generated for the
+    serializer's fields.
+
+    Nested serializers are filled from the ``related`` mappings passed to
+    ``encode``, keyed by the row's ``id``.
+    """
+
+    def __init__(self, serializer_class: type[serializers.Serializer]):
+        self.lookups: list[str] = []
+        self.nested: list[str] = []
+        namespace: dict[str, Any] = {}
+        items = []
+        for name, field in serializer_class().fields.items():
+            if isinstance(field, serializers.BaseSerializer):
+                self.nested.append(name)
+                items.append(f"{name!r}: related[{name!r}].get(row['id'])")
+                continue
+            if "." in field.source or field.source == "*":
+                raise ValueError(f"Cannot encode {name} from values() rows.")
+
+            self.lookups.append(field.source)
+            value = f"row[{field.source!r}]"
+            if _is_identity(field):
+                items.append(f"{name!r}: {value}")
+                continue
+            if isinstance(field, serializers.DecimalField):
+                encode = _compile_decimal(field)
+            elif isinstance(field, serializers.DateTimeField):
+                encode = _compile_datetime(field)
+            else:
+                encode = None
+            namespace[f"encode_{name}"] = encode or field.to_representation
+            items.append(
+                f"{name!r}: None if {value} is None "
+                f"else encode_{name}({value})"
+            )
+        if self.nested and "id" not in self.lookups:
+            self.lookups.append("id")
+
+        source = (
+            "def encode_rows(rows, related):\n"
+            f"    return [{{{', '.join(items)}}} for row in rows]\n"
+        )
+        exec(
+            compile(source, f"<{serializer_class.__name__} encoder>", "exec"),
+            namespace,
+        )
+        self._encode_rows = namespace["encode_rows"]
+
+    def encode(
+        self,
+        rows: Iterable[dict[str, Any]],
+        related: dict[str, dict[Any, Any]] | None = None,
+    ) -> list[dict[str, Any]]:
+        return self._encode_rows(rows, related or {})
+
+
+@cache
+def get_row_encoder(
+    serializer_class: type[serializers.Serializer],
+) -> RowEncoder:
+    return RowEncoder(serializer_class)
+
+
+class ValuesListMixin:
+    """
+    Lists ``values()`` rows through a ``RowEncoder`` instead of building
+    a model instance and running the serializer for every row. The JSON
+    stays the same as the serializer's.
+    """
+
+    def list(self, request, *args, **kwargs):
+        encoder = get_row_encoder(self.get_serializer_class())
+        queryset = (
+            self.filter_queryset(self.get_queryset())
+            .prefetch_related(None)
+            .values(*encoder.lookups)
+        )
+        page = self.paginate_queryset(queryset)
+        rows = list(queryset) if page is None else page
+        related = self.get_related_rows(rows)
+        with time_serializer(request):
+            data = encoder.encode(rows, related)
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+    def get_related_rows(self, rows):
+        return {}
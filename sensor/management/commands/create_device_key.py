@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sensor.devices import create_device_key
+from sensor.models import Sensor
+
+
+class Command(BaseCommand):
+    help = (
+        "Create a device key a station can post the readings of its sensor "
+        "with, as 'Authorization: Device <key>'. The key is only shown once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("sensor", type=int, help="Sensor id.")
+
+    def handle(self, *args, **options):
+        try:
+            sensor = Sensor.objects.get(pk=options["sensor"])
+        except Sensor.DoesNotExist:
+            raise CommandError(f"Sensor {options['sensor']} does not exist.")
+        device_key, raw_key = create_device_key(sensor)
+        self.stdout.write(f"Key id: {device_key.key_id}")
+        self.stdout.write(raw_key)
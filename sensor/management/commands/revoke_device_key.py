@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sensor.devices import revoke_device_key
+from sensor.models import SensorDeviceKey
+
+
+class Command(BaseCommand):
+    help = "Revoke a device key by its key id."
+
+    def add_arguments(self, parser):
+        parser.add_argument("key_id")
+
+    def handle(self, *args, **options):
+        try:
+            device_key = SensorDeviceKey.objects.get(
+                key_id=options["key_id"], revoked_at__isnull=True
+            )
+        except SensorDeviceKey.DoesNotExist:
+            raise CommandError(f"No active key {options['key_id']}.")
+        revoke_device_key(device_key)
+        self.stdout.write(
+            self.style.SUCCESS(f"Revoked key {device_key.key_id}.")
+        )
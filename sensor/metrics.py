@@ -0,0 +1,371 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from sensor.cache import get_cache_stats
+
+slow_request_logger = logging.getLogger("sensor.metrics.slow_requests")
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+@dataclass
+class RouteMetrics:
+    responses: Counter = field(default_factory=Counter)
+    duration_buckets: list[int] = field(
+        default_factory=lambda: [0] * len(DURATION_BUCKETS)
+    )
+    duration_seconds: float = 0.0
+    sql_queries: int = 0
+    sql_seconds: float = 0.0
+    view_seconds: float = 0.0
+    serializer_seconds: float = 0.0
+    render_seconds: float = 0.0
+    response_bytes: int = 0
+
+
+# Metrics are kept per process, like the cache stats; every worker
+# exposes its own and Prometheus sums them up.
+_routes: dict[tuple[str, str], RouteMetrics] = {}
+_routes_lock = threading.Lock()
+
+
+def reset_request_metrics() -> None:
+    with _routes_lock:
+        _routes.clear()
+
+
+class RequestTiming:
+    """
+    Timings of a single request. SQL is timed through a database execute
+    wrapper; the text of the queries is only kept for the slow log.
+    """
+
+    def __init__(self, capture_sql: bool):
+        self.started = time.perf_counter()
+        self.captured_sql: list[tuple[str, float]] | None = (
+            [] if capture_sql else None
+        )
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+        self.view_started: float | None = None
+        self.view_sql_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self._serializing = False
+        self.render_started: float | None = None
+        self.render_seconds = 0.0
+        self._wrapped: list | None = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.sql_queries += 1
+            self.sql_seconds += elapsed
+            if self.captured_sql is not None:
+                self.captured_sql.append((sql, elapsed))
+
+    def start_view(self) -> None:
+        self.view_started = time.perf_counter()
+        self.view_sql_seconds = self.sql_seconds
+
+    def wrap_connection(self) -> None:
+        # Under ASGI the view runs in a worker thread of the request, with
+        # a connection of its own; its queries are timed from there on.
+        if self not in connection.execute_wrappers:
+            self._wrapped = connection.execute_wrappers
+            self._wrapped.append(self)
+
+    def unwrap_connection(self) -> None:
+        if self._wrapped is not None:
+            self._wrapped.remove(self)
+            self._wrapped = None
+
+    def start_render(self) -> None:
+        self.render_started = time.perf_counter()
+
+    def finish_render(self, response) -> None:
+        self.render_seconds = time.perf_counter() - self.render_started
+
+    @contextmanager
+    def time_serializer(self):
+        # Nested serializers are part of the outermost one's time.
+        if self._serializing:
+            yield
+            return
+        self._serializing = True
+        started = time.perf_counter()
+        sql_seconds = self.sql_seconds
+        try:
+            yield
+        finally:
+            self._serializing = False
+            elapsed = time.perf_counter() - started
+            self.serializer_seconds += max(
+                elapsed - (self.sql_seconds - sql_seconds), 0.0
+            )
+
+    def get_view_seconds(self, finished: float) -> float:
+        # Python time spent in the view, serializers excluded.
+        if self.view_started is None:
+            return 0.0
+        view_finished = self.render_started or finished
+        sql_seconds = self.sql_seconds - self.view_sql_seconds
+        return max(
+            view_finished
+            - self.view_started
+            - sql_seconds
+            - self.serializer_seconds,
+            0.0,
+        )
+
+
+def time_serializer(request):
+    """
+    Count the enclosed block towards the serializer time of ``request``,
+    SQL excluded.
+    """
+    timing = getattr(request, "request_timing", None)
+    if timing is None:
+        return nullcontext()
+    return timing.time_serializer()
+
+
+class SerializerTimingMixin:
+    """
+    Counts ``to_representation`` towards the serializer time of the
+    request in the serializer context.
+    """
+
+    def to_representation(self, instance):
+        with time_serializer(self.context.get("request")):
+            return super().to_representation(instance)
+
+
+def get_route(request) -> str:
+    resolver_match = getattr(request, "resolver_match", None)
+    if resolver_match is None:
+        return "unmatched"
+    return resolver_match.view_name or resolver_match.route
+
+
+def record_request(request, response, timing: RequestTiming) -> None:
+    finished = time.perf_counter()
+    duration = finished - timing.started
+    response_bytes = 0 if response.streaming else len(response.content)
+    key = (get_route(request), request.method)
+    with _routes_lock:
+        metrics = _routes.get(key)
+        if metrics is None:
+            metrics = _routes[key] = RouteMetrics()
+        metrics.responses[response.status_code] += 1
+        bucket = bisect_left(DURATION_BUCKETS, duration)
+        if bucket < len(DURATION_BUCKETS):
+            metrics.duration_buckets[bucket] += 1
+        metrics.duration_seconds += duration
+        metrics.sql_queries += timing.sql_queries
+        metrics.sql_seconds += timing.sql_seconds
+        metrics.view_seconds += timing.get_view_seconds(finished)
+        metrics.serializer_seconds += timing.serializer_seconds
+        metrics.render_seconds += timing.render_seconds
+        metrics.response_bytes += response_bytes
+
+    threshold = settings.REQUEST_SLOW_LOG_MS
+    if threshold is not None and duration * 1000 >= threshold:
+        slow_request_logger.warning(
+            "Slow request %s %s: %.1f ms, %d queries in %.1f ms\n%s",
+            request.method,
+            request.get_full_path(),
+            duration * 1000,
+            timing.sql_queries,
+            timing.sql_seconds * 1000,
+            "\n".join(
+                f"  {elapsed * 1000:.1f} ms: {sql}"
+                for sql, elapsed in timing.captured_sql or ()
+            ),
+        )
+
+
+class RequestMetricsMiddleware:
+    """
+    Records latency, SQL, view, serializer and render time and response
+    size per route and method. Goes first in ``MIDDLEWARE`` so the time
+    spent in the other middleware is counted too.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timing = request.request_timing = RequestTiming(
+            settings.REQUEST_SLOW_LOG_MS is not None
+        )
+        with connection.execute_wrapper(timing):
+            response = self.get_response(request)
+        record_request(request, response, timing)
+        return response
+
+    async def __acall__(self, request):
+        timing = request.request_timing = RequestTiming(
+            settings.REQUEST_SLOW_LOG_MS is not None
+        )
+        try:
+            response = await self.get_response(request)
+        finally:
+            timing.unwrap_connection()
+        record_request(request, response, timing)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Django runs this in the thread that runs the view, sync views
+        # and the ORM calls of async ones included.
+        timing = request.request_timing
+        timing.wrap_connection()
+        timing.start_view()
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns.
+        timing = request.request_timing
+        timing.start_render()
+        response.add_post_render_callback(timing.finish_render)
+        return response
+
+
+def _escape_label(value: object) -> str:
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def _format_labels(labels: dict[str, object]) -> str:
+    return ",".join(
+        f'{name}="{_escape_label(value)}"' for name, value in labels.items()
+    )
+
+
+def render_prometheus_metrics() -> str:
+    """
+    Render the request metrics of this process and the cache read
+    counters in the Prometheus text exposition format.
+    """
+    with _routes_lock:
+        routes = {
+            key: RouteMetrics(
+                responses=Counter(metrics.responses),
+                duration_buckets=list(metrics.duration_buckets),
+                duration_seconds=metrics.duration_seconds,
+                sql_queries=metrics.sql_queries,
+                sql_seconds=metrics.sql_seconds,
+                view_seconds=metrics.view_seconds,
+                serializer_seconds=metrics.serializer_seconds,
+                render_seconds=metrics.render_seconds,
+                response_bytes=metrics.response_bytes,
+            )
+            for key, metrics in sorted(_routes.items())
+        }
+
+    lines = [
+        "# HELP http_requests_total Responses by route, method and status.",
+        "# TYPE http_requests_total counter",
+    ]
+    for (route, method), metrics in routes.items():
+        for status, count in sorted(metrics.responses.items()):
+            labels = _format_labels(
+                {"route": route, "method": method, "status": status}
+            )
+            lines.append(f"http_requests_total{{{labels}}} {count}")
+
+    lines += [
+        "# HELP http_request_duration_seconds Request latency.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (route, method), metrics in routes.items():
+        labels = {"route": route, "method": method}
+        count = sum(metrics.responses.values())
+        cumulative = 0
+        for bound, bucket_count in zip(
+            DURATION_BUCKETS, metrics.duration_buckets
+        ):
+            cumulative += bucket_count
+            bucket_labels = _format_labels({**labels, "le": bound})
+            lines.append(
+                f"http_request_duration_seconds_bucket{{{bucket_labels}}} "
+                f"{cumulative}"
+            )
+        bucket_labels = _format_labels({**labels, "le": "+Inf"})
+        lines += [
+            f"http_request_duration_seconds_bucket{{{bucket_labels}}} "
+            f"{count}",
+            f"http_request_duration_seconds_sum{{{_format_labels(labels)}}} "
+            f"{metrics.duration_seconds}",
+            f"http_request_duration_seconds_count{{{_format_labels(labels)}}} "
+            f"{count}",
+        ]
+
+    for name, attribute, help_text in (
+        ("http_request_sql_queries_total", "sql_queries", "SQL queries run."),
+        (
+            "http_request_sql_seconds_total",
+            "sql_seconds",
+            "Time spent running SQL queries.",
+        ),
+        (
+            "http_request_view_seconds_total",
+            "view_seconds",
+            "Time spent in views, SQL and serializers excluded.",
+        ),
+        (
+            "http_request_serializer_seconds_total",
+            "serializer_seconds",
+            "Time spent serializing response data, SQL excluded.",
+        ),
+        (
+            "http_request_render_seconds_total",
+            "render_seconds",
+            "Time spent rendering responses.",
+        ),
+        (
+            "http_response_size_bytes_total",
+            "response_bytes",
+            "Bytes of non-streaming response bodies.",
+        ),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for (route, method), metrics in routes.items():
+            labels = _format_labels({"route": route, "method": method})
+            lines.append(f"{name}{{{labels}}} {getattr(metrics, attribute)}")
+
+    lines += [
+        "# HELP cache_reads_total Cacheops reads by model and result.",
+        "# TYPE cache_reads_total counter",
+    ]
+    for label, counts in get_cache_stats().items():
+        for result, count in (("hit", counts["hits"]), ("miss", counts["misses"])):
+            labels = _format_labels({"model": label, "result": result})
+            lines.append(f"cache_reads_total{{{labels}}} {count}")
+    return "\n".join(lines) + "\n"
@@ -23,3 +23,18 @@ class Sensor(models.Model):
     )
     model = models.CharField(max_length=255)
     installation_date = models.DateTimeField()
+
+
+class SensorDeviceKey(models.Model):
+    """
+    A credential a station posts its readings with. Only the key id is
+    stored; the key itself is the id signed with
+    ``SENSOR_DEVICE_KEY_SECRET``.
+    """
+
+    sensor = models.ForeignKey(
+        Sensor, on_delete=models.CASCADE, related_name="device_keys"
+    )
+    key_id = models.CharField(max_length=32, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
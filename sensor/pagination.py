@@ -0,0 +1,141 @@
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.settings import api_settings
+
+
+class TimeSeriesCursorPagination(CursorPagination):
+    """
+    Keyset pagination over ``(date, id)``.
+
+    Unlike the stock cursor pagination, the cursor position holds every
+    ordering field, so it is unique and the next page is always fetched
+    with a plain range condition instead of an ``OFFSET``.
+    """
+
+    ordering = ("-date", "-id")
+    page_size = int(api_settings.PAGE_SIZE)
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    position_separator = "|"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            reverse, current_position = False, None
+        else:
+            reverse, current_position = self.cursor.reverse, self.cursor.position
+
+        results = self.get_results(
+            queryset, current_position, reverse, self.page_size + 1, view
+        )
+        self.page = results[:self.page_size]
+        has_following_position = len(results) > len(self.page)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None
+            self.has_previous = has_following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None
+
+        if self.page:
+            self.next_position = self._get_position_from_instance(
+                self.page[-1], self.ordering
+            )
+            self.previous_position = self._get_position_from_instance(
+                self.page[0], self.ordering
+            )
+        else:
+            self.next_position = self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_results(self, queryset, position, reverse, limit, view=None):
+        if reverse:
+            queryset = queryset.order_by(*self._reversed_ordering())
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if position is not None:
+            queryset = queryset.filter(
+                self.get_position_filter(
+                    self.parse_position(queryset.model, position), reverse
+                )
+            )
+        return list(queryset[:limit])
+
+    def parse_position(self, model, position):
+        values = position.split(self.position_separator)
+        if len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        parsed = []
+        for order, value in zip(self.ordering, values):
+            field = model._meta.get_field(order.lstrip("-"))
+            try:
+                parsed.append(field.to_python(value))
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+        return parsed
+
+    def get_position_filter(self, position_values, reverse):
+        conditions = []
+        for order, value in zip(self.ordering, position_values):
+            lookup = "gt" if order.startswith("-") == reverse else "lt"
+            conditions.append((order.lstrip("-"), lookup, value))
+
+        position_filter = Q()
+        for index, (field_name, lookup, value) in enumerate(conditions):
+            condition = Q(**{f"{field_name}__{lookup}": value})
+            for previous_name, _, previous_value in conditions[:index]:
+                condition &= Q(**{previous_name: previous_value})
+            position_filter |= condition
+        # The OR alone cannot start an index scan at the position, so the
+        # leading field is also bounded on its own.
+        field_name, lookup, value = conditions[0]
+        return Q(**{f"{field_name}__{lookup}e": value}) & position_filter
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        cursor = Cursor(offset=0, reverse=False, position=self.next_position)
+        return self.encode_cursor(cursor)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        cursor = Cursor(
+            offset=0, reverse=True, position=self.previous_position
+        )
+        return self.encode_cursor(cursor)
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            field_name = order.lstrip("-")
+            if isinstance(instance, dict):
+                value = instance[field_name]
+            else:
+                value = getattr(instance, field_name)
+            values.append(
+                value.isoformat() if hasattr(value, "isoformat") else str(value)
+            )
+        return self.position_separator.join(values)
+
+    def _reversed_ordering(self):
+        return tuple(
+            order[1:] if order.startswith("-") else f"-{order}"
+            for order in self.ordering
+        )
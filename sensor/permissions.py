@@ -0,0 +1,14 @@
+from rest_framework.permissions import BasePermission
+
+from sensor.authentication import SensorDevice
+
+
+class IsUserOrIngestingDevice(BasePermission):
+    """Sensor devices may only post readings; users may do anything."""
+
+    device_actions = ("create", "bulk")
+
+    def has_permission(self, request, view):
+        if isinstance(request.user, SensorDevice):
+            return view.action in self.device_actions
+        return True
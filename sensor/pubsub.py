@@ -0,0 +1,271 @@
+import asyncio
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from functools import cache
+from typing import AsyncIterator, Iterable
+
+import redis
+import redis.asyncio
+from django.conf import settings
+from django.db import transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+from sensor.alert.models import SensorAlert
+from sensor.alert.serializers import SensorAlertSerializer
+from sensor.data.models import SensorData
+from sensor.data.serializers import SensorDataSerializer
+
+logger = logging.getLogger(__name__)
+
+READINGS_CHANNEL = "readings:{}"
+ALERTS_CHANNEL = "alerts"
+SENSOR_ALERTS_CHANNEL = "alerts:{}"
+
+
+@dataclass(frozen=True)
+class Message:
+    event: str
+    data: str
+
+
+class Subscription:
+    def __init__(self, channels: Iterable[str], queue_size: int):
+        self.channels = frozenset(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue[Message] = asyncio.Queue(queue_size)
+        self.overflowed = False
+
+    def put(self, message: Message) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # A client this far behind is disconnected so it reconnects and
+            # reloads, rather than silently missing messages.
+            self.overflowed = True
+
+    async def get(self) -> Message:
+        return await self.queue.get()
+
+
+class InProcessBroker:
+    """
+    Fans messages out to the subscriptions of this process.
+
+    ``publish`` may be called from any thread; messages are handed to
+    each subscriber's event loop.
+    """
+
+    def __init__(self, queue_size: int = 1000):
+        self.queue_size = queue_size
+        self._subscriptions: dict[str, set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channels: Iterable[str]) -> Subscription:
+        subscription = Subscription(channels, self.queue_size)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions.setdefault(channel, set()).add(
+                    subscription
+                )
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscriptions.get(channel, set())
+                subscribers.discard(subscription)
+                if not subscribers:
+                    self._subscriptions.pop(channel, None)
+
+    def has_subscribers(self, channel: str) -> bool:
+        return channel in self._subscriptions
+
+    def publish(self, channel: str, message: Message) -> None:
+        self.deliver(channel, message)
+
+    def publish_many(self, messages: Iterable[tuple[str, Message]]) -> None:
+        for channel, message in messages:
+            self.publish(channel, message)
+
+    def deliver(self, channel: str, message: Message) -> None:
+        with self._lock:
+            subscribers = list(self._subscriptions.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.put, message
+                )
+            except RuntimeError:
+                # The subscriber's event loop has already shut down.
+                self.unsubscribe(subscription)
+
+
+class RedisBroker(InProcessBroker):
+    """
+    Publishes through Redis so subscribers connected to any worker receive
+    the message. Each process keeps one pattern subscription and fans the
+    messages out to its own subscribers.
+    """
+
+    prefix = "sensor-stream:"
+
+    def __init__(self, url: str, queue_size: int = 1000):
+        super().__init__(queue_size)
+        self.url = url
+        self._client = redis.Redis.from_url(url)
+        self._listeners: dict[asyncio.AbstractEventLoop, asyncio.Task] = {}
+
+    def subscribe(self, channels: Iterable[str]) -> Subscription:
+        subscription = super().subscribe(channels)
+        listener = self._listeners.get(subscription.loop)
+        if listener is None or listener.done():
+            self._listeners[subscription.loop] = asyncio.create_task(
+                self._listen()
+            )
+        return subscription
+
+    def has_subscribers(self, channel: str) -> bool:
+        # Subscribers of other workers are not known here.
+        return True
+
+    def publish(self, channel: str, message: Message) -> None:
+        self.publish_many([(channel, message)])
+
+    def publish_many(self, messages: Iterable[tuple[str, Message]]) -> None:
+        # A bulk post publishes every reading in a single round trip.
+        pipeline = self._client.pipeline(transaction=False)
+        for channel, message in messages:
+            pipeline.publish(
+                f"{self.prefix}{channel}", f"{message.event}\n{message.data}"
+            )
+        try:
+            pipeline.execute()
+        except redis.RedisError:
+            logger.warning("Could not publish messages.", exc_info=True)
+
+    async def _listen(self) -> None:
+        while True:
+            client = redis.asyncio.Redis.from_url(self.url)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.psubscribe(f"{self.prefix}*")
+                    async for item in pubsub.listen():
+                        if item["type"] != "pmessage":
+                            continue
+                        channel = item["channel"].decode()
+                        event, data = item["data"].decode().split("\n", 1)
+                        self.deliver(
+                            channel.removeprefix(self.prefix),
+                            Message(event, data),
+                        )
+            except redis.RedisError:
+                logger.warning("Stream listener lost Redis.", exc_info=True)
+                await asyncio.sleep(1)
+            finally:
+                await client.aclose()
+
+
+@cache
+def get_broker() -> InProcessBroker:
+    if settings.SENSOR_STREAM_BROKER == "redis":
+        return RedisBroker(
+            settings.REDIS_CONNECTION_URL, settings.SENSOR_STREAM_QUEUE_SIZE
+        )
+    return InProcessBroker(settings.SENSOR_STREAM_QUEUE_SIZE)
+
+
+def get_stream_channels(
+    sensor_ids: Iterable[int], events: Iterable[str]
+) -> list[str]:
+    sensor_ids = sorted(set(sensor_ids))
+    channels = []
+    if "readings" in events:
+        channels += [
+            READINGS_CHANNEL.format(sensor_id) for sensor_id in sensor_ids
+        ]
+    if "alerts" in events:
+        channels += [
+            SENSOR_ALERTS_CHANNEL.format(sensor_id) for sensor_id in sensor_ids
+        ] or [ALERTS_CHANNEL]
+    return channels
+
+
+async def iter_server_sent_events(
+    channels: Iterable[str], keepalive: float
+) -> AsyncIterator[str]:
+    broker = get_broker()
+    subscription = broker.subscribe(channels)
+    try:
+        yield f"retry: {int(keepalive * 1000)}\n\n"
+        while not subscription.overflowed:
+            try:
+                message = await asyncio.wait_for(
+                    subscription.get(), timeout=keepalive
+                )
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle connection.
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {message.event}\ndata: {message.data}\n\n"
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def _encode(data) -> str:
+    return json.dumps(data, cls=JSONEncoder)
+
+
+def publish_readings(readings: Iterable[SensorData]) -> None:
+    readings = list(readings)
+
+    def publish():
+        broker = get_broker()
+        published = [
+            reading
+            for reading in readings
+            if broker.has_subscribers(
+                READINGS_CHANNEL.format(reading.sensor_id)
+            )
+        ]
+        if not published:
+            return
+        broker.publish_many(
+            (
+                READINGS_CHANNEL.format(reading.sensor_id),
+                Message("reading", _encode(data)),
+            )
+            for reading, data in zip(
+                published,
+                SensorDataSerializer(published, many=True).data,
+            )
+        )
+
+    transaction.on_commit(publish)
+
+
+def publish_alerts(alerts: Iterable[SensorAlert]) -> None:
+    alerts = list(alerts)
+
+    def publish():
+        broker = get_broker()
+        messages = []
+        for alert in alerts:
+            channels = [
+                channel
+                for channel in (
+                    ALERTS_CHANNEL,
+                    SENSOR_ALERTS_CHANNEL.format(alert.sensor_id),
+                )
+                if broker.has_subscribers(channel)
+            ]
+            if channels:
+                data = _encode(SensorAlertSerializer(alert).data)
+                messages += [
+                    (channel, Message("alert", data)) for channel in channels
+                ]
+        if messages:
+            broker.publish_many(messages)
+
+    transaction.on_commit(publish)
@@ -0,0 +1,77 @@
+from cacheops.signals import cache_read
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from sensor.alert.models import SensorAlert
+from sensor.cache import record_cache_read
+from sensor.conditional import (
+    SENSOR_ALERT_RESOURCE,
+    SENSOR_DATA_RESOURCE,
+    SENSOR_RESOURCE,
+    touch_resources,
+)
+from sensor.data.models import SensorData
+from sensor.data.signals import sensor_data_ingested
+from sensor.devices import device_key_cache
+from sensor.models import Sensor, SensorDeviceKey
+from sensor.pubsub import publish_alerts, publish_readings
+
+
+@receiver(cache_read)
+def count_cache_read(sender, func, hit, **kwargs):
+    # Reads through @cached_as have no model sender.
+    label = sender._meta.label_lower if sender is not None else "cached_as"
+    record_cache_read(label, hit)
+
+
+@receiver(post_save, sender=Sensor)
+def touch_sensors(sender, **kwargs):
+    touch_resources(SENSOR_RESOURCE)
+
+
+@receiver(post_delete, sender=Sensor)
+def touch_deleted_sensor(sender, **kwargs):
+    # Its readings and alerts are deleted along with it.
+    touch_resources(
+        SENSOR_RESOURCE, SENSOR_DATA_RESOURCE, SENSOR_ALERT_RESOURCE
+    )
+
+
+# Sensors embed their latest reading, so new readings change them too.
+# Deletes touch the resources themselves: a post_delete receiver would
+# make Django load and signal every row of a queryset or cascade delete.
+@receiver(post_save, sender=SensorData)
+@receiver(sensor_data_ingested)
+def touch_sensor_data(sender, **kwargs):
+    touch_resources(SENSOR_DATA_RESOURCE, SENSOR_RESOURCE)
+
+
+@receiver(post_save, sender=SensorAlert)
+def touch_sensor_alerts(sender, **kwargs):
+    touch_resources(SENSOR_ALERT_RESOURCE)
+
+
+@receiver(sensor_data_ingested)
+def push_sensor_data(sender, readings, **kwargs):
+    publish_readings(readings)
+
+
+@receiver(post_save, sender=SensorAlert)
+def push_sensor_alert(sender, instance, created, **kwargs):
+    if created:
+        publish_alerts([instance])
+
+
+# Other processes see new and revoked keys on their next refresh.
+@receiver(post_save, sender=SensorDeviceKey)
+def cache_device_key(sender, instance, **kwargs):
+    sensor_id = instance.sensor_id if instance.revoked_at is None else None
+    transaction.on_commit(
+        lambda: device_key_cache.set(instance.key_id, sensor_id)
+    )
+
+
+@receiver(post_delete, sender=SensorDeviceKey)
+def uncache_device_key(sender, instance, **kwargs):
+    transaction.on_commit(lambda: device_key_cache.set(instance.key_id, None))
@@ -0,0 +1,47 @@
+import msgpack
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Types orjson and msgpack do not handle natively (Decimal, lazy strings,
+# UUID, timedelta...) are encoded exactly as DRF's own encoder would.
+encode_default = JSONEncoder().default
+
+ORJSON_OPTIONS = (
+    orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Drop-in replacement for ``JSONRenderer`` that encodes with orjson.
+    Indented output is only requested by humans, so it is left to the
+    stock renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+
+        ret = orjson.dumps(data, default=encode_default, option=ORJSON_OPTIONS)
+        # Keep the output a strict javascript subset, as JSONRenderer does.
+        return ret.replace("\u2028".encode(), b"\\u2028").replace(
+            "\u2029".encode(), b"\\u2029"
+        )
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=encode_default, datetime=False)
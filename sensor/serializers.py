@@ -1,9 +1,15 @@
 from rest_framework import serializers
 
+from sensor.data.serializers import SensorLatestReadingSerializer
+from sensor.metrics import SerializerTimingMixin
 from sensor.models import Sensor
 
 
-class SensorSerializer(serializers.ModelSerializer):
+class SensorSerializer(SerializerTimingMixin, serializers.ModelSerializer):
+    latest_reading = SensorLatestReadingSerializer(
+        read_only=True, allow_null=True
+    )
+
     class Meta:
         model = Sensor
         fields = [
@@ -13,5 +19,24 @@ class SensorSerializer(serializers.ModelSerializer):
             "status",
             "model",
             "installation_date",
+            "latest_reading",
         ]
         read_only_fields = ["id"]
+
+
+class SensorStreamQuerySerializer(serializers.Serializer):
+    sensor = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False
+    )
+    events = serializers.MultipleChoiceField(
+        choices=["readings", "alerts"], required=False
+    )
+
+    def validate(self, attrs):
+        if not attrs.get("events"):
+            attrs["events"] = {"readings", "alerts"}
+        if "readings" in attrs["events"] and not attrs.get("sensor"):
+            raise serializers.ValidationError(
+                {"sensor": ["Readings are streamed per sensor."]}
+            )
+        return attrs
@@ -1,7 +1,41 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from cacheops import invalidate_all
+from fakeredis import FakeRedis
+from django.test import SimpleTestCase, override_settings
 from django.utils import timezone
-from rest_framework.test import APITestCase
+from rest_framework.test import APITestCase, APITransactionTestCase
 from rest_framework import status
-from sensor.models import Sensor, SensorStatus, SensorType
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import AccessToken
+from sensor.alert.models import SensorAlert
+from sensor.alert.serializers import SensorAlertSerializer
+from sensor.cache import reset_cache_stats
+from sensor.devices import (
+    create_device_key,
+    device_key_cache,
+    revoke_device_key,
+)
+from sensor.metrics import reset_request_metrics
+from sensor.pubsub import (
+    RedisBroker,
+    iter_server_sent_events,
+    publish_readings,
+)
+from sensor.renderers import ORJSONRenderer
+from sensor.data.models import SensorData
+from sensor.data.serializers import SensorDataSerializer
+from sensor.data.services import ingest_sensor_data
+from sensor.models import (
+    Sensor,
+    SensorDeviceKey,
+    SensorStatus,
+    SensorType,
+)
+from sensor.serializers import SensorSerializer
 from user.models import User
 
 class SensorAPITests(APITestCase):
@@ -62,4 +96,661 @@ class SensorAPITests(APITestCase):
             },
             params={'id': self.sensor.id}
         )
-        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+class SensorAggregateAPITests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email='test@gmail.com',
+            password='password',
+        )
+        self.sensors = [
+            Sensor.objects.create(
+                title=f'sensor {index}',
+                type=SensorType.OUTDOOR,
+                status=SensorStatus.ACTIVE,
+                model='sensor model',
+                installation_date=timezone.now()
+            )
+            for index in range(2)
+        ]
+        self.start = datetime(2024, 6, 1, tzinfo=dt_timezone.utc)
+        for sensor in self.sensors:
+            ingest_sensor_data(
+                [
+                    SensorData(
+                        sensor=sensor,
+                        temperature=minute,
+                        humidity=50,
+                        wind_speed=2,
+                        date=self.start + timedelta(minutes=minute * 20),
+                    )
+                    for minute in range(6)
+                ]
+            )
+
+    def test_aggregate_single_sensor_by_hour(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(
+            f'/api/sensors/{self.sensors[0].id}/aggregate/',
+            {'bucket': '1h'},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()), 2)
+        first = response.json()[0]
+        self.assertEqual(first['count'], 3)
+        self.assertEqual(
+            first['temperature'],
+            {'min': '0.00', 'max': '2.00', 'avg': '1.00'},
+        )
+
+    def test_aggregate_many_sensors_in_range(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(
+            '/api/sensors/aggregate/',
+            {
+                'sensor': [sensor.id for sensor in self.sensors],
+                'bucket': '1d',
+                'from': self.start.isoformat(),
+                'to': (self.start + timedelta(hours=1)).isoformat(),
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row['sensor'], row['count']) for row in response.json()],
+            [(sensor.id, 3) for sensor in self.sensors],
+        )
+
+    def test_aggregate_rejects_unknown_bucket(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(
+            f'/api/sensors/{self.sensors[0].id}/aggregate/',
+            {'bucket': '7s'},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_aggregate_unaligned_range_reads_raw_readings(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(
+            f'/api/sensors/{self.sensors[0].id}/aggregate/',
+            {
+                'bucket': '1h',
+                'from': (self.start + timedelta(seconds=30)).isoformat(),
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row['count'] for row in response.json()], [2, 3]
+        )
+
+
+class SensorLatestReadingAPITests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email='test@gmail.com',
+            password='password',
+        )
+        self.sensors = [
+            Sensor.objects.create(
+                title=f'sensor {index}',
+                type=SensorType.OUTDOOR,
+                status=SensorStatus.ACTIVE,
+                model='sensor model',
+                installation_date=timezone.now()
+            )
+            for index in range(3)
+        ]
+        self.start = datetime(2024, 6, 1, tzinfo=dt_timezone.utc)
+        for sensor in self.sensors[:2]:
+            ingest_sensor_data(
+                [
+                    SensorData(
+                        sensor=sensor,
+                        temperature=minute,
+                        humidity=50,
+                        wind_speed=2,
+                        date=self.start + timedelta(minutes=minute),
+                    )
+                    for minute in (3, 5, 1)
+                ]
+            )
+
+    def test_latest_lists_newest_reading_per_sensor(self):
+        self.client.force_authenticate(self.user)
+        # An older, late-arriving reading must not replace the latest one.
+        ingest_sensor_data(
+            [
+                SensorData(
+                    sensor=self.sensors[0],
+                    temperature=0,
+                    humidity=50,
+                    wind_speed=2,
+                    date=self.start,
+                )
+            ]
+        )
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/sensors/latest/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row['sensor'], row['temperature']) for row in response.json()],
+            [(self.sensors[0].id, '5.00'), (self.sensors[1].id, '5.00')],
+        )
+
+    def test_latest_reading_follows_updates_and_deletes(self):
+        self.client.force_authenticate(self.user)
+        newest = SensorData.objects.get(
+            sensor=self.sensors[0], temperature=5
+        )
+        response = self.client.delete(f'/api/sensors-data/{newest.id}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        response = self.client.get(f'/api/sensors/{self.sensors[0].id}/')
+        self.assertEqual(response.json()['latest_reading']['temperature'], '3.00')
+        response = self.client.get(f'/api/sensors/{self.sensors[2].id}/')
+        self.assertIsNone(response.json()['latest_reading'])
+
+
+class SensorCacheTests(APITransactionTestCase):
+    # Cacheops only writes to the cache once a transaction commits, so
+    # these tests cannot run inside the usual per-test transaction.
+    def setUp(self):
+        invalidate_all()
+        reset_cache_stats()
+        self.user = User.objects.create(
+            email='admin@gmail.com',
+            password='password',
+            is_staff=True,
+        )
+        self.sensors = [
+            Sensor.objects.create(
+                title=f'sensor {index}',
+                type=SensorType.OUTDOOR,
+                status=SensorStatus.ACTIVE,
+                model='sensor model',
+                installation_date=timezone.now()
+            )
+            for index in range(2)
+        ]
+
+    def test_sensor_detail_is_cached_until_it_changes(self):
+        self.client.force_authenticate(self.user)
+        url = f'/api/sensors/{self.sensors[0].id}/'
+        self.client.get(url)
+
+        # Only the latest reading prefetch reaches the database.
+        with self.assertNumQueries(1):
+            self.client.get(url)
+        self.sensors[1].title = 'renamed'
+        self.sensors[1].save()
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+        response = self.client.patch(url, {'title': 'renamed'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(url).json()['title'], 'renamed')
+
+        response = self.client.get('/api/cache/stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        stats = response.json()['sensor.sensor']
+        self.assertGreaterEqual(stats['hits'], 2)
+        self.assertGreaterEqual(stats['misses'], 2)
+
+
+class SensorConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email='test@gmail.com',
+            password='password',
+        )
+        self.sensor = Sensor.objects.create(
+            title='sensor title',
+            type=SensorType.OUTDOOR,
+            status=SensorStatus.ACTIVE,
+            model='sensor model',
+            installation_date=timezone.now()
+        )
+
+    def test_unchanged_sensor_list_is_not_modified(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/sensors/')
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                '/api/sensors/', HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        response = self.client.get(
+            '/api/sensors/?page=1', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_change_under_a_clock_gone_back_changes_etag(self):
+        self.client.force_authenticate(self.user)
+        etags = set()
+        # Both changes read the same wall clock, as after it went back.
+        with (
+            mock.patch('sensor.conditional.time.time', return_value=1),
+            mock.patch('sensor.conditional.time.time_ns', return_value=1),
+        ):
+            for title in ('first', 'second'):
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.sensor.title = title
+                    self.sensor.save()
+                response = self.client.get('/api/sensors/')
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                etags.add(response['ETag'])
+        self.assertEqual(len(etags), 2)
+
+    def test_deletes_touch_resources_once(self):
+        SensorData.objects.bulk_create(
+            SensorData(
+                sensor=self.sensor, temperature=1, humidity=50, wind_speed=2
+            )
+            for _ in range(3)
+        )
+        SensorAlert.objects.create(
+            sensor=self.sensor, description='alert', date=timezone.now()
+        )
+        with self.captureOnCommitCallbacks() as callbacks:
+            SensorData.objects.all().delete()
+        self.assertEqual(callbacks, [])
+
+        self.client.force_authenticate(self.user)
+        etag = self.client.get('/api/sensors-alerts/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.sensor.delete()
+        self.assertEqual(len(callbacks), 1)
+        response = self.client.get(
+            '/api/sensors-alerts/', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_ingested_reading_changes_sensor_etag(self):
+        self.client.force_authenticate(self.user)
+        url = f'/api/sensors/{self.sensor.id}/'
+        etag = self.client.get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest_sensor_data(
+                [
+                    SensorData(
+                        sensor=self.sensor,
+                        temperature=1,
+                        humidity=50,
+                        wind_speed=2,
+                    )
+                ]
+            )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIsNotNone(response.json()['latest_reading'])
+
+
+class SensorStreamTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email='test@gmail.com',
+            password='password',
+        )
+        self.sensors = [
+            Sensor.objects.create(
+                title=f'sensor {index}',
+                type=SensorType.OUTDOOR,
+                status=SensorStatus.ACTIVE,
+                model='sensor model',
+                installation_date=timezone.now()
+            )
+            for index in range(2)
+        ]
+
+    def publish(self, *readings):
+        with self.captureOnCommitCallbacks(execute=True):
+            publish_readings(readings)
+
+    async def test_stream_pushes_readings_of_subscribed_sensors(self):
+        response = await self.async_client.get(
+            '/api/stream/',
+            {
+                'sensor': self.sensors[0].id,
+                'events': 'readings',
+                'token': str(AccessToken.for_user(self.user)),
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = aiter(response.streaming_content)
+        self.assertTrue((await anext(events)).startswith(b'retry:'))
+
+        await sync_to_async(self.publish)(
+            *(
+                SensorData(
+                    id=index,
+                    sensor=sensor,
+                    temperature='21.50',
+                    humidity=50,
+                    wind_speed=2,
+                    date=datetime(2024, 6, 1, tzinfo=dt_timezone.utc),
+                )
+                for index, sensor in enumerate(reversed(self.sensors), 1)
+            )
+        )
+        event = (await anext(events)).decode()
+        self.assertTrue(event.startswith('event: reading\ndata: {"id": 2,'))
+        self.assertIn('"temperature": "21.50"', event)
+
+    async def test_idle_stream_sends_keepalives(self):
+        events = iter_server_sent_events(['alerts'], keepalive=0.01)
+        try:
+            self.assertTrue((await anext(events)).startswith('retry:'))
+            self.assertEqual(await anext(events), ': keep-alive\n\n')
+        finally:
+            await events.aclose()
+
+    def test_redis_broker_publishes_a_batch_in_one_round_trip(self):
+        broker = RedisBroker('redis://localhost')
+        broker._client = FakeRedis()
+        pubsub = broker._client.pubsub()
+        pubsub.psubscribe(f'{broker.prefix}*')
+        pubsub.get_message()
+        readings = [
+            SensorData(
+                id=index,
+                sensor=self.sensors[index % 2],
+                temperature=index,
+                humidity=50,
+                wind_speed=2,
+                date=datetime(2024, 6, 1, tzinfo=dt_timezone.utc),
+            )
+            for index in range(1, 4)
+        ]
+
+        with mock.patch(
+            'sensor.pubsub.get_broker', return_value=broker
+        ), mock.patch.object(
+            broker._client, 'pipeline', wraps=broker._client.pipeline
+        ) as pipeline:
+            self.publish(*readings)
+
+        self.assertEqual(pipeline.call_count, 1)
+        messages = [pubsub.get_message() for _ in readings]
+        self.assertEqual(
+            [message['channel'].decode() for message in messages],
+            [
+                f'{broker.prefix}readings:{reading.sensor_id}'
+                for reading in readings
+            ],
+        )
+        self.assertTrue(
+            messages[0]['data'].startswith(b'reading\n{"id": 1,')
+        )
+
+    async def test_stream_requires_token(self):
+        response = await self.async_client.get(
+            '/api/stream/', {'events': 'alerts', 'token': 'invalid'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ValuesListTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email='test@gmail.com',
+            password='password',
+        )
+        self.sensors = [
+            Sensor.objects.create(
+                title=f'sensor {index}',
+                type=SensorType.OUTDOOR,
+                status=SensorStatus.ACTIVE,
+                model='sensor model',
+                installation_date=timezone.now()
+            )
+            for index in range(3)
+        ]
+        ingest_sensor_data(
+            [
+                SensorData(
+                    sensor=sensor,
+                    temperature=Decimal('-3.5') * index,
+                    humidity='50.05',
+                    wind_speed=index,
+                    date=datetime(
+                        2024, 6, 1, 12, index, 7, 123456 * index,
+                        tzinfo=dt_timezone.utc,
+                    ),
+                )
+                for index, sensor in enumerate(self.sensors[:2])
+            ]
+        )
+        SensorAlert.objects.create(
+            sensor=self.sensors[0],
+            description='alert',
+            date=datetime(2024, 6, 1, tzinfo=dt_timezone.utc),
+        )
+
+    def assertRendersLike(self, url, queryset, serializer_class):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(response.data['results']),
+            renderer.render(serializer_class(queryset, many=True).data),
+        )
+
+    def test_lists_match_the_serializers_byte_for_byte(self):
+        self.assertRendersLike(
+            '/api/sensors/',
+            Sensor.objects.order_by('-title'),
+            SensorSerializer,
+        )
+        self.assertRendersLike(
+            '/api/sensors-data/',
+            SensorData.objects.order_by('-date', '-id'),
+            SensorDataSerializer,
+        )
+        self.assertRendersLike(
+            '/api/sensors-alerts/',
+            SensorAlert.objects.order_by('-date', '-id'),
+            SensorAlertSerializer,
+        )
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    def test_renders_like_json_renderer(self):
+        data = {
+            'decimal': Decimal('21.50'),
+            'date': datetime(2024, 6, 1, 0, 0, 1, 5000, tzinfo=dt_timezone.utc),
+            'duration': timedelta(minutes=5),
+            'text': 'T\u00e9st \u2028',
+            1: [None, True, 1.5],
+        }
+        self.assertEqual(
+            ORJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+        self.assertEqual(
+            ORJSONRenderer().render(data, 'application/json; indent=4'),
+            JSONRenderer().render(data, 'application/json; indent=4'),
+        )
+
+
+class RequestMetricsTests(APITestCase):
+    def setUp(self):
+        reset_request_metrics()
+        self.user = User.objects.create(email='test@gmail.com')
+        self.client.force_authenticate(self.user)
+
+    def get_metrics(self):
+        self.client.force_authenticate(None)
+        self.client.force_login(
+            User.objects.create(email='staff@gmail.com', is_staff=True)
+        )
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_metrics_are_recorded_per_route_and_method(self):
+        self.client.get('/api/sensors/')
+        self.client.get('/api/sensors/')
+
+        response = self.get_metrics()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        labels = 'route="sensor-list",method="GET"'
+        self.assertIn(f'http_requests_total{{{labels},status="200"}} 2', body)
+        self.assertIn(
+            f'http_request_duration_seconds_count{{{labels}}} 2', body
+        )
+        self.assertIn(
+            f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2',
+            body,
+        )
+        self.assertIn(f'http_request_sql_queries_total{{{labels}}}', body)
+        self.assertIn(f'http_request_render_seconds_total{{{labels}}}', body)
+        self.assertIn(f'http_response_size_bytes_total{{{labels}}}', body)
+        self.assertIn(
+            f'http_request_serializer_seconds_total{{{labels}}}', body
+        )
+        self.assertNotIn(
+            f'http_request_serializer_seconds_total{{{labels}}} 0.0\n', body
+        )
+
+    async def test_sql_of_sync_views_is_recorded_under_asgi(self):
+        response = await self.async_client.get(
+            '/api/sensors/',
+            headers={
+                'Authorization': f'Bearer {AccessToken.for_user(self.user)}'
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        body = (await sync_to_async(self.get_metrics)()).content.decode()
+        labels = 'route="sensor-list",method="GET"'
+        self.assertIn(f'http_requests_total{{{labels},status="200"}} 1', body)
+        self.assertNotIn(
+            f'http_request_sql_queries_total{{{labels}}} 0\n', body
+        )
+
+    def test_metrics_are_for_staff_without_a_token(self):
+        self.client.force_login(self.user)
+        self.assertEqual(
+            self.client.get('/metrics').status_code,
+            status.HTTP_403_FORBIDDEN,
+        )
+
+    @override_settings(REQUEST_METRICS_TOKEN='scrape-token')
+    def test_metrics_require_the_token_when_set(self):
+        self.assertEqual(
+            self.client.get('/metrics').status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+        response = self.client.get(
+            '/metrics', HTTP_AUTHORIZATION='Bearer scrape-token'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(REQUEST_SLOW_LOG_MS=0)
+    def test_slow_requests_are_logged_with_their_sql(self):
+        with self.assertLogs('sensor.metrics.slow_requests', 'WARNING') as logs:
+            self.client.get('/api/sensors/')
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('Slow request GET /api/sensors/', logs.output[0])
+        self.assertIn('FROM "sensor_sensor"', logs.output[0])
+
+
+class SensorDeviceKeyTests(APITestCase):
+    def setUp(self):
+        device_key_cache.clear()
+        self.sensor, self.other_sensor = [
+            Sensor.objects.create(
+                title=f'sensor {index}',
+                type=SensorType.OUTDOOR,
+                model='sensor model',
+                installation_date=timezone.now(),
+            )
+            for index in range(2)
+        ]
+        self.device_key, raw_key = create_device_key(self.sensor)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Device {raw_key}')
+        self.reading = {
+            'temperature': '21.50',
+            'humidity': '40.00',
+            'wind_speed': '3.20',
+        }
+
+    def test_readings_are_posted_for_the_sensor_of_the_key(self):
+        response = self.client.post(
+            '/api/sensors-data/', self.reading, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['sensor'], self.sensor.id)
+
+        response = self.client.post(
+            '/api/sensors-data/bulk/',
+            [self.reading, {**self.reading, 'sensor': self.sensor.id}],
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            SensorData.objects.filter(sensor=self.sensor).count(), 3
+        )
+
+    def test_keys_cannot_write_other_sensors_or_read(self):
+        response = self.client.post(
+            '/api/sensors-data/bulk/',
+            [{**self.reading, 'sensor': self.other_sensor.id}],
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get('/api/sensors-data/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get('/api/sensors/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(SensorData.objects.exists())
+
+    def test_revoked_and_forged_keys_are_rejected(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            revoke_device_key(self.device_key)
+        response = self.client.post(
+            '/api/sensors-data/', self.reading, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        forged = SensorDeviceKey.objects.create(
+            sensor=self.other_sensor, key_id='a' * 16
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Device {forged.key_id}.{"0" * 64}'
+        )
+        response = self.client.post(
+            '/api/sensors-data/', self.reading, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_keeps_revocations_made_while_it_reads(self):
+        key_id = self.device_key.key_id
+        values_list = SensorDeviceKey.objects.values_list
+
+        def revoke_during_snapshot(*fields):
+            rows = list(values_list(*fields))
+            with self.captureOnCommitCallbacks(execute=True):
+                revoke_device_key(self.device_key)
+            return mock.Mock(iterator=lambda: iter(rows))
+
+        with mock.patch.object(
+            SensorDeviceKey.objects,
+            'values_list',
+            side_effect=revoke_during_snapshot,
+        ):
+            device_key_cache.refresh()
+
+        self.assertIsNone(device_key_cache.get_sensor_id(key_id))
@@ -11,6 +11,9 @@ router.register(
 )
 
 urlpatterns = [
+    path("api/cache/stats/", views.CacheStatsView.as_view()),
+    path("api/stream/", views.sensor_stream),
+    path("metrics", views.metrics, name="metrics"),
     path("", include(router.urls)),
     path("", include(data_router.urls)),
     path("", include(alerts_router.urls)),
@@ -1,12 +1,195 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.crypto import constant_time_compare
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework import viewsets
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework.decorators import action
+from rest_framework.response import Response
 
+from sensor.data.serializers import (
+    SensorDataAggregateManyQuerySerializer,
+    SensorDataAggregateQuerySerializer,
+    SensorDataAggregateSerializer,
+    SensorLatestReadingSerializer,
+)
+from sensor.data.models import SensorLatestReading
+from sensor.encoders import ValuesListMixin, get_row_encoder
+from sensor.data.services import aggregate_sensor_data
+from sensor.cache import get_cache_stats
+from sensor.metrics import render_prometheus_metrics, time_serializer
+from sensor.conditional import (
+    SENSOR_DATA_RESOURCE,
+    SENSOR_RESOURCE,
+    ConditionalGetMixin,
+)
 from sensor.models import Sensor
-from sensor.serializers import SensorSerializer
-from rest_framework.permissions import IsAuthenticated
+from sensor.pubsub import get_stream_channels, iter_server_sent_events
+from sensor.serializers import SensorSerializer, SensorStreamQuerySerializer
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from user.authentication import CachedJWTAuthentication
 
 
-class SensorViewSet(viewsets.ModelViewSet):
+class SensorViewSet(
+    ConditionalGetMixin, ValuesListMixin, viewsets.ModelViewSet
+):
     serializer_class = SensorSerializer
     model = Sensor
-    queryset = Sensor.objects.all().order_by("-title")
-    permission_classes = [IsAuthenticated]
\ No newline at end of file
+    # Prefetched rather than joined, so the cached sensor rows are not
+    # invalidated by every reading ingested.
+    queryset = (
+        Sensor.objects.all()
+        .prefetch_related("latest_reading")
+        .order_by("-title")
+    )
+    permission_classes = [IsAuthenticated]
+    conditional_resources = (SENSOR_RESOURCE, SENSOR_DATA_RESOURCE)
+
+    @swagger_auto_schema(
+        query_serializer=SensorDataAggregateQuerySerializer,
+        responses={200: SensorDataAggregateSerializer(many=True)},
+    )
+    @action(detail=True, methods=["get"])
+    def aggregate(self, request, pk=None):
+        sensor = self.get_object()
+        query_serializer = SensorDataAggregateQuerySerializer(
+            data=request.query_params
+        )
+        query_serializer.is_valid(raise_exception=True)
+        return self._aggregate_response(
+            [sensor.id], query_serializer.validated_data
+        )
+
+    @swagger_auto_schema(
+        query_serializer=SensorDataAggregateManyQuerySerializer,
+        responses={200: SensorDataAggregateSerializer(many=True)},
+    )
+    @action(detail=False, methods=["get"], url_path="aggregate")
+    def aggregate_many(self, request):
+        query_serializer = SensorDataAggregateManyQuerySerializer(
+            data=request.query_params
+        )
+        query_serializer.is_valid(raise_exception=True)
+        return self._aggregate_response(
+            query_serializer.validated_data["sensor"],
+            query_serializer.validated_data,
+        )
+
+    @swagger_auto_schema(
+        responses={200: SensorLatestReadingSerializer(many=True)},
+    )
+    @action(detail=False, methods=["get"])
+    def latest(self, request):
+        return self.get_conditional_response(request, self._latest_response)
+
+    def get_related_rows(self, rows):
+        encoder = get_row_encoder(SensorLatestReadingSerializer)
+        latest_rows = list(
+            SensorLatestReading.objects.filter(
+                sensor_id__in=[row["id"] for row in rows]
+            ).values(*encoder.lookups)
+        )
+        with time_serializer(self.request):
+            latest_readings = encoder.encode(latest_rows)
+        return {
+            "latest_reading": {
+                row["sensor_id"]: latest_reading
+                for row, latest_reading in zip(latest_rows, latest_readings)
+            }
+        }
+
+    def _latest_response(self):
+        encoder = get_row_encoder(SensorLatestReadingSerializer)
+        latest_rows = list(
+            SensorLatestReading.objects.order_by("sensor_id").values(
+                *encoder.lookups
+            )
+        )
+        with time_serializer(self.request):
+            data = encoder.encode(latest_rows)
+        return Response(data)
+
+    def _aggregate_response(self, sensor_ids, query):
+        rows = aggregate_sensor_data(
+            sensor_ids,
+            query["bucket"],
+            date_from=query.get("from"),
+            date_to=query.get("to"),
+        )
+        return Response(SensorDataAggregateSerializer(rows, many=True).data)
+
+
+class CacheStatsView(APIView):
+    # Token claims do not carry is_staff, so the user is always looked up.
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_cache_stats())
+
+
+def metrics(request):
+    """
+    Request and cache metrics of this process for Prometheus, for the
+    holders of ``REQUEST_METRICS_TOKEN``, or for staff when it is unset.
+    """
+    token = settings.REQUEST_METRICS_TOKEN
+    if token:
+        if not constant_time_compare(
+            request.headers.get("Authorization", ""), f"Bearer {token}"
+        ):
+            return HttpResponse(status=401)
+    elif not request.user.is_staff:
+        return HttpResponse(status=403)
+    return HttpResponse(
+        render_prometheus_metrics(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+def _authenticate_stream_request(request):
+    # EventSource cannot send headers, so the access token may also be
+    # passed as a query parameter.
+    authentication = CachedJWTAuthentication()
+    try:
+        if raw_token := request.GET.get("token"):
+            return authentication.get_user(
+                authentication.get_validated_token(raw_token)
+            )
+        result = authentication.authenticate(request)
+    except (AuthenticationFailed, InvalidToken):
+        return None
+    return result[0] if result else None
+
+
+async def sensor_stream(request):
+    """
+    Server-Sent Events stream of new readings and alerts.
+
+    ``?sensor=`` selects the sensors and ``?events=readings|alerts`` the
+    kinds of events; without sensors, the alerts of every sensor are sent.
+    """
+    user = await sync_to_async(_authenticate_stream_request)(request)
+    if user is None or not user.is_active:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."},
+            status=401,
+        )
+    query_serializer = SensorStreamQuerySerializer(data=request.GET)
+    if not query_serializer.is_valid():
+        return JsonResponse(query_serializer.errors, status=400)
+
+    channels = get_stream_channels(
+        query_serializer.validated_data.get("sensor", []),
+        query_serializer.validated_data["events"],
+    )
+    return StreamingHttpResponse(
+        iter_server_sent_events(
+            channels, settings.SENSOR_STREAM_KEEPALIVE_SECONDS
+        ),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,9 @@
+from allauth.socialaccount.adapter import DefaultSocialAccountAdapter
+
+from user.oauth import get_http_session
+
+
+class SocialAccountAdapter(DefaultSocialAccountAdapter):
+    def get_requests_session(self):
+        # allauth builds a session per request by default.
+        return get_http_session()
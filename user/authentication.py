@@ -0,0 +1,177 @@
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from user.models import User
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_KEY = "auth-user:{}"
+
+
+class LocalUserCache:
+    """
+    A small per-process LRU of users, whose entries expire after a few
+    seconds since other processes cannot invalidate them.
+    """
+
+    def __init__(self):
+        self._users: OrderedDict[str, tuple[float, User]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> User | None:
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at < time.monotonic():
+                del self._users[user_id]
+                return None
+            self._users.move_to_end(user_id)
+            return user
+
+    def set(self, user_id: str, user: User) -> None:
+        with self._lock:
+            self._users[user_id] = (
+                time.monotonic() + settings.USER_AUTH_LOCAL_CACHE_TIMEOUT,
+                user,
+            )
+            self._users.move_to_end(user_id)
+            while len(self._users) > settings.USER_AUTH_LOCAL_CACHE_SIZE:
+                self._users.popitem(last=False)
+
+    def delete(self, user_id: str) -> None:
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._users.clear()
+
+
+local_user_cache = LocalUserCache()
+
+
+def _get_cache_key(user_id) -> str:
+    return USER_CACHE_KEY.format(user_id)
+
+
+def get_cached_user(user_id) -> User | None:
+    """
+    Return the user with ``user_id`` from the local cache, the shared
+    cache or the database, in that order, or ``None`` if there is none.
+    """
+    user_id = str(user_id)
+    user = local_user_cache.get(user_id)
+    if user is None:
+        try:
+            user = cache.get(_get_cache_key(user_id))
+        except Exception:
+            logger.warning("The user cache is unavailable.", exc_info=True)
+        if user is None:
+            user = User.objects.filter(
+                **{api_settings.USER_ID_FIELD: user_id}
+            ).first()
+            if user is None:
+                return None
+            try:
+                cache.set(
+                    _get_cache_key(user_id),
+                    user,
+                    settings.USER_AUTH_CACHE_TIMEOUT,
+                )
+            except Exception:
+                logger.warning("The user cache is unavailable.", exc_info=True)
+        local_user_cache.set(user_id, user)
+    # Each request gets its own instance, so none sees another's changes.
+    return copy.copy(user)
+
+
+def invalidate_cached_user(user: User) -> None:
+    """
+    Drop the cached user once the current transaction commits, so no
+    request can cache the old row again. Other processes keep their
+    local copy until it expires.
+    """
+    user_id = str(getattr(user, api_settings.USER_ID_FIELD))
+
+    def invalidate():
+        local_user_cache.delete(user_id)
+        try:
+            cache.delete(_get_cache_key(user_id))
+        except Exception:
+            logger.warning("The user cache is unavailable.", exc_info=True)
+
+    local_user_cache.delete(user_id)
+    transaction.on_commit(invalidate)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` that resolves users through
+    ``get_cached_user`` instead of a query per request.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as exc:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from exc
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(
+                _("User not found"), code="user_not_found"
+            )
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."),
+                code="password_changed",
+            )
+        return user
+
+
+class StatelessReadJWTAuthentication(CachedJWTAuthentication):
+    """
+    Trusts the signed claims of the token on read-only requests and
+    authenticates them as a ``TokenUser`` without looking the user up, so
+    a deactivated user can keep reading until the token expires. Writes
+    still resolve the user.
+    """
+
+    def authenticate(self, request):
+        self._stateless = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if not self._stateless:
+            return super().get_user(validated_token)
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            )
+        return api_settings.TOKEN_USER_CLASS(validated_token)
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from user.testing import FakeOAuthProvider
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve a local stand-in for Google's OpenID Connect endpoints, so "
+        "the login flow can be exercised and benchmarked offline. Its "
+        "/authorize endpoint logs in the address given as login_hint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8001)
+
+    def handle(self, *args, **options):
+        provider = FakeOAuthProvider(options["host"], options["port"])
+        self.stdout.write(
+            "Start the API with "
+            f"GOOGLE_OAUTH_DISCOVERY_URL={provider.discovery_url}"
+        )
+        try:
+            provider.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            provider.server.server_close()
@@ -0,0 +1,122 @@
+import logging
+import re
+import threading
+import time
+from functools import cache
+from typing import Any
+
+import jwt
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+# Forced refreshes, on unknown signing keys, are at most this frequent.
+MIN_REFRESH_INTERVAL = 60
+
+
+class OAuthSession(requests.Session):
+    """A session whose requests time out after ``OAUTH_HTTP_TIMEOUT``."""
+
+    def request(self, *args, **kwargs):
+        kwargs.setdefault("timeout", settings.OAUTH_HTTP_TIMEOUT)
+        return super().request(*args, **kwargs)
+
+
+@cache
+def get_http_session() -> requests.Session:
+    """
+    Return the session shared by every outbound OAuth request of the
+    process, so logins reuse kept-alive TLS connections.
+    """
+    session = OAuthSession()
+    adapter = HTTPAdapter(
+        pool_connections=settings.OAUTH_HTTP_POOL_SIZE,
+        pool_maxsize=settings.OAUTH_HTTP_POOL_SIZE,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class CachedDocument:
+    """
+    A JSON document fetched over the shared session and kept for the
+    ``max-age`` its response allows, or ``OAUTH_METADATA_TTL`` seconds.
+    A stale copy is served when a refresh fails.
+    """
+
+    def __init__(self, get_url):
+        self._get_url = get_url
+        self._document: dict[str, Any] | None = None
+        self._fetched_at = self._expires_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, force_refresh: bool) -> bool:
+        now = time.monotonic()
+        if force_refresh:
+            return now < self._fetched_at + MIN_REFRESH_INTERVAL
+        return now < self._expires_at
+
+    def get(self, force_refresh: bool = False) -> dict[str, Any]:
+        if self._is_fresh(force_refresh):
+            return self._document
+        with self._lock:
+            if self._is_fresh(force_refresh):
+                return self._document
+            try:
+                self._refresh()
+            except requests.RequestException:
+                if self._document is None:
+                    raise
+                # Retried after a while, rather than by every login.
+                self._expires_at = time.monotonic() + MIN_REFRESH_INTERVAL
+                logger.warning(
+                    "%s could not be refreshed.",
+                    self._get_url(),
+                    exc_info=True,
+                )
+            return self._document
+
+    def clear(self) -> None:
+        with self._lock:
+            self._document = None
+            self._fetched_at = self._expires_at = float("-inf")
+
+    def _refresh(self) -> None:
+        response = get_http_session().get(self._get_url())
+        response.raise_for_status()
+        max_age = MAX_AGE_PATTERN.search(
+            response.headers.get("Cache-Control", "")
+        )
+        ttl = int(max_age[1]) if max_age else settings.OAUTH_METADATA_TTL
+        self._document = response.json()
+        self._fetched_at = time.monotonic()
+        self._expires_at = self._fetched_at + ttl
+
+
+google_discovery_document = CachedDocument(
+    lambda: settings.GOOGLE_OAUTH_DISCOVERY_URL
+)
+google_signing_keys = CachedDocument(
+    lambda: google_discovery_document.get()["jwks_uri"]
+)
+
+
+def get_google_metadata() -> dict[str, Any]:
+    return google_discovery_document.get()
+
+
+def get_google_signing_key(id_token: str) -> jwt.PyJWK:
+    """
+    Return the key ``id_token`` is signed with, refreshing the keys once
+    when it is not among them, as Google rotates its keys.
+    """
+    key_id = jwt.get_unverified_header(id_token).get("kid")
+    for force_refresh in (False, True):
+        for key in google_signing_keys.get(force_refresh)["keys"]:
+            if key.get("kid") == key_id:
+                return jwt.PyJWK(key)
+    raise jwt.InvalidTokenError(f"Unknown signing key {key_id}.")
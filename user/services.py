@@ -1,5 +1,6 @@
 import base64
 from datetime import timedelta
+from functools import cache
 from http.client import HTTPException
 import time
 from typing import Any, Optional
@@ -11,8 +12,10 @@ from django.conf import settings
 from django.db import transaction
 from django.http import HttpRequest
 from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
 
 from user.models import OAuthAccount, User
+from user.oauth import get_google_metadata, get_google_signing_key
 from cryptography.fernet import Fernet
 
 JWT_ALGORITHM = "HS256"
@@ -59,7 +62,7 @@ def get_google_oauth_client(
         settings.GOOGLE_OAUTH_CLIENT_ID,
         settings.GOOGLE_OAUTH_CLIENT_SECRET,
         google_oauth_adapter.access_token_method,
-        google_oauth_adapter.access_token_url,
+        get_google_metadata()["token_endpoint"],
         redirect_url,
     )
 
@@ -99,11 +102,19 @@ def decode_google_id_token(id_token: str) -> dict[str, Any]:
     if settings.GOOGLE_OAUTH_CLIENT_ID:
         audience.append(settings.GOOGLE_OAUTH_CLIENT_ID)
 
-    return decode_jwt(
-        id_token,
-        settings.SOCIAL_AUTH_SECRET,
-        audience,
-    )
+    # Google issues tokens both with and without the scheme.
+    issuer = get_google_metadata()["issuer"]
+    try:
+        signing_key = get_google_signing_key(id_token)
+        return jwt.decode(
+            id_token,
+            signing_key,
+            algorithms=[signing_key.algorithm_name],
+            audience=audience,
+            issuer=[issuer, issuer.removeprefix("https://")],
+        )
+    except jwt.PyJWTError as exc:
+        raise AuthenticationFailed(f"Invalid ID token: {exc}")
 
 
 def get_google_user_and_oauth_account_dict(
@@ -151,11 +162,17 @@ class TokenCryptography:
         return self.fernet.decrypt(encrypted_token).decode()
 
 
+@cache
+def get_token_cryptography() -> TokenCryptography:
+    # Without SECRET_TOKEN_KEY, the generated key lives as long as the
+    # process rather than a single call.
+    return TokenCryptography()
+
 
 def encode_access_and_refresh_tokens(
     access_token: str | None, refresh_token: str | None
 ) -> tuple[str, str]:
-    token_cryptography = TokenCryptography()
+    token_cryptography = get_token_cryptography()
     encrypted_access_token = ""
     if access_token:
         encrypted_access_token = token_cryptography.encode_token(access_token)
@@ -276,4 +293,8 @@ def get_google_authorization_url(request: HttpRequest) -> str:
     client = get_google_oauth_client(
         request, settings.GOOGLE_API_V1_AUTH_CALLBACK_URL
     )
-    return client.get_redirect_url(settings.GOOGLE_OAUTH_AUTHORIZE_URL, ['profile', 'email'], {})
\ No newline at end of file
+    return client.get_redirect_url(
+        get_google_metadata()["authorization_endpoint"],
+        ['profile', 'email'],
+        {},
+    )
\ No newline at end of file
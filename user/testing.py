@@ -0,0 +1,191 @@
+import hashlib
+import json
+import secrets
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+ID_TOKEN_LIFETIME = 3600
+
+
+class FakeOAuthProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "FakeOAuthProviderServer"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        provider = self.server.provider
+        provider.request_counts[url.path] += 1
+        if url.path == "/.well-known/openid-configuration":
+            self.send_json(provider.get_discovery_document(), max_age=3600)
+        elif url.path == "/certs":
+            self.send_json(provider.get_signing_keys(), max_age=3600)
+        elif url.path == "/authorize":
+            query = dict(parse_qsl(url.query))
+            if "redirect_uri" not in query:
+                self.send_json({"error": "invalid_request"}, status=400)
+                return
+            code = provider.issue_code(
+                query.get("login_hint", "user@example.com")
+            )
+            self.send_response(302)
+            self.send_header(
+                "Location",
+                f"{query['redirect_uri']}?"
+                + urlencode({"code": code, "state": query.get("state", "")}),
+            )
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        else:
+            self.send_json({"error": "not_found"}, status=404)
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        provider = self.server.provider
+        provider.request_counts[url.path] += 1
+        length = int(self.headers.get("Content-Length", 0))
+        form = dict(parse_qsl(self.rfile.read(length).decode()))
+        if url.path != "/token":
+            self.send_json({"error": "not_found"}, status=404)
+            return
+        token = provider.exchange_code(
+            form.get("code", ""), form.get("client_id", "")
+        )
+        if token is None:
+            self.send_json({"error": "invalid_grant"}, status=400)
+        else:
+            self.send_json(token)
+
+    def send_json(self, data, status=200, max_age=None):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if max_age is not None:
+            self.send_header("Cache-Control", f"public, max-age={max_age}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeOAuthProviderServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, provider: "FakeOAuthProvider"):
+        super().__init__(address, FakeOAuthProviderHandler)
+        self.provider = provider
+
+
+class FakeOAuthProvider:
+    """
+    A local OpenID Connect provider speaking the parts of Google's
+    protocol the login flow uses: discovery, signing keys, authorization
+    and code exchange. Point ``GOOGLE_OAUTH_DISCOVERY_URL`` at
+    ``discovery_url`` to log in without network access.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.server = FakeOAuthProviderServer((host, port), self)
+        self.request_counts: Counter = Counter()
+        self._codes: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.rotate_key()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def discovery_url(self) -> str:
+        return f"{self.base_url}/.well-known/openid-configuration"
+
+    def rotate_key(self) -> None:
+        self.private_key = rsa.generate_private_key(
+            public_exponent=65537, key_size=2048
+        )
+        self.key_id = secrets.token_hex(8)
+
+    def get_discovery_document(self) -> dict[str, Any]:
+        return {
+            "issuer": self.base_url,
+            "authorization_endpoint": f"{self.base_url}/authorize",
+            "token_endpoint": f"{self.base_url}/token",
+            "jwks_uri": f"{self.base_url}/certs",
+            "id_token_signing_alg_values_supported": ["RS256"],
+        }
+
+    def get_signing_keys(self) -> dict[str, Any]:
+        key = RSAAlgorithm.to_jwk(self.private_key.public_key(), as_dict=True)
+        return {"keys": [{**key, "kid": self.key_id, "alg": "RS256"}]}
+
+    def issue_code(self, email: str, **claims: Any) -> str:
+        """Return a single-use authorization code for ``email``."""
+        code = secrets.token_urlsafe(16)
+        with self._lock:
+            self._codes[code] = {
+                "sub": hashlib.sha256(email.encode()).hexdigest()[:21],
+                "email": email,
+                "email_verified": True,
+                **claims,
+            }
+        return code
+
+    def sign_id_token(self, claims: dict[str, Any], client_id: str) -> str:
+        now = int(time.time())
+        return jwt.encode(
+            {
+                "iss": self.base_url,
+                "aud": client_id,
+                "iat": now,
+                "exp": now + ID_TOKEN_LIFETIME,
+                **claims,
+            },
+            self.private_key,
+            algorithm="RS256",
+            headers={"kid": self.key_id},
+        )
+
+    def exchange_code(
+        self, code: str, client_id: str
+    ) -> dict[str, Any] | None:
+        with self._lock:
+            claims = self._codes.pop(code, None)
+        if claims is None:
+            return None
+        return {
+            "access_token": secrets.token_urlsafe(32),
+            "expires_in": ID_TOKEN_LIFETIME,
+            "token_type": "Bearer",
+            "scope": "openid email profile",
+            "id_token": self.sign_id_token(claims, client_id),
+        }
+
+    def start(self) -> "FakeOAuthProvider":
+        self._thread = threading.Thread(
+            target=self.server.serve_forever,
+            name="fake-oauth-provider",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "FakeOAuthProvider":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -1,3 +1,138 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed as InvalidIDToken
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import AccessToken
+
+from user.authentication import (
+    CachedJWTAuthentication,
+    StatelessReadJWTAuthentication,
+    local_user_cache,
+)
+from user.models import OAuthAccount, User
+from user.oauth import google_discovery_document, google_signing_keys
+from user.services import decode_google_id_token
+from user.testing import FakeOAuthProvider
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_user_cache.clear()
+        self.user = User.objects.create(email='test@gmail.com')
+        self.token = AccessToken.for_user(self.user)
+        self.factory = APIRequestFactory()
+
+    def authenticate(self, authentication, method='get'):
+        request = getattr(self.factory, method)(
+            '/', HTTP_AUTHORIZATION=f'Bearer {self.token}'
+        )
+        return authentication.authenticate(request)[0]
+
+    def test_user_is_looked_up_once(self):
+        with self.assertNumQueries(1):
+            self.authenticate(CachedJWTAuthentication())
+        with self.assertNumQueries(0):
+            user = self.authenticate(CachedJWTAuthentication())
+        self.assertEqual(user, self.user)
+
+        # Another process only finds the user in the shared cache.
+        local_user_cache.clear()
+        with self.assertNumQueries(0):
+            self.authenticate(CachedJWTAuthentication())
+
+    def test_deactivated_user_is_rejected(self):
+        self.authenticate(CachedJWTAuthentication())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(CachedJWTAuthentication())
+
+    def test_stateless_reads_trust_the_token(self):
+        with self.assertNumQueries(0):
+            user = self.authenticate(StatelessReadJWTAuthentication())
+        self.assertIsInstance(user, TokenUser)
+        self.assertEqual(user.id, str(self.user.id))
+
+        user = self.authenticate(StatelessReadJWTAuthentication(), 'post')
+        self.assertEqual(user, self.user)
+
+
+class GoogleOAuthLoginTests(APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.provider = FakeOAuthProvider().start()
+        cls.enterClassContext(
+            override_settings(
+                GOOGLE_OAUTH_DISCOVERY_URL=cls.provider.discovery_url,
+                GOOGLE_OAUTH_CLIENT_ID='client-id',
+                GOOGLE_OAUTH_CLIENT_SECRET='client-secret',
+            )
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.provider.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        google_discovery_document.clear()
+        google_signing_keys.clear()
+        self.provider.request_counts.clear()
+
+    def login(self, email):
+        code = self.provider.issue_code(email, given_name='Ada')
+        return self.client.get(
+            '/api/auth/google/callback/', {'code': code}
+        )
+
+    def test_login_fetches_the_metadata_once(self):
+        for _ in range(2):
+            response = self.login('ada@example.com')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIn('access', response.json())
+
+        user = User.objects.get(email='ada@example.com')
+        self.assertEqual(user.first_name, 'Ada')
+        self.assertEqual(OAuthAccount.objects.filter(user=user).count(), 1)
+        self.assertEqual(
+            self.provider.request_counts,
+            {
+                '/.well-known/openid-configuration': 1,
+                '/certs': 1,
+                '/token': 2,
+            },
+        )
+
+    def test_id_tokens_must_be_signed_by_the_provider(self):
+        claims = {'sub': '1', 'email': 'ada@example.com'}
+        decode_google_id_token(
+            self.provider.sign_id_token(claims, 'client-id')
+        )
+
+        # A rotated key is picked up by refreshing the signing keys.
+        self.provider.rotate_key()
+        with mock.patch('user.oauth.MIN_REFRESH_INTERVAL', 0):
+            decode_google_id_token(
+                self.provider.sign_id_token(claims, 'client-id')
+            )
+        self.assertEqual(self.provider.request_counts['/certs'], 2)
+
+        forger = FakeOAuthProvider()
+        forger.server.server_close()
+        forger.key_id = self.provider.key_id
+        with self.assertRaises(InvalidIDToken):
+            decode_google_id_token(
+                forger.sign_id_token(
+                    {**claims, 'iss': self.provider.base_url}, 'client-id'
+                )
+            )